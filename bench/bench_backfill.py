@@ -0,0 +1,66 @@
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+import time
+
+from bench.synthetic import make_listing_rows, render_grid_page
+from src.ingestion.backfill import backfill
+from src.ingestion.raw_archive import RawArchive
+
+# Usage:
+#   python -m bench.bench_backfill --days 60 --rows 2000 --page-size 500
+# Archives `days` synthetic snapshots (numeric grid pages, a slice of listings changing each day)
+# and rebuilds them all with 1, 2, 4, ... worker processes up to the core count, reporting
+# throughput and speedup over one worker.
+
+
+def build_archive(root: str, days: int, rows: int, page_size: int) -> None:
+    archive = RawArchive(root)
+    listings = make_listing_rows(rows)
+    churn = make_listing_rows(rows, seed=7)
+    n_pages = -(-rows // page_size)
+    for d in range(days):
+        day = f"2024-{1 + d // 28:02d}-{1 + d % 28:02d}"
+        # Each day swaps in a different 5% of the listings so pages are not all deduplicated.
+        lo = (d * rows // 20) % rows
+        day_rows = listings[:lo] + churn[lo:lo + rows // 20] + listings[lo + rows // 20:]
+        pages = []
+        for p in range(n_pages):
+            html = render_grid_page(
+                day_rows[p * page_size:(p + 1) * page_size], total_records=rows,
+                page=p + 1, page_count=n_pages, offer_all=False,
+            )
+            pages.append({"label": str(p + 1), "sha256": archive.put([html.encode("utf-8")])})
+        archive.write_day(day, pages, parser="lxml", total_records=rows, ingested_at=f"{day}T06:00:00Z")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time backfill from a synthetic raw archive across worker counts")
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--rows", type=int, default=2000, help="Listings per snapshot")
+    ap.add_argument("--page-size", type=int, default=500)
+    ap.add_argument("--parser", default="lxml")
+    args = ap.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, *(2**i for i in range(1, cores.bit_length()) if 2**i <= cores), cores})
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "archive")
+        t0 = time.perf_counter()
+        build_archive(root, args.days, args.rows, args.page_size)
+        print(f"archive: {args.days} days x {args.rows:,} rows built in {time.perf_counter() - t0:.1f}s ({cores} cores)")
+        print(f"{'workers':>7} {'seconds':>8} {'rows/s':>9} {'MB/s':>6} {'speedup':>8}")
+        base = None
+        for n in counts:
+            # Synthetic rows are messier than validation allows; it still runs (and is timed) per day.
+            s = backfill(
+                root, os.path.join(tmp, f"lake{n}"), None, workers=n, parser=args.parser, verbose=False,
+                skip_validation=True,
+            )
+            base = base or s["seconds"]
+            print(f"{n:>7} {s['seconds']:>8.2f} {s['rows_per_s']:>9,} {s['mb_per_s']:>6} {base / s['seconds']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+
+from bench.bench_pipeline import dbt_build
+from bench.synthetic import make_listing_rows
+from src.common.io_utils import today_str
+from src.ingestion.cdc import apply_snapshot
+from src.ingestion.details import DETAILS_SCHEMA, write_store
+from src.ingestion.lake import write_partition
+from src.ingestion.normalize import normalize_batch
+from src.ingestion.row_batch import RAW_FIELDS, RowBatch
+from streamlit_app.data_access import DataAccess, Filters
+
+# Usage:
+#   python -m bench.bench_dashboard --rows 1000000
+# Builds a throwaway warehouse with the tables the dashboard reads (dbt build over a synthetic lake)
+# and times one page rerun (KPIs, histogram, trends, first listings page) for a few filter
+# combinations: the previous
+# fetch-everything-then-pandas path vs. the data-access layer, cold on the fact tables, cold on
+# mart_listing_cube, and memoized; then the cost of a deep listings page via keyset vs. LIMIT/OFFSET.
+
+
+# Listings generated per make_listing_rows call.
+CHUNK = 100_000
+
+
+def build_warehouse(path: str, rows: int, threads: int = 4) -> None:
+    # The dashboard's tables as `dbt build` makes them, from a one-day synthetic lake of `rows` listings
+    # (everything mart_listing_cube and mart_price_trends read). Scratch files go next to path.
+    tmp = Path(path).parent
+    day = today_str()
+    batch = RowBatch()
+    for start in range(0, rows, CHUNK):
+        for r in make_listing_rows(min(CHUNK, rows - start), seed=start, start_id=10000 + start):
+            batch.append(tuple(r[f] for f in RAW_FIELDS))
+    table = normalize_batch(batch)
+    del batch
+    write_partition(table, tmp / "lake", day)
+    apply_snapshot(table, tmp / "cdc", day)
+    write_store(DETAILS_SCHEMA.empty_table(), tmp / "details")
+    dbt_build(
+        tmp, tmp / "lake", tmp / "cdc", tmp / "details", threads,
+        select=("+mart_listing_cube", "+mart_price_trends"), db=Path(path),
+    )
+
+
+def legacy_rerun(con: duckdb.DuckDBPyConnection, f: Filters) -> None:
+    # What app.py did before: pull every matching row, then aggregate in pandas.
+    q = """
+      select f.property_id, l.city, l.region, f.as_of_date, f.price, f.status, f.acres, f.sqft
+      from fact_listing_current f join dim_location l using (location_id) where 1=1
+    """
+    params: list = []
+    for col, vals in (("l.region", f.regions), ("l.city", f.cities), ("f.status", f.status)):
+        if vals:
+            q += f" and {col} in ({','.join('?' * len(vals))})"
+            params += list(vals)
+    df = con.execute(q, params).df()
+    len(df), df["price"].median(), df["sqft"].median(), df["acres"].median()
+    df.dropna(subset=["price"])["price"].value_counts(bins=30)
+    df.sort_values(["region", "city", "as_of_date"], ascending=[True, True, False])
+    con.execute("select city, region, week_start, median_price, listings from mart_price_trends").df()
+
+
+def new_rerun(da: DataAccess, f: Filters) -> None:
+    da.kpis("current", f)
+    da.price_histogram("current", f)
+    da.price_trends(f)
+    da.listings_page("current", f)
+
+
+def _time(fn: Callable[[], None], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time dashboard page reruns against a synthetic warehouse")
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=100.0, help="Fail if a memoized rerun is slower")
+    ap.add_argument("--deep-page", type=int, default=2000, help="Listings page to time keyset vs. OFFSET on")
+    args = ap.parse_args()
+
+    combos = {
+        "no filters": Filters(),
+        "region": Filters(regions=("Central",)),
+        "region+status": Filters(regions=("Northern", "Eastern"), status=("Sold",)),
+        "city": Filters(cities=("Toronto",)),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "io.duckdb")
+        t0 = time.perf_counter()
+        build_warehouse(path, args.rows)
+        print(f"warehouse: {args.rows:,} listings built in {time.perf_counter() - t0:.1f}s")
+
+        legacy = duckdb.connect(path, read_only=True)
+        da = DataAccess(path)
+        facts = DataAccess(path, use_cube=False)
+        ok = True
+        print(f"{'filters':<16} {'legacy ms':>10} {'facts ms':>9} {'cube ms':>9} {'memo ms':>9}")
+        for name, f in combos.items():
+            t_legacy = _time(lambda: legacy_rerun(legacy, f), args.repeat)
+
+            def cold(d: DataAccess):
+                d.clear()
+                new_rerun(d, f)
+            t_facts = _time(lambda: cold(facts), args.repeat)
+            t_cube = _time(lambda: cold(da), args.repeat)
+            new_rerun(da, f)
+            t_memo = _time(lambda: new_rerun(da, f), args.repeat)
+            ok &= t_memo <= args.budget_ms
+            print(f"{name:<16} {t_legacy:>10.1f} {t_facts:>9.1f} {t_cube:>9.1f} {t_memo:>9.2f}")
+        n_cells = legacy.execute("select count(*) from mart_listing_cube").fetchone()[0]
+        print(f"cube: {n_cells:,} cells")
+
+        f = Filters()
+        offset_sql = '''
+          select f.property_id, l.city, l.region, f.as_of_date, f.price, f.status, f.acres, f.sqft
+          from fact_listing_current f join dim_location l using (location_id)
+          order by l.region, l.city, f.as_of_date desc, f.property_id
+          limit ? offset ?
+        '''
+        skip = (args.deep_page - 1) * da.page_size
+        # The cursor a user would hold after paging to deep_page - 1 is the row just before it.
+        last = legacy.execute(offset_sql, [1, skip - 1]).fetch_arrow_table().to_pylist()[0]
+        after = (last["region"], last["city"], last["as_of_date"], last["property_id"])
+        t_keyset = _time(lambda: (da.clear(), da.listings_page("current", f, after)), args.repeat)
+        t_offset = _time(
+            lambda: legacy.execute(offset_sql, [da.page_size, skip]).fetch_arrow_table(),
+            args.repeat,
+        )
+        print(f"page {args.deep_page}: keyset {t_keyset:.1f} ms, offset {t_offset:.1f} ms")
+        legacy.close()
+        da.pool.close()
+        facts.pool.close()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable
+
+import duckdb
+
+from bench.synthetic import REGIONS, STATUSES
+from streamlit_app.data_access import DataAccess, Filters
+
+# Usage:
+#   python -m bench.bench_history --properties 100000 --days 90
+# Builds a throwaway warehouse with a synthetic fact_price_history (plus the fact_listing_daily rows
+# the same history implies) and times the history queries: one property's timeline from the sorted
+# history vs. the same versions unsorted vs. fact_listing_daily; a market-wide as-of summary from the
+# validity interval ("as_of" mode) vs. an ASOF JOIN vs. a latest-version window vs. the daily fact
+# (checking all four agree), plus a cold "as_of" dashboard rerun; and point-in-time prices for a
+# batch of (property_id, at) probes via prices_at (an interval join) vs. an ASOF JOIN vs. a range
+# join + arg_max.
+
+
+def build_warehouse(path: str, properties: int, days: int, start: date) -> None:
+    cities = [(c, r) for r, cs in REGIONS.items() for c in cs]
+    statuses = [s for s in STATUSES if s]
+    con = duckdb.connect(path)
+    con.execute("create table locs as select * from (values {}) t(city, region)".format(
+        ",".join(f"('{c}', '{r}')" for c, r in cities)))
+    con.execute("""
+        create table dim_location as
+        select md5(concat_ws('||', city, region)) as location_id, city, region from locs
+    """)
+    # Up to 6 versions per property, 3-45 days each; every 9th property's last version is closed
+    # (delisted). Same columns as dbt/models/facts/fact_price_history.sql.
+    con.execute(f"""
+        create table versions as
+        with v as (
+          select
+            p, k,
+            (cast(hash(p) % {days} as int) + coalesce(sum(3 + cast(hash(p * 7 + k) % 43 as int))
+              over (partition by p order by k rows between unbounded preceding and 1 preceding), 0))::int as start_day,
+            (hash(p * 3) % 9000 + 10) * 1000.0 * (1 - k * 0.02) as price,
+            {statuses!r}[1 + cast(hash(p * 11 + k) % {len(statuses)} as int)] as status
+          from range({properties}) a(p), range(6) b(k)
+        ),
+        w as (
+          select *, lead(start_day) over (partition by p order by k) as next_day
+          from v
+          where start_day < {days}
+        )
+        select
+          10000 + p as property_id,
+          date '{start}' + start_day as valid_from,
+          case when next_day is not null then date '{start}' + next_day
+               when p % 9 = 0 then date '{start}' + least(start_day + 10, {days}) end as valid_to,
+          price, status,
+          date '{start}' - cast(hash(p) % 900 as int) as posted_date,
+          (hash(p * 5) % 250000) / 100.0 as acres,
+          (hash(p * 13) % 250000)::double as sqft,
+          l.location_id
+        from w
+        join (select *, row_number() over () - 1 as i from dim_location) l on l.i = p % {len(cities)}
+    """)
+    con.execute("""
+        create table history as
+        select
+          *,
+          valid_to is null as is_current,
+          lag(price)    over w as prev_price,
+          lag(status)   over w as prev_status,
+          lag(valid_to) over w as prev_valid_to,
+          prev_valid_to is null or prev_valid_to < valid_from as listed,
+          price - prev_price as price_delta,
+          round(100 * (price - prev_price) / nullif(prev_price, 0), 2) as price_change_pct,
+          valid_from - posted_date as days_on_market
+        from versions
+        window w as (partition by property_id order by valid_from)
+    """)
+    con.execute("create table fact_price_history as select * from history order by property_id, valid_from")
+    con.execute("create table history_unsorted as select * from history order by hash(property_id, valid_from)")
+    con.execute("""
+        create table fact_price_events as
+        select property_id, valid_from as event_date, 'price_change' as event_type, price, prev_price,
+               status, prev_status, location_id, days_on_market, price_delta, price_change_pct
+        from fact_price_history
+        where not listed and price is distinct from prev_price
+        order by property_id, event_date
+    """)
+    # One row per property per day it was listed, loaded day by day like the incremental model.
+    con.execute(f"""
+        create table fact_listing_daily as
+        select v.property_id, date '{start}' + d as snapshot_date, v.price, v.status, v.location_id
+        from (select d::int as d from range({days}) r(d)) r
+        join versions v
+          on v.valid_from <= date '{start}' + d and (v.valid_to is null or v.valid_to > date '{start}' + d)
+        order by snapshot_date
+    """)
+    con.execute("drop table locs")
+    con.execute("drop table versions")
+    con.execute("drop table history")
+    con.close()
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time price-history timelines and as-of lookups")
+    ap.add_argument("--properties", type=int, default=100_000)
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--probes", type=int, default=10_000, help="(property_id, at) pairs for prices_at")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=150.0, help="Fail if a cold as-of dashboard page is slower")
+    args = ap.parse_args()
+
+    start = date(2026, 1, 1)
+    as_of = start + timedelta(days=args.days * 2 // 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "io.duckdb")
+        t0 = time.perf_counter()
+        build_warehouse(path, args.properties, args.days, start)
+        con = duckdb.connect(path, read_only=True)
+        n_versions, n_daily = con.execute(
+            "select (select count(*) from fact_price_history), (select count(*) from fact_listing_daily)"
+        ).fetchone()
+        print(f"warehouse: {args.properties:,} properties, {n_versions:,} versions, {n_daily:,} daily rows "
+              f"built in {time.perf_counter() - t0:.1f}s")
+        da = DataAccess(path)
+        ok = True
+
+        pid = 10000 + args.properties // 2
+        one = "select * from {} where property_id = ? order by {}"
+        timeline = {
+            "sorted history": lambda: con.execute(one.format("fact_price_history", "valid_from"), [pid]).fetchall(),
+            "unsorted history": lambda: con.execute(one.format("history_unsorted", "valid_from"), [pid]).fetchall(),
+            "fact_listing_daily": lambda: con.execute(one.format("fact_listing_daily", "snapshot_date"), [pid]).fetchall(),
+            "DataAccess.timeline": lambda: (da.clear(), da.timeline(pid)),
+        }
+        print(f"\n{'timeline of one property':<28} {'ms':>8}")
+        for name, fn in timeline.items():
+            print(f"{name:<28} {_time(fn, args.repeat):>8.2f}")
+
+        # The same count + median over each way of getting the market on one day.
+        summary = "select count(*), median(price) from ({}) s"
+        snapshot = {
+            "interval (as_of mode)": ("""
+                select * from fact_price_history
+                where valid_from <= $d and (valid_to is null or valid_to > $d)
+            """),
+            "asof join": """
+                select h.* from (select distinct property_id, $d as at from fact_price_history) p
+                asof join fact_price_history h on p.property_id = h.property_id and p.at >= h.valid_from
+                where h.valid_to is null or h.valid_to > p.at
+            """,
+            "latest-version window": """
+                select * from (
+                  select * from fact_price_history where valid_from <= $d
+                  qualify row_number() over (partition by property_id order by valid_from desc) = 1
+                ) where valid_to is null or valid_to > $d
+            """,
+            "fact_listing_daily": "select * from fact_listing_daily where snapshot_date = $d",
+        }
+        results = {}
+        print(f"\n{'market as of ' + str(as_of):<28} {'ms':>8}")
+        for name, sql in snapshot.items():
+            q = summary.format(sql).replace("$d", "$d::date")
+            results[name] = con.execute(q, {"d": as_of}).fetchone()
+            print(f"{name:<28} {_time(lambda: con.execute(q, {'d': as_of}).fetchall(), args.repeat):>8.2f}")
+        ok &= len(set(results.values())) == 1
+        f = Filters(as_of=as_of)
+        t_page = _time(lambda: (da.clear(), da.kpis("as_of", f), da.listings_page("as_of", f)), args.repeat)
+        ok &= t_page <= args.budget_ms
+        print(f"{'as_of KPIs+hist+page, cold':<28} {t_page:>8.2f}   ({results['fact_listing_daily'][0]:,} listings, "
+              f"{'same' if len(set(results.values())) == 1 else 'DIFFERENT'} across paths)")
+
+        probes = con.execute(f"""
+            select 10000 + cast(hash(i) % {args.properties} as int) as property_id,
+                   date '{start}' + cast(hash(i * 7) % {args.days} as int) as at
+            from range({args.probes}) r(i)
+        """).fetch_arrow_table()
+        con.register("probes", probes)
+        points = {
+            "prices_at (interval join)": lambda: da.prices_at(probes),
+            "asof join": lambda: con.execute("""
+                select p.*, h.price from probes p
+                asof left join fact_price_history h on p.property_id = h.property_id and p.at >= h.valid_from
+            """).fetchall(),
+            "range join + arg_max": lambda: con.execute("""
+                select p.property_id, p.at, arg_max(h.price, h.valid_from) as price
+                from probes p
+                left join fact_price_history h on h.property_id = p.property_id and h.valid_from <= p.at
+                group by all
+            """).fetchall(),
+        }
+        print(f"\n{f'{args.probes:,} point-in-time probes':<28} {'ms':>8}")
+        for name, fn in points.items():
+            print(f"{name:<28} {_time(fn, args.repeat):>8.2f}")
+
+        con.close()
+        da.pool.close()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
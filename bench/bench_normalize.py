@@ -0,0 +1,113 @@
+from __future__ import annotations
+import argparse
+import csv
+import io
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+from bench.synthetic import make_listing_rows
+from src.ingestion.normalize import DETAILS_BASE, IMAGE_BASE, OUTPUT_COLUMNS, normalize_rows
+
+# Usage:
+#   python -m bench.bench_normalize --sizes 10000 100000 1000000
+
+
+def normalize_rows_reference(rows: list[dict]) -> pd.DataFrame:
+    # The original per-row Series.apply implementation, kept verbatim as the oracle.
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows).drop_duplicates(subset=["property_id", "address", "posted"], keep="first")
+
+    def to_float(x: Optional[str]) -> Optional[float]:
+        if x is None:
+            return None
+        x = str(x).replace(",", "").strip()
+        try:
+            return float(x)
+        except Exception:
+            return None
+
+    def clean_price(x: Optional[str]) -> Optional[float]:
+        if not x:
+            return None
+        digits = "".join(ch for ch in str(x) if ch.isdigit() or ch == ".")
+        return float(digits) if digits else None
+
+    df["acres_val"] = df["acres"].apply(to_float)
+    df["sqft_val"] = df["sqft"].apply(to_float)
+    df["price"] = df["price_raw"].apply(clean_price)
+
+    def parse_date(s: Optional[str]) -> Optional[str]:
+        if not s:
+            return None
+        try:
+            return pd.to_datetime(s, errors="coerce").date().isoformat()
+        except Exception:
+            return None
+
+    df["posted_date"] = df["posted"].apply(parse_date)
+
+    def abs_url(u: Optional[str], base: str) -> Optional[str]:
+        if not u:
+            return None
+        if u.startswith("http"):
+            return u
+        if u.startswith("/"):
+            return f"https://apps.infrastructureontario.ca{u}"
+        if "?" in u:
+            return f"https://apps.infrastructureontario.ca/propertiesforsale/{u}"
+        return f"{base}?{u}"
+
+    df["details_abs"] = df["details_url"].apply(lambda u: abs_url(u, DETAILS_BASE))
+    df["image_abs"] = df["image_url"].apply(lambda u: abs_url(u, IMAGE_BASE))
+
+    df["ingested_at"] = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    return df[OUTPUT_COLUMNS]
+
+
+def _csv_bytes(df: pd.DataFrame) -> bytes:
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, quoting=csv.QUOTE_NONNUMERIC)
+    return buf.getvalue().encode("utf-8")
+
+
+def _identical(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    a = a.assign(ingested_at="x")
+    b = b.assign(ingested_at="x")
+    return list(a.dtypes) == list(b.dtypes) and a.equals(b) and _csv_bytes(a) == _csv_bytes(b)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark normalize_rows against the per-row reference")
+    ap.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000])
+    ap.add_argument("--skip-reference-above", type=int, default=200_000, help="Reference is slow; skip it above N rows")
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'rows':>10} {'vectorized s':>13} {'rows/s':>12} {'reference s':>12} {'speedup':>8}  identical")
+    for n in args.sizes:
+        rows = make_listing_rows(n, seed=n)
+        t0 = time.perf_counter()
+        fast = normalize_rows(rows)
+        t_fast = time.perf_counter() - t0
+
+        if n > args.skip_reference_above:
+            print(f"{n:>10,} {t_fast:>13.3f} {n / t_fast:>12,.0f} {'-':>12} {'-':>8}  (skipped)")
+            continue
+        t0 = time.perf_counter()
+        ref = normalize_rows_reference(rows)
+        t_ref = time.perf_counter() - t0
+        same = _identical(fast, ref)
+        ok &= same
+        print(f"{n:>10,} {t_fast:>13.3f} {n / t_fast:>12,.0f} {t_ref:>12.3f} {t_ref / t_fast:>7.1f}x  {'yes' if same else 'NO'}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
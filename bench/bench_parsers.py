@@ -0,0 +1,109 @@
+from __future__ import annotations
+import argparse
+import glob
+import multiprocessing as mp
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bench.synthetic import make_listing_rows, render_grid_page
+from src.ingestion.parser_backends import PARSER_BACKENDS, get_parser_backend
+from src.ingestion.stream_parser import GridStreamParser, iter_grid_rows
+
+BACKENDS = sorted([*PARSER_BACKENDS, "stream"])
+CHUNK = 64 * 1024
+
+# Usage:
+#   python -m bench.bench_parsers --synthetic 1000 10000 50000
+#   python -m bench.bench_parsers --html 'data/fixtures/*.html'
+
+
+def _run_backend(name: str, pages: list[str], repeat: int) -> dict:
+    # Runs in a fresh process so ru_maxrss reflects this backend alone.
+    backend = get_parser_backend(name) if name != "stream" else None
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    rows: list[list[dict]] = []
+    totals: list = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = []
+        totals = []
+        for text in pages:
+            if backend is None:
+                parser = GridStreamParser()
+                chunks = (text[i:i + CHUNK] for i in range(0, len(text), CHUNK))
+                rows.append(list(iter_grid_rows(chunks, parser)))
+                totals.append(parser.total_records)
+                continue
+            doc = backend.load_document(text)
+            rows.append(backend.parse_results_table(doc))
+            totals.append(backend.parse_total_records(doc))
+            backend.extract_form_state(doc)
+            backend.find_pagination_postbacks(doc)
+            del doc
+        best = min(best, time.perf_counter() - t0)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "backend": name,
+        "rows": rows,
+        "totals": totals,
+        "seconds": best,
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def _bench(label: str, pages: list[str], backends: list[str], repeat: int) -> bool:
+    ctx = mp.get_context("spawn")
+    results = []
+    for name in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(_run_backend, name, pages, repeat).result())
+
+    reference = results[0]
+    n_rows = sum(len(r) for r in reference["rows"])
+    mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    ok = True
+    print(f"\n== {label}: {len(pages)} page(s), {mb:.1f} MB, {n_rows} rows ==")
+    print(f"{'backend':<8} {'seconds':>9} {'rows/s':>11} {'MB/s':>8} {'peak RSS MB':>12} {'growth MB':>10}  identical")
+    for r in results:
+        same = r["rows"] == reference["rows"] and r["totals"] == reference["totals"]
+        ok &= same
+        rate = n_rows / r["seconds"] if r["seconds"] else float("inf")
+        print(
+            f"{r['backend']:<8} {r['seconds']:>9.3f} {rate:>11,.0f} {mb / r['seconds']:>8.1f} "
+            f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>10.1f}  {'yes' if same else 'NO'}"
+        )
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark HTML parser backends on saved or synthetic grid pages")
+    ap.add_argument("--html", nargs="*", default=[], help="Saved Home.aspx pages (globs allowed)")
+    ap.add_argument("--synthetic", nargs="*", type=int, default=[], help="Generate an 'All' page with N listings")
+    ap.add_argument("--backends", nargs="+", default=["bs4", "lxml", "stream"], choices=BACKENDS)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if not args.html and not args.synthetic:
+        args.synthetic = [1000, 10000]
+
+    ok = True
+    files = sorted({f for pattern in args.html for f in glob.glob(pattern)})
+    if files:
+        pages = [Path(f).read_text(encoding="utf-8", errors="replace") for f in files]
+        ok &= _bench(f"saved pages ({args.html})", pages, args.backends, args.repeat)
+    for n in args.synthetic:
+        page = render_grid_page(make_listing_rows(n), page_count=max(1, n // 50))
+        ok &= _bench(f"synthetic {n} listings", [page], args.backends, args.repeat)
+
+    if not ok:
+        print("\nBackends disagree; see 'identical' column.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import requests
+
+from bench.mock_server import serve_in_subprocess
+from src.common.instrumentation import peak_rss_mb
+from src.common.run_journal import RunJournal
+from src.common.io_utils import atomic_open, ensure_dir, today_str
+from src.ingestion import io_scrape
+from src.ingestion.cdc import apply_snapshot
+from src.ingestion.details import DETAILS_SCHEMA, write_store
+from src.ingestion.lake import write_csv, write_partition
+from src.ingestion.normalize import finish_chunks, normalize_chunk
+from src.ingestion.raw_archive import RawArchive
+from src.ingestion.validate import validate
+
+# Usage:
+#   python -m bench.bench_pipeline --sizes 1000 10000 100000     (make bench)
+# Serves N synthetic listings from bench/mock_server.py and times the daily pipeline against it:
+# iter_crawl (fetch + parse + normalize_chunk, as a scrape runs it) -> finish_chunks -> validate -> write (CSV, lake partition, CDC) ->
+# dbt build into a throwaway warehouse. Each size runs in a fresh process, so the peak RSS after
+# each stage belongs to that size alone (dbt's is its own process's). Results are printed and
+# saved as JSON under --out.
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def dbt_build(
+    tmp: Path, lake: Path, cdc: Path, details: Path, threads: int, select: tuple[str, ...] = (), db: Optional[Path] = None
+) -> dict[str, Any]:
+    # `dbt build [--select ...]` of the project into db (default tmp/io.duckdb); dbt's target, logs
+    # and profile go under tmp. Failing data tests (the synthetic rows are as messy as the site's) only
+    # warn, so they are counted without skipping the models downstream of them.
+    profiles = ensure_dir(tmp / "profiles")
+    (profiles / "profiles.yml").write_text(
+        "io_duckdb:\n  target: bench\n  outputs:\n    bench:\n"
+        f"      type: duckdb\n      path: {db or tmp / 'io.duckdb'}\n      threads: {threads}\n"
+    )
+    env = {
+        **os.environ, "DBT_PROFILES_DIR": str(profiles), "IO_LAKE_DIR": str(lake), "IO_CDC_DIR": str(cdc),
+        "IO_DETAILS_DIR": str(details), "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION": "python",
+    }
+    cmd = [
+        "dbt", "build", "--quiet", "--threads", str(threads), "--vars", "{test_severity: warn}",
+        "--target-path", str(tmp / "target"), "--log-path", str(tmp / "logs"),
+    ] + (["--select", *select] if select else [])
+    proc = subprocess.run(cmd, cwd=PROJECT_ROOT / "dbt", env=env, capture_output=True, text=True)
+    results_path = tmp / "target" / "run_results.json"
+    statuses = [r["status"] for r in json.loads(results_path.read_text())["results"]] if results_path.exists() else []
+    if proc.returncode != 0:
+        raise RuntimeError(f"dbt build failed:\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}")
+    return {
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "nodes": len(statuses),
+        "failed_tests": statuses.count("warn"),
+    }
+
+
+def run_size(rows: int, offer_all: bool, parser: str, page_workers: int, dbt: bool, threads: int) -> dict[str, Any]:
+    stages: list[dict[str, Any]] = []
+
+    def stage(name: str, t0: float, items: int, **extra: Any) -> None:
+        seconds = time.perf_counter() - t0
+        stages.append({
+            "stage": name, "seconds": round(seconds, 3), "items": items,
+            "items_per_s": round(items / seconds) if seconds > 0 else None, "peak_rss_mb": peak_rss_mb(), **extra,
+        })
+
+    site_args = ["--rows", str(rows)] + ([] if offer_all else ["--no-all"])
+    with tempfile.TemporaryDirectory() as d, serve_in_subprocess(*site_args) as url:
+        tmp = Path(d)
+        io_scrape.BASE_URL = url
+        day = today_str()
+
+        # As run() crawls: journaled pages, every response archived, each chunk normalized as it arrives.
+        t0 = time.perf_counter()
+        crawl: dict[str, Any] = {}
+        ingested_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        pieces = [
+            normalize_chunk(chunk, ingested_at) for chunk in io_scrape.iter_crawl(
+                requests.Session(), sleep=0, parser=parser, workers=page_workers, state=crawl,
+                journal=RunJournal(tmp / "raw" / day), archive=RawArchive(tmp / "archive"),
+            )
+        ]
+        stage("iter_crawl", t0, sum(p.num_rows for p in pieces), pages=crawl["pages"])
+
+        t0 = time.perf_counter()
+        table = finish_chunks(pieces)
+        stage("finish_chunks", t0, table.num_rows)
+        del pieces
+
+        t0 = time.perf_counter()
+        check = validate(table, total_records=rows)
+        stage("validate", t0, table.num_rows, validation=check["status"])
+
+        t0 = time.perf_counter()
+        write_csv(table, ensure_dir(tmp / "raw" / day) / "io_listings.csv")
+        write_partition(table, tmp / "lake", day)
+        apply_snapshot(table, tmp / "cdc", day)
+        write_store(DETAILS_SCHEMA.empty_table(), tmp / "details")
+        stage("write", t0, table.num_rows)
+
+        if dbt:
+            t0 = time.perf_counter()
+            extra = dbt_build(tmp, tmp / "lake", tmp / "cdc", tmp / "details", threads)
+            stage("dbt build", t0, table.num_rows, **{"dbt_" + k: v for k, v in extra.items()})
+    return {"rows": rows, "stages": stages}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end pipeline benchmark against the local mock site")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--no-all", action="store_true", help="Make the mock page the grid instead of offering 'All'")
+    ap.add_argument("--parser", default="lxml", help="Grid parser for iter_crawl (as io_scrape --parser)")
+    ap.add_argument("--page-workers", type=int, default=1, help="as io_scrape --page-workers")
+    ap.add_argument("--skip-dbt", action="store_true")
+    ap.add_argument("--threads", type=int, default=4, help="dbt threads")
+    ap.add_argument("--out", default="data/bench", help="Folder for the JSON results")
+    args = ap.parse_args()
+
+    results = []
+    print(f"{'rows':>8} {'stage':<20} {'seconds':>8} {'items/s':>10} {'peak MB':>8}")
+    for n in args.sizes:
+        # A fresh interpreter per size keeps peak RSS attributable.
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            res = pool.submit(run_size, n, not args.no_all, args.parser, args.page_workers, not args.skip_dbt, args.threads).result()
+        results.append(res)
+        for s in res["stages"]:
+            peak = s.get("dbt_peak_rss_mb", s["peak_rss_mb"])
+            print(f"{n:>8} {s['stage']:<20} {s['seconds']:>8.3f} {s['items_per_s'] or 0:>10,} {peak:>8}")
+
+    dest = ensure_dir(args.out) / f"bench_pipeline_{datetime.now():%Y%m%dT%H%M%S}.json"
+    with atomic_open(dest, "w") as f:
+        json.dump({"args": vars(args), "results": results}, f, indent=2)
+    print(f"-> {dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+import argparse
+import gc
+import multiprocessing as mp
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pyarrow as pa
+
+from bench.synthetic import make_listing_rows, render_grid_page
+from src.ingestion.lake import to_arrow
+from src.ingestion.normalize import normalize_batch, normalize_rows
+from src.ingestion.parser_backends import get_parser_backend
+from src.ingestion.row_batch import RowBatch
+
+# Usage:
+#   python -m bench.bench_rows --sizes 10000 100000 [--parser lxml]
+# Parsed rows held as a list of dicts (parse_results_table -> normalize_rows -> to_arrow) vs a
+# RowBatch (parse_results_batch -> normalize_batch). Each path runs in a fresh process on the same
+# rendered page; "held" is the RSS growth while the parsed rows are alive, "peak" the growth up
+# to the end of normalization. Also checks both paths produce the same table.
+
+PATHS = ("dicts", "RowBatch")
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_path(path: str, n: int, parser: str) -> dict[str, Any]:
+    backend = get_parser_backend(parser)
+    doc = backend.load_document(render_grid_page(make_listing_rows(n, seed=n), page=1, page_count=1))
+    gc.collect()
+    base = _rss_mb()
+
+    t0 = time.perf_counter()
+    rows = backend.parse_results_table(doc) if path == "dicts" else backend.parse_results_batch(doc, RowBatch())
+    t_parse = time.perf_counter() - t0
+    held = _rss_mb() - base
+
+    t0 = time.perf_counter()
+    table = to_arrow(normalize_rows(rows)) if path == "dicts" else normalize_batch(rows)
+    t_norm = time.perf_counter() - t0
+    return {
+        "parse_s": t_parse, "held_mb": held, "normalize_s": t_norm, "peak_mb": _rss_mb() - base,
+        "table": table.drop_columns(["ingested_at"]),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memory/time of dict rows vs the columnar RowBatch")
+    ap.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000])
+    ap.add_argument("--parser", default="lxml", choices=["bs4", "lxml"])
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'rows':>8} {'path':<9} {'parse s':>8} {'held MB':>8} {'normalize s':>12} {'peak MB':>8}  identical")
+    for n in args.sizes:
+        tables: list[pa.Table] = []
+        for path in PATHS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                r = pool.submit(_run_path, path, n, args.parser).result()
+            tables.append(r["table"])
+            same = "" if len(tables) == 1 else "yes" if tables[0].equals(tables[1]) else "NO"
+            ok &= same != "NO"
+            print(
+                f"{n:>8,} {path:<9} {r['parse_s']:>8.3f} {r['held_mb']:>8.1f} {r['normalize_s']:>12.3f} "
+                f"{r['peak_mb']:>8.1f}  {same}"
+            )
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import duckdb
+import pyarrow as pa
+
+from bench.synthetic import REGIONS
+from streamlit_app.data_access import AddressIndex, DataAccess
+
+# Usage:
+#   python -m bench.bench_search --documents 200000 --queries 200
+# Builds a throwaway warehouse with synthetic search_documents/search_grams (addresses like the
+# site's, in the shapes the listings use) and times address search: loading AddressIndex, then a
+# typeahead query through DataAccess.search vs. the same Jaccard ranking as a SQL join on
+# search_grams vs. an ILIKE scan of the documents. Queries are documents retyped the way people
+# type them (suffix spelled out or abbreviated, case, a dropped or swapped letter), and recall@10
+# counts how often the retyped document comes back.
+
+NAMES = ["Main", "King", "Queen", "Lakeshore", "Bay", "Yonge", "Dundas", "Bloor", "Victoria", "Church",
+         "Maple", "Elm", "Pine", "Cedar", "Sainte-Anne", "Mount Pleasant", "Fort William", "Algonquin"]
+SUFFIXES = [("Street", "St"), ("Road", "Rd"), ("Avenue", "Ave"), ("Drive", "Dr"), ("Crescent", "Cres"),
+            ("Highway", "Hwy"), ("Concession", "Conc")]
+DIRECTIONS = [("", ""), ("East", "E"), ("West", "W")]
+
+# Stand-ins for the macros dbt/macros/text.sql creates on-run-start (same rules, shorter word list).
+WORDS = {"street": "st", "road": "rd", "avenue": "ave", "drive": "dr", "crescent": "cres", "highway": "hwy",
+         "concession": "conc", "east": "e", "west": "w", "saint": "st", "sainte": "ste", "mount": "mt",
+         "fort": "ft", "and": "&"}
+MACROS = """
+    create or replace macro canonical_address(s) as nullif(array_to_string(list_transform(
+      string_split(trim(regexp_replace(lower(strip_accents(s)), '[^a-z0-9&]+', ' ', 'g')), ' '),
+      w -> case w {} else w end
+    ), ' '), '');
+    create or replace macro trigrams(s) as list_distinct(list_transform(
+      range(1, length(s) + 1), i -> substr(' ' || s || ' ', i::int, 3)
+    ));
+""".format(" ".join(f"when '{k}' then '{v}'" for k, v in WORDS.items()))
+
+
+def make_addresses(n: int, rng: random.Random) -> list[tuple[int, str, str, str]]:
+    cities = [(c, r) for r, cs in REGIONS.items() for c in cs]
+    rows = []
+    for i in range(n):
+        suffix, direction = rng.choice(SUFFIXES), rng.choice(DIRECTIONS)
+        long = rng.random() < 0.5
+        address = " ".join(filter(None, [
+            str(rng.randint(1, 9999)), rng.choice(NAMES), suffix[0] if long else suffix[1],
+            direction[0] if long else direction[1],
+        ]))
+        city, region = rng.choice(cities)
+        rows.append((10000 + i, address, city, region))
+    return rows
+
+
+def retype(address: str, city: str, rng: random.Random) -> str:
+    words = address.split()
+    for long, short in SUFFIXES + DIRECTIONS[1:]:
+        words = [short if w == long else long if w == short else w for w in words]
+    text = " ".join(words + ([city] if rng.random() < 0.3 else []))
+    if rng.random() < 0.5:
+        i = rng.randrange(1, len(text) - 1)
+        text = text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+    return text.lower() if rng.random() < 0.5 else text
+
+
+def build_warehouse(path: str, rows: list[tuple[int, str, str, str]]) -> None:
+    con = duckdb.connect(path)
+    con.execute(MACROS)
+    con.register("src_rows", pa.Table.from_pylist(
+        [dict(zip(("property_id", "address", "city", "region"), r)) for r in rows],
+        pa.schema([("property_id", pa.int32()), ("address", pa.string()), ("city", pa.string()), ("region", pa.string())]),
+    ))
+    con.execute("create table src as select * from src_rows")
+    con.execute("""
+        create table dim_location as
+        select distinct md5(concat_ws('||', city, region)) as location_id, city, region from src
+    """)
+    # Same columns as dbt/models/search/search_documents.sql and search_grams.sql (city is
+    # canonicalized as an address here; the place words are a subset).
+    con.execute("""
+        create table search_documents as
+        select property_id, address, md5(concat_ws('||', city, region)) as location_id, document,
+               len(trigrams(document)) as n_grams, now() as indexed_at
+        from (select *, concat_ws(' ', canonical_address(address), canonical_address(city)) as document from src)
+    """)
+    con.execute("""
+        create table search_grams as
+        select gram, property_id, indexed_at
+        from (select property_id, indexed_at, unnest(trigrams(document)) as gram from search_documents)
+        order by gram, property_id
+    """)
+    con.execute("drop table src")
+    con.close()
+
+
+def _time(fn: Callable[[], object], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time address search: trigram index vs. SQL")
+    ap.add_argument("--documents", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--budget-ms", type=float, default=20.0, help="Fail if the p95 typeahead query is slower")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = make_addresses(args.documents, rng)
+    targets = [rows[rng.randrange(len(rows))] for _ in range(args.queries)]
+    queries = [(pid, retype(address, city, rng)) for pid, address, city, _ in targets]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "io.duckdb")
+        t0 = time.perf_counter()
+        build_warehouse(path, rows)
+        con = duckdb.connect(path, read_only=True)
+        n_grams = con.execute("select count(*) from search_grams").fetchone()[0]
+        print(f"warehouse: {args.documents:,} documents, {n_grams:,} postings built in {time.perf_counter() - t0:.1f}s")
+        t0 = time.perf_counter()
+        index = AddressIndex(con.cursor())
+        print(f"AddressIndex load: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        da = DataAccess(path)
+        sql_jaccard = """
+            with q as (select unnest(coalesce(trigrams(c), [])) as gram, count(*) over () as n
+                       from (select canonical_address($text) as c))
+            select property_id, count(*) / (any_value(q.n) + any_value(d.n_grams) - count(*)) as score
+            from q join search_grams g using (gram) join search_documents d using (property_id)
+            group by property_id
+            order by score desc, property_id
+            limit 10
+        """
+        ilike = """
+            select property_id from search_documents
+            where address ilike '%' || $text || '%' or document ilike '%' || canonical_address($text) || '%'
+            order by property_id
+            limit 10
+        """
+        paths = {
+            "DataAccess.search": lambda t: da.search(t, 10)["property_id"].to_pylist(),
+            "sql gram join": lambda t: [r[0] for r in con.execute(sql_jaccard, {"text": t}).fetchall()],
+            "ilike scan": lambda t: [r[0] for r in con.execute(ilike, {"text": t}).fetchall()],
+        }
+        da.search("warm up", 10)
+        print(f"\n{f'{args.queries} typeahead queries':<22} {'p50 ms':>8} {'p95 ms':>8} {'recall@10':>10}")
+        ok = True
+        for name, fn in paths.items():
+            samples, hits = [], 0
+            for pid, text in queries:
+                t0 = time.perf_counter()
+                found = fn(text)
+                samples.append((time.perf_counter() - t0) * 1000)
+                hits += pid in found
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            if name == "DataAccess.search":
+                ok &= p95 <= args.budget_ms
+            print(f"{name:<22} {statistics.median(samples):>8.2f} {p95:>8.2f} {hits / len(queries):>10.1%}")
+
+        grams = con.execute("select trigrams(canonical_address($t))", {"t": queries[0][1]}).fetchone()[0]
+        print(f"\nAddressIndex.search alone: {statistics.median(_time(lambda: index.search(grams, 10), 50)):.2f} ms "
+              f"({len(grams)} grams)")
+        con.close()
+        da.pool.close()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.bench_dashboard import build_warehouse
+
+# Usage:
+#   python -m bench.bench_startup --rows 200000
+# Times what a user waits for before anything happens, each in a fresh interpreter: importing each
+# entrypoint (python -X importtime: total and the heaviest top-level packages), `--help` of the CLIs,
+# and the dashboard's first render (every query app.py runs before a widget changes, in every mode)
+# on a throwaway warehouse, cold vs. served from the warm start file, checking both give the same KPIs.
+
+ENTRYPOINTS = ["src.ingestion.io_scrape", "src.ingestion.watch", "scripts.inspect_duckdb", "streamlit_app.data_access"]
+CLIS = ["src.ingestion.io_scrape", "src.ingestion.watch", "scripts.inspect_duckdb", "scripts.warm_start"]
+OWN = {"src", "scripts", "streamlit_app", "bench"}
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Runs in the child: import to first render, with the warm start or without.
+FIRST_RENDER = """
+import sys, time
+t0 = time.perf_counter()
+from streamlit_app.data_access import DataAccess
+da = DataAccess(sys.argv[1], use_warm_start=sys.argv[2] == "1")
+kpis = da.first_render()
+print((time.perf_counter() - t0) * 1000)
+print(repr(sorted(kpis.items())))
+"""
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_profile(module: str) -> tuple[float, list[tuple[str, float]]]:
+    # Everything after interpreter startup (the `site` line): total = sum of self times; packages =
+    # cumulative time of each outermost package outside this repo (nested ones count in theirs).
+    lines = [IMPORT_LINE.match(line) for line in _run(["-X", "importtime", "-c", f"import {module}"]).stderr.splitlines()]
+    lines = [m for m in lines if m]
+    lines = lines[next(i for i, m in enumerate(lines) if m.group(4) == "site" and not m.group(3)) + 1:]
+    # importtime prints a module after its imports, so walk it backwards to see parents first.
+    top, parents = [], []
+    for m in reversed(lines):
+        depth, name = len(m.group(3)), m.group(4)
+        while parents and parents[-1] >= depth:
+            parents.pop()
+        if name.split(".")[0] in OWN:
+            continue
+        if not parents and "." not in name:
+            top.append((name, int(m.group(2)) / 1000))
+        parents.append(depth)
+    return sum(int(m.group(1)) for m in lines) / 1000, sorted(top, key=lambda t: -t[1])
+
+
+def _wall(args: list[str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _run(args)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def first_render(path: str, warm: bool, repeat: int) -> tuple[float, float, str]:
+    # (median in-process ms, median process wall ms, KPIs)
+    inner, wall, kpis = [], [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = _run(["-c", FIRST_RENDER, path, "1" if warm else "0"]).stdout.splitlines()
+        wall.append((time.perf_counter() - t0) * 1000)
+        inner.append(float(out[0]))
+        kpis = out[1]
+    return statistics.median(inner), statistics.median(wall), kpis
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Time CLI/dashboard startup and the dashboard's first render")
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=150.0, help="Fail if a warm first render is slower")
+    args = ap.parse_args()
+
+    print(f"{'import':<28} {'ms':>8}   heaviest")
+    for module in ENTRYPOINTS:
+        total, top = import_profile(module)
+        print(f"{module:<28} {total:>8.1f}   " + ", ".join(f"{name} {ms:.0f}" for name, ms in top[:3]))
+
+    print(f"\n{'--help (process wall)':<28} {'ms':>8}")
+    for module in CLIS:
+        print(f"{module:<28} {_wall(['-m', module, '--help'], args.repeat):>8.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "io.duckdb")
+        t0 = time.perf_counter()
+        build_warehouse(path, args.rows)
+        print(f"\nwarehouse: {args.rows:,} rows built in {time.perf_counter() - t0:.1f}s")
+        cold = first_render(path, False, args.repeat)
+        t0 = time.perf_counter()
+        _run(["-m", "scripts.warm_start", "--db", path])
+        print(f"warm start written in {(time.perf_counter() - t0) * 1000:.0f} ms "
+              f"({os.path.getsize(os.path.splitext(path)[0] + '.warm.arrow') / 1024:.0f} KB)")
+        warm = first_render(path, True, args.repeat)
+
+    print(f"\n{'first render':<28} {'ms':>8} {'wall ms':>8}")
+    print(f"{'cold (live queries)':<28} {cold[0]:>8.1f} {cold[1]:>8.1f}")
+    print(f"{'warm start file':<28} {warm[0]:>8.1f} {warm[1]:>8.1f}   "
+          f"({'same' if warm[2] == cold[2] else 'DIFFERENT'} KPIs)")
+
+    if warm[2] != cold[2] or warm[0] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
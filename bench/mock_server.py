@@ -0,0 +1,247 @@
+from __future__ import annotations
+import argparse
+import base64
+import hashlib
+import random
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bench.synthetic import GRID_ID, make_listing_rows, render_detail_page, render_grid_page
+
+# Usage:
+#   python -m bench.mock_server --rows 10000 --port 8799 [--no-all] [--latency-ms 200] [--error-rate 0.05]
+# A local stand-in for apps.infrastructureontario.ca/propertiesforsale: Home.aspx serves the
+# gvPropertyList grid and answers __doPostBack pager / "All" postbacks, checking that the
+# __VIEWSTATE sent back is one it issued; imageview.aspx serves PDFs (with ETag/Last-Modified, and
+# 304 for a matching If-None-Match) and pspropertydetails.aspx detail pages. Latency and error rates are injectable per endpoint, so scraper performance and
+# retry behaviour can be measured offline. Point the scraper at it with io_scrape.BASE_URL = url.
+
+HOME_PATH = "/propertiesforsale/Home.aspx"
+IMAGE_PATH = "/propertiesforsale/imageview.aspx"
+DETAILS_PATH = "/propertiesforsale/pspropertydetails.aspx"
+
+
+def make_pdf(property_id: str, size_kb: int = 64) -> bytes:
+    # A minimal one-page PDF, padded with a comment to roughly size_kb.
+    body = (
+        b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+        b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+        b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    )
+    pad = max(0, size_kb * 1024 - len(body) - 64)
+    return body + b"%" + (property_id.encode() * (pad // max(1, len(property_id)) + 1))[:pad] + b"\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+
+
+class MockIOSite:
+    def __init__(
+        self,
+        rows: int = 1000,
+        page_size: int = 50,
+        offer_all: bool = True,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        pdf_latency: float = 0.0,
+        pdf_error_rate: float = 0.0,
+        pdf_kb: int = 64,
+        pdf_variants: int = 0,
+        seed: int = 42,
+    ):
+        self.listings = make_listing_rows(rows, seed=seed)
+        self.page_size = page_size
+        self.page_count = max(1, -(-rows // page_size))
+        self.offer_all = offer_all
+        self.latency, self.error_rate = latency, error_rate
+        self.pdf_latency, self.pdf_error_rate, self.pdf_kb = pdf_latency, pdf_error_rate, pdf_kb
+        self.pdf_variants = pdf_variants
+        self.started = formatdate(time.time(), usegmt=True)
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._viewstates: set[str] = set()
+        self._pages: dict[str, bytes] = {}
+        self.stats = {"requests": 0, "errors": 0, "rejected_viewstate": 0}
+
+    def _viewstate(self, page: str) -> str:
+        with self._lock:
+            token = base64.b64encode(f"{page}:{len(self._viewstates)}:{self.seed}".encode()).decode()
+            self._viewstates.add(token)
+        return token
+
+    def grid_page(self, page: str) -> bytes:
+        # Rendered pages are cached (the site's own cost is modelled by `latency`), but every
+        # response carries a fresh __VIEWSTATE that the next postback must echo.
+        if page not in self._pages:
+            if page == "all":
+                html = render_grid_page(self.listings, page=1, page_count=1, offer_all=False, viewstate="{vs}")
+            else:
+                p = int(page)
+                rows = self.listings[(p - 1) * self.page_size:p * self.page_size]
+                html = render_grid_page(
+                    rows, total_records=len(self.listings), page=p, page_count=self.page_count,
+                    offer_all=self.offer_all, viewstate="{vs}",
+                )
+            self._pages[page] = html.encode("utf-8")
+        return self._pages[page].replace(b"{vs}", self._viewstate(page).encode())
+
+    def postback(self, form: dict[str, list[str]]) -> Optional[bytes]:
+        vs = (form.get("__VIEWSTATE") or [""])[0]
+        if vs not in self._viewstates or not form.get("__EVENTVALIDATION"):
+            return None
+        target = (form.get("__EVENTTARGET") or [""])[0]
+        if target.endswith("lnkAll"):
+            return self.grid_page("all")
+        arg = (form.get("__EVENTARGUMENT") or [""])[0]
+        if target == GRID_ID.replace("_", "$") and arg.startswith("Page$") and arg[5:].isdigit():
+            if 1 <= int(arg[5:]) <= self.page_count:
+                return self.grid_page(arg[5:])
+        return None
+
+    def pdf(self, property_id: str) -> tuple[bytes, str]:
+        # With pdf_variants, parcels share one of that many maps (as neighbouring parcels do).
+        key = str(int(property_id) % self.pdf_variants) if self.pdf_variants and property_id.isdigit() else property_id
+        body = make_pdf(key, self.pdf_kb)
+        return body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+
+def make_handler(site: MockIOSite) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def _send(
+            self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8", **headers: str
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name.replace("_", "-"), value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _inject(self, latency: float, error_rate: float) -> bool:
+            site.stats["requests"] += 1
+            if latency > 0:
+                time.sleep(latency)
+            if site.roll(error_rate):
+                site.stats["errors"] += 1
+                self._send(503, b"<html><body>Service Unavailable</body></html>")
+                return True
+            return False
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            qs = parse_qs(url.query)
+            if url.path == HOME_PATH:
+                if not self._inject(site.latency, site.error_rate):
+                    self._send(200, site.grid_page("1"))
+            elif url.path == IMAGE_PATH and qs.get("id"):
+                if not self._inject(site.pdf_latency, site.pdf_error_rate):
+                    body, etag = site.pdf(qs["id"][0])
+                    if self.headers.get("If-None-Match") == etag:
+                        self._send(304, b"", "application/pdf", ETag=etag)
+                    else:
+                        self._send(200, body, "application/pdf", ETag=etag, Last_Modified=site.started)
+            elif url.path == DETAILS_PATH and qs.get("id"):
+                if not self._inject(site.latency, site.error_rate):
+                    self._send(200, render_detail_page(qs["id"][0], site.seed).encode("utf-8"))
+            else:
+                self._send(404, b"<html><body>Not Found</body></html>")
+
+        def do_POST(self) -> None:
+            n = int(self.headers.get("Content-Length") or 0)
+            form = parse_qs(self.rfile.read(n).decode("utf-8"))
+            if urlparse(self.path).path != HOME_PATH:
+                return self._send(404, b"<html><body>Not Found</body></html>")
+            if self._inject(site.latency, site.error_rate):
+                return
+            body = site.postback(form)
+            if body is None:
+                # What ASP.NET does with a stale or forged __VIEWSTATE.
+                site.stats["rejected_viewstate"] += 1
+                return self._send(500, b"<html><body>Validation of viewstate MAC failed.</body></html>")
+            self._send(200, body)
+
+    return Handler
+
+
+@contextmanager
+def serve(site: MockIOSite, port: int = 0) -> Iterator[str]:
+    # Serves `site` from a background thread; yields the Home.aspx URL.
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(site))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}{HOME_PATH}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def serve_in_subprocess(*args: str) -> Iterator[str]:
+    # Same, from a separate process (so its CPU and memory stay out of the caller's numbers);
+    # `args` are this module's command-line flags.
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bench.mock_server", "--port", "0", *args],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        line = proc.stdout.readline().strip()
+        if not line.startswith("http"):
+            raise RuntimeError(f"mock server failed to start: {line!r}")
+        yield line
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Local stand-in for the IO properties site")
+    ap.add_argument("--port", type=int, default=8799, help="0 picks a free port")
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--page-size", type=int, default=50)
+    ap.add_argument("--no-all", action="store_true", help="Don't offer the 'All' postback (force paging)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Added to every grid/details response")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of grid/details requests answered 503")
+    ap.add_argument("--pdf-latency-ms", type=float, default=0.0)
+    ap.add_argument("--pdf-error-rate", type=float, default=0.0)
+    ap.add_argument("--pdf-kb", type=int, default=64)
+    ap.add_argument("--pdf-variants", type=int, default=0, help="Serve only this many distinct maps (0: one per parcel)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    site = MockIOSite(
+        rows=args.rows, page_size=args.page_size, offer_all=not args.no_all,
+        latency=args.latency_ms / 1000, error_rate=args.error_rate,
+        pdf_latency=args.pdf_latency_ms / 1000, pdf_error_rate=args.pdf_error_rate, pdf_kb=args.pdf_kb,
+        pdf_variants=args.pdf_variants, seed=args.seed,
+    )
+    # Render the first and "All" pages up front so the first request doesn't pay for it.
+    site.grid_page("1")
+    if site.offer_all:
+        site.grid_page("all")
+    with serve(site, args.port) as url:
+        print(url, flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
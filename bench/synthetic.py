@@ -0,0 +1,144 @@
+from __future__ import annotations
+import html
+import random
+from datetime import date, timedelta
+from typing import Any, Optional
+
+REGIONS = {
+    "Central": ["Toronto", "Mississauga", "Brampton", "Vaughan", "Markham"],
+    "Eastern": ["Ottawa", "Kingston", "Belleville", "Cornwall"],
+    "Northern": ["Sudbury", "Thunder Bay", "Sault Ste. Marie", "Timmins", "North Bay"],
+    "Southwestern": ["London", "Windsor", "Sarnia", "Chatham-Kent"],
+    "Western": ["Hamilton", "Kitchener", "Guelph", "Brantford", "Niagara Falls"],
+}
+STATUSES = [
+    "Listed on the Open Market", "Under Review", "In Negotiations for Direct Sale",
+    "Sold", "Not Applicable", "n/a", "",
+]
+STREETS = ["Main St", "King St W", "Queen St E", "Highway 11", "Lakeshore Rd", "Concession 4", "Bay St"]
+HEADERS = [
+    "ID", "Municipal Address", "Region", "City", "Acres", "Square Feet",
+    "Price", "Status", "MLS", "Posted", "Details", "Image",
+]
+GRID_ID = "ctl00_MainContent_gvPropertyList"
+
+
+def make_listing_rows(n: int, seed: int = 42, start_id: int = 10000) -> list[dict[str, Any]]:
+    # Rows in the exact shape parse_results_table returns, with the messy values the site has.
+    rng = random.Random(seed)
+    regions = list(REGIONS)
+    epoch = date(2015, 1, 1)
+    rows: list[dict[str, Any]] = []
+    for i in range(n):
+        pid = str(start_id + i)
+        region = rng.choice(regions)
+        city = rng.choice(REGIONS[region])
+        acres = rng.choice(["", "n/a", f"{rng.uniform(0.01, 500):,.2f}", f"{rng.randint(1, 2500):,}"])
+        sqft = rng.choice(["", f"{rng.randint(200, 250000):,}", f"{rng.uniform(100, 9000):,.1f}"])
+        price = rng.choice(["", "n/a", "Contact agent", f"${rng.randint(10, 9000) * 1000:,}", f"$ {rng.randint(1, 999):,}.00"])
+        posted = epoch + timedelta(days=rng.randint(0, 3800))
+        posted_text = rng.choice([posted.strftime("%m/%d/%Y"), posted.strftime("%-m/%-d/%Y"), "", "TBD"])
+        mls = rng.choice(["", f"X{rng.randint(1000000, 9999999)}"])
+        rows.append({
+            "property_id": pid,
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            "region": region,
+            "city": city,
+            "acres": acres,
+            "sqft": sqft,
+            "price_raw": price,
+            "status": rng.choice(STATUSES),
+            "mls_text": mls,
+            "posted": posted_text,
+            "mls_url": f"https://www.realtor.ca/{mls}" if mls else None,
+            "details_url": rng.choice([f"pspropertydetails.aspx?id={pid}", f"/propertiesforsale/pspropertydetails.aspx?id={pid}"]),
+            "image_url": rng.choice([f"imageview.aspx?id={pid}", f"id={pid}", None]),
+        })
+    return rows
+
+
+def _cell(text: str, href: Optional[str] = None, label: Optional[str] = None) -> str:
+    if href is not None:
+        return f'<td><a href="{html.escape(href)}" target="_blank">{html.escape(label or text)}</a></td>'
+    return f"<td>\n\t\t\t\t{html.escape(text)}\n\t\t\t</td>"
+
+
+def render_grid_page(
+    rows: list[dict[str, Any]],
+    total_records: Optional[int] = None,
+    page: int = 1,
+    page_count: int = 1,
+    offer_all: bool = True,
+    viewstate: str = "dDwtMTA4NzE1NzQ5Nzs7Pg==",
+) -> str:
+    # An ASP.NET WebForms page shaped like Home.aspx: hidden form state, the GridView and its pager.
+    total = len(rows) if total_records is None else total_records
+    out = [
+        "<!DOCTYPE html>",
+        "<html><head><title>Properties for Sale</title>",
+        "<script type=\"text/javascript\">function __doPostBack(t, a) { theForm.submit(); }</script>",
+        "</head><body><form name=\"aspnetForm\" method=\"post\" action=\"./Home.aspx\" id=\"aspnetForm\">",
+        f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{html.escape(viewstate)}" />',
+        '<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="8D0E13E6" />',
+        f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="ev{page}{total}" />',
+        f'<div class="summary"><span>Total Records:</span> <span id="lblTotal">{total}</span></div>',
+        f'<table class="grid" cellspacing="0" rules="all" border="1" id="{GRID_ID}">',
+        "<tr>" + "".join(f'<th scope="col">{h}</th>' for h in HEADERS) + "</tr>",
+    ]
+    for r in rows:
+        cells = [
+            _cell(r["property_id"]),
+            _cell(r["address"]),
+            _cell(r["region"]),
+            _cell(r["city"]),
+            _cell(r["acres"]),
+            _cell(r["sqft"]),
+            _cell(r["price_raw"]),
+            _cell(r["status"]),
+            _cell(r["mls_text"], r["mls_url"]) if r["mls_url"] else _cell(r["mls_text"]),
+            _cell(r["posted"]),
+            _cell("Details", r["details_url"]) if r["details_url"] else _cell(""),
+            _cell("Map", r["image_url"]) if r["image_url"] else _cell(""),
+        ]
+        out.append("<tr>" + "".join(cells) + "</tr>")
+    if page_count > 1 or offer_all:
+        links = []
+        for p in range(1, page_count + 1):
+            if p == page:
+                links.append(f"<td><span>{p}</span></td>")
+            else:
+                links.append(f"<td><a href=\"javascript:__doPostBack('{GRID_ID.replace('_', '$')}','Page${p}')\">{p}</a></td>")
+        if offer_all:
+            links.append("<td><a href=\"javascript:__doPostBack('ctl00$MainContent$lnkAll','')\">All</a></td>")
+        out.append(f'<tr class="pager"><td colspan="{len(HEADERS)}"><table><tr>{"".join(links)}</tr></table></td></tr>')
+    out += ["</table>", "</form></body></html>"]
+    return "\n".join(out)
+
+
+ZONINGS = ["R1", "R2", "C1", "M2", "A", "OS", "EP", "RU"]
+PLANS = ["Residential", "Employment Area", "Rural", "Natural Heritage", "Mixed Use"]
+
+
+def render_detail_page(property_id: str, seed: int = 42) -> str:
+    # pspropertydetails.aspx: a label/value table per property, with some labels missing.
+    rng = random.Random(f"{seed}:{property_id}")
+    fields = {
+        "Property Type:": rng.choice(["Vacant Land", "Building", "Land and Building"]),
+        "Zoning:": rng.choice(ZONINGS),
+        "Official Plan Designation:": rng.choice(PLANS),
+        "Legal Description:": f"PT LT {rng.randint(1, 40)} CON {rng.randint(1, 12)} AS IN {rng.randint(100000, 999999)}",
+        "PIN:": f"{rng.randint(10000, 99999)}-{rng.randint(1000, 9999)}",
+        "Frontage:": f"{rng.uniform(5, 400):.1f} m",
+        "Services:": rng.choice(["Municipal water and sewer", "Well and septic", "None"]),
+    }
+    for label in rng.sample(sorted(fields), k=rng.randint(0, 2)):
+        del fields[label]
+    out = [
+        "<!DOCTYPE html>",
+        f"<html><head><title>Property {property_id}</title></head><body>",
+        f'<h1 id="lblAddress">Property {html.escape(property_id)}</h1>',
+        '<table class="details">',
+    ]
+    out += [f"<tr><th>{html.escape(k)}</th><td>{html.escape(v)}</td></tr>" for k, v in fields.items()]
+    out += ["</table>", "</body></html>"]
+    return "\n".join(out)
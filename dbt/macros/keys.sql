@@ -0,0 +1,8 @@
+{% macro location_key(city, region) -%}
+{#- On the canonical names (see text.sql), so spelling variants of a place share one location. -#}
+md5(concat_ws('||', coalesce({{ canonical_place(city) }},''), coalesce({{ canonical_place(region) }},'')))
+{%- endmacro %}
+
+{% macro property_key(property_id) -%}
+md5(cast({{ property_id }} as varchar))
+{%- endmacro %}
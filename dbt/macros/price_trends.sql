@@ -0,0 +1,82 @@
+{#- mart_price_trends: weekly median of each listing's latest known price, by posted week. Shared by
+    the model, its pre_hook and the test that checks it against a full rebuild. -#}
+
+{% macro price_trends_since() %}
+  {#- fact_listing_daily loaded_at of the last build as a literal (read before the pre_hook
+      deletes anything), or none on full builds and rebuilds (lake_rewritten). -#}
+  {%- if is_incremental() and execute and not lake_rewritten() -%}
+    {{ return(run_query("select cast(max(fact_loaded_at) as varchar) from " ~ this).columns[0].values()[0]) }}
+  {%- endif -%}
+  {{ return(none) }}
+{% endmacro %}
+
+{% macro price_trends_touched_weeks(since) %}
+  {#- Weeks of listings whose price/posted_date/location changed in the fact rows loaded after
+      `since`, compared against the snapshot just before them; both the old and the new week. -#}
+  with loaded as (
+    select min(snapshot_date) as first_snapshot
+    from {{ ref('fact_listing_daily') }}
+    where loaded_at > timestamp '{{ since }}'
+  ),
+  recent as (
+    select
+      property_id, snapshot_date, posted_date, price, location_id,
+      lag(posted_date) over w as prev_posted,
+      lag(price)       over w as prev_price,
+      lag(location_id) over w as prev_location
+    from {{ ref('fact_listing_daily') }}
+    where snapshot_date >= coalesce(
+      (select max(snapshot_date) from {{ ref('fact_listing_daily') }}
+        where snapshot_date < (select first_snapshot from loaded)),
+      (select first_snapshot from loaded)
+    )
+    window w as (partition by property_id order by snapshot_date)
+  ),
+  changed as (
+    select posted_date, prev_posted
+    from recent
+    where snapshot_date >= (select first_snapshot from loaded)
+      and (prev_posted   is distinct from posted_date
+        or prev_price    is distinct from price
+        or prev_location is distinct from location_id)
+  )
+  select date_trunc('week', posted_date) as week_start from changed where posted_date is not null
+  union
+  select date_trunc('week', prev_posted) from changed where prev_posted is not null
+{% endmacro %}
+
+{% macro price_trends_weekly(weeks=none) %}
+  {#- (city, region, week_start, median_price, listings), for every week or those `weeks` selects. -#}
+  with listings as (
+    select
+      property_id,
+      posted_date,
+      arg_max(price, snapshot_date)       as price,
+      arg_max(location_id, snapshot_date) as location_id
+    from {{ ref('fact_listing_daily') }}
+    where posted_date is not null
+    {% if weeks %}
+      and date_trunc('week', posted_date) in ({{ weeks }})
+    {% endif %}
+    group by 1, 2
+  )
+  select
+    l.city,
+    l.region,
+    date_trunc('week', f.posted_date) as week_start,
+    median(f.price) as median_price,
+    count(*) as listings
+  from listings f
+  join {{ ref('dim_location') }} l using (location_id)
+  where f.price is not null
+  group by 1, 2, 3
+{% endmacro %}
+
+{% macro clear_price_trend_weeks() %}
+  {#- pre_hook: drop every touched week whole, so a (city, region, week) group that loses its last
+      priced listing goes away instead of keeping its old median. -#}
+  {%- set since = price_trends_since() -%}
+  {%- if since -%}
+  delete from {{ this }} where week_start in ({{ price_trends_touched_weeks(since) }})
+  {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,3 @@
+{% macro row_hash(columns) -%}
+md5(concat_ws('|'{% for c in columns %}, coalesce(cast({{ c }} as varchar), '∅'){% endfor %}))
+{%- endmacro %}
@@ -0,0 +1,7 @@
+{% macro sketch_bucket(expr) -%}
+  {#- Log-scale bucket of a positive value: [gamma^b, gamma^(b+1)). Values <= 0 share the lowest bucket. -#}
+  case
+    when {{ expr }} > 0 then floor(ln({{ expr }}) / ln({{ var('sketch_gamma') }}))::int
+    when {{ expr }} is not null then -2147483648
+  end
+{%- endmacro %}
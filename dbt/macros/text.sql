@@ -0,0 +1,48 @@
+{#- Canonical forms of place names and addresses: accents stripped, lowercased, punctuation runs
+    folded to one space, and common words abbreviated, so "Sault Ste. Marie", "sault  ste marie" and
+    "Sault Sainte-Marie" agree. Location keys and the search index are built on these. -#}
+
+{% macro place_words() -%}
+  {{ return({'saint': 'st', 'sainte': 'ste', 'mount': 'mt', 'fort': 'ft', 'township': 'twp', 'and': '&'}) }}
+{%- endmacro %}
+
+{% macro address_words() -%}
+  {%- set words = {
+    'street': 'st', 'road': 'rd', 'avenue': 'ave', 'av': 'ave', 'drive': 'dr', 'boulevard': 'blvd',
+    'highway': 'hwy', 'hiway': 'hwy', 'concession': 'conc', 'con': 'conc', 'crescent': 'cres',
+    'court': 'ct', 'place': 'pl', 'lane': 'ln', 'parkway': 'pkwy', 'terrace': 'terr', 'circle': 'cir',
+    'square': 'sq', 'trail': 'trl', 'sideroad': 'sdrd', 'route': 'rte', 'county': 'cty',
+    'east': 'e', 'west': 'w', 'north': 'n', 'south': 's',
+  } -%}
+  {%- do words.update(place_words()) -%}
+  {{ return(words) }}
+{%- endmacro %}
+
+{% macro _canonical(expr, words) -%}
+nullif(array_to_string(list_transform(
+  string_split(trim(regexp_replace(lower(strip_accents({{ expr }})), '[^a-z0-9&]+', ' ', 'g')), ' '),
+  w -> case w {%- for k, v in words.items() %} when '{{ k }}' then '{{ v }}'{% endfor %} else w end
+), ' '), '')
+{%- endmacro %}
+
+{% macro canonical_place(expr) -%}
+{{ _canonical(expr, place_words()) }}
+{%- endmacro %}
+
+{% macro canonical_address(expr) -%}
+{{ _canonical(expr, address_words()) }}
+{%- endmacro %}
+
+{% macro trigrams(expr) -%}
+  {#- Distinct 3-character windows of ' ' || expr || ' ', so word starts and ends get their own grams. -#}
+  list_distinct(list_transform(
+    range(1, length({{ expr }}) + 1), i -> substr(' ' || {{ expr }} || ' ', i::int, 3)
+  ))
+{%- endmacro %}
+
+{% macro create_text_macros() -%}
+  {#- The same functions as DuckDB macros in the warehouse, for the dashboard's search queries. -#}
+  create or replace macro canonical_place(s) as {{ canonical_place('s') }};
+  create or replace macro canonical_address(s) as {{ canonical_address('s') }};
+  create or replace macro trigrams(s) as {{ trigrams('s') }};
+{%- endmacro %}
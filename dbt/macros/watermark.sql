@@ -0,0 +1,82 @@
+{% macro watermark(expr='snapshot_date', lookback_days=0) %}
+  {#- max(expr) - lookback_days in this incremental model as a 'YYYY-MM-DD' literal, or none.
+      Models reload from this day on (>=), so the last day loaded is read again. -#}
+  {%- if is_incremental() and execute -%}
+    {%- set sql = "select cast(max(" ~ expr ~ ") - " ~ (lookback_days | int) ~ " as varchar) from " ~ this -%}
+    {{ return(run_query(sql).columns[0].values()[0]) }}
+  {%- endif -%}
+  {{ return(none) }}
+{% endmacro %}
+
+{% macro clear_reloaded(expr='snapshot_date', lookback_days=0) %}
+  {#- pre_hook: drop the rows of the days about to be reloaded, so a rescraped or rewritten day
+      replaces what was loaded from it, rows it no longer has included. -#}
+  {%- set load_from = watermark(expr, lookback_days) -%}
+  {%- if load_from -%}
+  delete from {{ this }} where {{ expr }} >= date '{{ load_from }}'
+  {%- endif -%}
+{% endmacro %}
+
+{% macro reopen_reloaded(expr) %}
+  {#- pre_hook for SCD2 history: drop the versions the reloaded days started and reopen the ones
+      they closed; the reload then closes them again from the rewritten changes. -#}
+  {%- set load_from = watermark(expr) -%}
+  {%- if load_from -%}
+  delete from {{ this }} where valid_from >= date '{{ load_from }}';
+  update {{ this }} set valid_to = null, is_current = true where valid_to >= date '{{ load_from }}'
+  {%- endif -%}
+{% endmacro %}
+
+{#- Incrementals keyed by property, location or week rather than by day merge what a day adds but can't
+    take back what a rewrite of that day no longer has (a listing gone by the second scrape of the day,
+    a price a backfill corrected). Each one records the lake manifest it was built against
+    (record_lake_state, post_hook) and rebuilds whole when a day it had loaded was written again since
+    (lake_rewritten): clear_rewritten empties it in its pre_hook and its SQL takes the full-build branch. -#}
+
+{% macro lake_state_relation() %}
+  {{ return(api.Relation.create(database=target.database, schema=target.schema, identifier='lake_build_state')) }}
+{% endmacro %}
+
+{% macro create_lake_state() %}
+  {#- on-run-start: one row per model, (model, last snapshot_date and written_at in the manifest it was built against). -#}
+  create table if not exists {{ lake_state_relation() }} (model varchar, snapshot_date date, written_at timestamptz)
+{% endmacro %}
+
+{% macro lake_manifest() %}
+  {#- The lake's _manifest.json as (snapshot_date, written_at) rows, or none without one. -#}
+  {%- set path = env_var('IO_LAKE_DIR', '../data/lake/io_listings') ~ '/_manifest.json' -%}
+  {%- if not execute or not run_query("select count(*) from glob('" ~ path ~ "')").columns[0].values()[0] -%}
+    {{ return(none) }}
+  {%- endif -%}
+  {{ return("select p.snapshot_date, cast(p.written_at as timestamptz) as written_at from (select unnest(partitions) as p from read_json('" ~ path ~ "'))") }}
+{% endmacro %}
+
+{% macro lake_rewritten() %}
+  {#- True on an incremental run when a day this model had loaded was written to the lake again since. -#}
+  {%- if not (is_incremental() and execute) -%}
+    {{ return(false) }}
+  {%- endif -%}
+  {%- set manifest = lake_manifest() -%}
+  {%- if not manifest -%}
+    {{ return(false) }}
+  {%- endif -%}
+  {%- set sql -%}
+    select count(*) from ({{ manifest }}) m join {{ lake_state_relation() }} s
+      on s.model = '{{ this.identifier }}' and m.snapshot_date <= s.snapshot_date and m.written_at > s.written_at
+  {%- endset -%}
+  {{ return(run_query(sql).columns[0].values()[0] > 0) }}
+{% endmacro %}
+
+{% macro clear_rewritten() %}
+  {%- if lake_rewritten() -%}
+  delete from {{ this }}
+  {%- endif -%}
+{% endmacro %}
+
+{% macro record_lake_state() %}
+  {%- set manifest = lake_manifest() -%}
+  {%- if manifest -%}
+  delete from {{ lake_state_relation() }} where model = '{{ this.identifier }}';
+  insert into {{ lake_state_relation() }} select '{{ this.identifier }}', max(snapshot_date), max(written_at) from ({{ manifest }})
+  {%- endif -%}
+{% endmacro %}
@@ -1,8 +1,35 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='location_id',
+    incremental_strategy='delete+insert',
+    pre_hook="{{ clear_rewritten() }}",
+    post_hook="{{ record_lake_state() }}"
+) }}
+-- depends_on: {{ ref('stg_io_listings') }}, {{ ref('stg_io_listings_all') }}
 
-select
-  md5(concat_ws('||', coalesce(city,''), coalesce(region,''))) as location_id,
-  city,
-  region
-from {{ ref('stg_io_listings') }}
-group by city, region
+-- Full builds cover every snapshot; daily runs only look at today's and insert unseen locations.
+-- location_id is keyed on the canonical city/region, so spelling variants merge into one location,
+-- named by its most frequent spelling. A rewritten day rebuilds it whole (macros/watermark.sql).
+{% set incremental = is_incremental() and not lake_rewritten() %}
+with src as (
+  select city, region, count(*) as n
+  {% if incremental %}
+  from {{ ref('stg_io_listings') }}
+  {% else %}
+  from {{ ref('stg_io_listings_all') }}
+  {% endif %}
+  group by city, region
+),
+keyed as (
+  select
+    {{ location_key('city', 'region') }} as location_id,
+    first(city order by n desc, city)     as city,
+    first(region order by n desc, region) as region
+  from src
+  group by 1
+)
+select *
+from keyed
+{% if incremental %}
+where location_id not in (select location_id from {{ this }})
+{% endif %}
@@ -1,15 +1,61 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='property_id',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    pre_hook="{{ clear_rewritten() }}",
+    post_hook="{{ record_lake_state() }}"
+) }}
+-- depends_on: {{ ref('stg_io_listings') }}, {{ ref('stg_io_listings_all') }}
 
-with base as (
+-- Type-1 dim: daily runs upsert only properties that are new or whose attributes changed,
+-- including a newer detail-page fetch. A rewritten day rebuilds it whole (macros/watermark.sql).
+{% set incremental = is_incremental() and not lake_rewritten() %}
+with listing as (
   select
     property_id,
-    any_value(address)     as address,
-    any_value(details_url) as details_url,
-    any_value(image_url)   as image_url
+    arg_max(address, snapshot_date)     as address,
+    arg_max(details_url, snapshot_date) as details_url,
+    arg_max(image_url, snapshot_date)   as image_url
+  {% if incremental %}
   from {{ ref('stg_io_listings') }}
+  {% else %}
+  from {{ ref('stg_io_listings_all') }}
+  {% endif %}
   group by property_id
+),
+base as (
+  select
+    l.*,
+    d.property_type,
+    d.zoning,
+    d.official_plan,
+    d.legal_description,
+    d.pin,
+    d.frontage,
+    d.services,
+    d.fetched_at as details_fetched_at
+  from listing l
+  left join {{ ref('stg_io_details') }} d using (property_id)
 )
 select
-  md5(cast(property_id as varchar)) as property_sk,
+  {{ property_key('property_id') }} as property_sk,
   *
 from base
+{% if incremental %}
+{#- Tables built before the enrichment columns: every enriched property is upserted once. -#}
+{% set existing = adapter.get_columns_in_relation(this) | map(attribute='name') | map('lower') | list %}
+where not exists (
+  select 1
+  from {{ this }} t
+  where t.property_id = base.property_id
+    and t.address is not distinct from base.address
+    and t.details_url is not distinct from base.details_url
+    and t.image_url is not distinct from base.image_url
+    {% if 'details_fetched_at' in existing %}
+    and t.details_fetched_at is not distinct from base.details_fetched_at
+    {% else %}
+    and base.details_fetched_at is null
+    {% endif %}
+)
+{% endif %}
@@ -2,7 +2,9 @@
 
 with latest as (select * from {{ ref('int_io_latest_listing') }}),
 loc as (select * from {{ ref('dim_location') }}),
-prop as (select * from {{ ref('dim_property') }})
+prop as (select * from {{ ref('dim_property') }}),
+-- int_io_latest_listing keeps every property ever seen; "current" means present in today's snapshot.
+today as (select distinct property_id from {{ ref('stg_io_listings') }})
 select
   p.property_sk,
   l.location_id,
@@ -13,5 +15,6 @@ select
   latest.acres,
   latest.sqft
 from latest
-join loc l using (city, region)
+join today using (property_id)
+join loc l using (location_id)
 join prop p using (property_id)
@@ -1,26 +1,33 @@
 {{ config(
     materialized='incremental',
-    unique_key=['property_id','posted_date'],
-    on_schema_change='sync_all_columns'
+    unique_key=['property_id','snapshot_date'],
+    incremental_strategy='delete+insert',
+    on_schema_change='sync_all_columns',
+    pre_hook="{{ clear_reloaded('snapshot_date', var('fact_lookback_days', 0)) }}"
 ) }}
 
+-- One row per property per snapshot. Incremental runs replace the snapshot partitions from the
+-- current watermark (the last day loaded, which may have been rescraped since) minus
+-- `fact_lookback_days` on, so late or rewritten partitions inside that window are reloaded; the
+-- bound is inlined as a literal so DuckDB prunes the other partitions.
+{% set load_from = watermark('snapshot_date', var('fact_lookback_days', 0)) %}
+
 with s as (
   select * from {{ ref('stg_io_listings_all') }}
-),
-loc as (select * from {{ ref('dim_location') }}),
-prop as (select * from {{ ref('dim_property') }})
+  {% if load_from %}
+  where snapshot_date >= date '{{ load_from }}'
+  {% endif %}
+)
 select
-  p.property_sk,
-  l.location_id,
+  {{ property_key('s.property_id') }} as property_sk,
+  {{ location_key('s.city', 's.region') }} as location_id,
   s.property_id,
+  s.snapshot_date,
   s.posted_date,
   s.price,
   s.status,
   s.acres,
-  s.sqft
+  s.sqft,
+  s.ingested_at,
+  cast('{{ run_started_at.strftime("%Y-%m-%d %H:%M:%S") }}' as timestamp) as loaded_at
 from s
-join loc l using (city, region)
-join prop p using (property_id)
-{% if is_incremental() %}
-  where s.posted_date > (select coalesce(max(posted_date), date '1900-01-01') from {{ this }})
-{% endif %}
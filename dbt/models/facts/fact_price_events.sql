@@ -0,0 +1,37 @@
+{{ config(materialized='table') }}
+
+-- Change-event index over fact_price_history: one row per listing, price change, status change
+-- and delisting, so "what moved and by how much" never rescans the versions. Sorted like the
+-- history, by (property_id, event_date).
+with h as (
+  select
+    *,
+    lead(valid_from) over (partition by property_id order by valid_from) as next_valid_from
+  from {{ ref('fact_price_history') }}
+),
+e as (
+  select property_id, valid_from as event_date,
+         case when prev_valid_to is null then 'listed' else 'relisted' end as event_type, price, prev_price, status, prev_status, location_id, days_on_market
+  from h
+  where listed
+  union all
+  select property_id, valid_from, 'price_change', price, prev_price, status, prev_status, location_id, days_on_market
+  from h
+  where not listed and price is distinct from prev_price
+  union all
+  select property_id, valid_from, 'status_change', price, prev_price, status, prev_status, location_id, days_on_market
+  from h
+  where not listed and status is distinct from prev_status
+  union all
+  -- Closed with no version starting the same day: the property left the grid.
+  select property_id, valid_to, 'delisted', price, price, status, status, location_id,
+         days_on_market + (valid_to - valid_from)
+  from h
+  where valid_to is not null and next_valid_from is distinct from valid_to
+)
+select
+  *,
+  price - prev_price as price_delta,
+  round(100 * (price - prev_price) / nullif(prev_price, 0), 2) as price_change_pct
+from e
+order by property_id, event_date, event_type
@@ -0,0 +1,50 @@
+{{ config(materialized='table') }}
+
+-- Price/status time series: one row per property version from int_io_listing_history, valid over
+-- [valid_from, valid_to) (valid_to null while current), with the change from the version before
+-- and the columns the dashboard lists, so any past day's market can be read back from it.
+-- Written sorted by (property_id, valid_from) so the per-row-group min/max (zone maps) DuckDB keeps
+-- on property_id let a one-property timeline read a single row group; market-wide as-of snapshots
+-- are one pass over the validity columns (see streamlit_app/data_access.py). Rebuilt as a table:
+-- the sort is over versions, which grow with changes, not with snapshots.
+with h as (select * from {{ ref('int_io_listing_history') }}),
+v as (
+  select
+    property_id,
+    valid_from,
+    valid_to,
+    is_current,
+    price,
+    status,
+    posted_date,
+    acres,
+    sqft,
+    {{ location_key('city', 'region') }} as location_id,
+    lag(price)    over w as prev_price,
+    lag(status)   over w as prev_status,
+    lag(valid_to) over w as prev_valid_to,
+    min(valid_from) over (partition by property_id) as first_seen
+  from h
+  window w as (partition by property_id order by valid_from)
+)
+select
+  property_id,
+  valid_from,
+  valid_to,
+  is_current,
+  price,
+  status,
+  posted_date,
+  acres,
+  sqft,
+  location_id,
+  prev_price,
+  prev_status,
+  prev_valid_to,
+  -- First version, or one that doesn't start where the previous one ended (relisted).
+  prev_valid_to is null or prev_valid_to < valid_from as listed,
+  price - prev_price as price_delta,
+  round(100 * (price - prev_price) / nullif(prev_price, 0), 2) as price_change_pct,
+  valid_from - coalesce(posted_date, first_seen) as days_on_market
+from v
+order by property_id, valid_from
@@ -1,17 +1,39 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key=['property_id', 'snapshot_date'],
+    incremental_strategy='delete+insert',
+    pre_hook="{{ clear_reloaded('snapshot_date') }}"
+) }}
 
-with s as (
-  select
-    property_id, posted_date, price, status,
-    address, city, region, acres, sqft, details_url, image_url, mls_url
-  from {{ ref('stg_io_listings') }}
+-- One row per CDC change (I/U/D). Previous values come from the version the change closed, so
+-- only changed properties are read instead of lag() over every snapshot. Incremental runs replace
+-- the change partitions from the last one loaded on (cdc rewrites a rescraped day's partition).
+{% set load_from = watermark('snapshot_date') %}
+
+with c as (
+  select * from {{ ref('stg_io_changes') }}
+  {% if load_from %}
+  where snapshot_date >= date '{{ load_from }}'
+  {% endif %}
 ),
+h as (select * from {{ ref('int_io_listing_history') }}),
 e as (
   select
-    s.*,
-    lag(price)  over (partition by property_id order by posted_date) as prev_price,
-    lag(status) over (partition by property_id order by posted_date) as prev_status
-  from s
+    c.property_id,
+    c.op,
+    coalesce(c.posted_date, p.posted_date) as posted_date,
+    c.price, c.status,
+    coalesce(c.address, p.address)         as address,
+    coalesce(c.city, p.city)               as city,
+    coalesce(c.region, p.region)           as region,
+    c.acres, c.sqft, c.details_url, c.image_url, c.mls_url,
+    c.snapshot_date,
+    p.price  as prev_price,
+    p.status as prev_status
+  from c
+  left join h p
+    on p.property_id = c.property_id
+   and p.valid_from = case when c.op = 'D' then c.valid_from else c.prev_valid_from end
 )
 select
   *,
@@ -1,10 +1,55 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='property_id',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    pre_hook="{{ clear_rewritten() }}",
+    post_hook="{{ record_lake_state() }}"
+) }}
+-- depends_on: {{ ref('stg_io_listings') }}, {{ ref('stg_io_listings_all') }}
 
-with ranked as (
+{% set hashed = ['price', 'status', 'posted_date', 'address', 'city', 'region', 'acres', 'sqft',
+                 'mls_text', 'mls_url', 'details_url', 'image_url'] %}
+
+-- Latest version of each property; snapshot_date/ingested_at are when that version was first seen.
+-- Daily runs merge only the property_ids whose row hash changed; a rewritten day rebuilds it whole
+-- (macros/watermark.sql).
+{% set incremental = is_incremental() and not lake_rewritten() %}
+with hashed as (
   select
     *,
-    row_number() over (partition by property_id order by posted_date desc) as rn
+    {{ row_hash(hashed) }} as row_hash,
+    {{ location_key('city', 'region') }} as location_id
+  {% if incremental %}
   from {{ ref('stg_io_listings') }}
+  {% else %}
+  from {{ ref('stg_io_listings_all') }}
+  {% endif %}
+),
+{% if incremental %}
+versions as (
+  select * from hashed
+  where not exists (
+    select 1 from {{ this }} t
+    where t.property_id = hashed.property_id
+      and t.row_hash = hashed.row_hash
+  )
+),
+{% else %}
+versions as (
+  select * exclude (prev_hash)
+  from (
+    select *, lag(row_hash) over (partition by property_id order by snapshot_date) as prev_hash
+    from hashed
+  )
+  where prev_hash is distinct from row_hash
+),
+{% endif %}
+ranked as (
+  select
+    *,
+    row_number() over (partition by property_id order by snapshot_date desc, posted_date desc) as rn
+  from versions
 )
 select *
 from ranked
@@ -0,0 +1,50 @@
+{{ config(
+    materialized='incremental',
+    unique_key=['property_id', 'valid_from'],
+    incremental_strategy='delete+insert',
+    pre_hook="{{ reopen_reloaded('greatest(valid_from, coalesce(valid_to, valid_from))') }}"
+) }}
+
+-- SCD2 history built from the CDC log: one row per property version, valid_to null while current.
+-- Incremental runs read only the change partitions from the last one loaded on (cdc rewrites a
+-- rescraped day's partition): the pre_hook undoes what those days did, then the run adds their
+-- new versions and re-emits the existing versions they close.
+{% set load_from = watermark('greatest(valid_from, coalesce(valid_to, valid_from))') %}
+
+with c as (
+  select * from {{ ref('stg_io_changes') }}
+  {% if load_from %}
+  where snapshot_date >= date '{{ load_from }}'
+  {% endif %}
+),
+closures as (
+  select property_id, prev_valid_from as valid_from, snapshot_date as valid_to
+  from c where op = 'U'
+  union all
+  select property_id, valid_from, valid_to
+  from c where op = 'D'
+),
+versions as (
+  select
+    property_id, address, city, region, acres, sqft, price, status,
+    mls_text, mls_url, posted_date, details_url, image_url, row_hash, valid_from
+  from c
+  where op in ('I', 'U')
+  {% if is_incremental() %}
+  union all
+  select
+    property_id, address, city, region, acres, sqft, price, status,
+    mls_text, mls_url, posted_date, details_url, image_url, row_hash, valid_from
+  from {{ this }} t
+  where exists (
+    select 1 from closures cl
+    where cl.property_id = t.property_id and cl.valid_from = t.valid_from
+  )
+  {% endif %}
+)
+select
+  v.*,
+  cl.valid_to,
+  cl.valid_to is null as is_current
+from versions v
+left join closures cl using (property_id, valid_from)
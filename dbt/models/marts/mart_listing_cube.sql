@@ -0,0 +1,41 @@
+{{ config(materialized='table') }}
+
+-- Dashboard rollup at (source, region, city, status, week) grain. 'current' is fact_listing_current,
+-- 'historical' every listing's latest state; week_start is the as-of (posted) week. Counts and
+-- min/max merge by sum/min/max, and each measure carries a log-bucket sketch (bucket -> count, see
+-- the sketch_bucket macro) that merges by summing counts, so any filter combination's medians and
+-- price histogram can be answered from the matching cells without touching the facts.
+-- Each (source, region, city, status) also gets an all_weeks row (week_start null) for queries
+-- without a date range, which is most of them.
+with src as (
+  select 'current' as source, l.region, l.city, f.status, f.as_of_date, f.price, f.sqft, f.acres
+  from {{ ref('fact_listing_current') }} f
+  join {{ ref('dim_location') }} l using (location_id)
+  union all
+  select 'historical', l.region, l.city, h.status, h.posted_date, h.price, h.sqft, h.acres
+  from {{ ref('int_io_latest_listing') }} h
+  join {{ ref('dim_location') }} l using (location_id)
+),
+weekly as (
+  select *, date_trunc('week', as_of_date)::date as week_start from src
+)
+select
+  source,
+  region,
+  city,
+  status,
+  week_start,
+  grouping(week_start) = 1 as all_weeks,
+  count(*)   as listings,
+  min(price) as price_min,
+  max(price) as price_max,
+  min(sqft)  as sqft_min,
+  max(sqft)  as sqft_max,
+  min(acres) as acres_min,
+  max(acres) as acres_max,
+  histogram({{ sketch_bucket('price') }}) as price_sketch,
+  histogram({{ sketch_bucket('sqft') }})  as sqft_sketch,
+  histogram({{ sketch_bucket('acres') }}) as acres_sketch,
+  {{ var('sketch_gamma') }}::double as sketch_gamma
+from weekly
+group by grouping sets ((source, region, city, status, week_start), (source, region, city, status))
@@ -1,23 +1,25 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key=['city', 'region', 'week_start'],
+    incremental_strategy='delete+insert',
+    pre_hook=["{{ clear_rewritten() }}", "{{ clear_price_trend_weeks() }}"],
+    post_hook="{{ record_lake_state() }}"
+) }}
 
-with d as (
-  select
-    l.city,
-    l.region,
-    f.posted_date,
-    f.price
-  from {{ ref('fact_listing_daily') }} f
-  join {{ ref('dim_location') }} l using (location_id)
-  where f.price is not null
-),
-w as (
-  select
-    city,
-    region,
-    date_trunc('week', posted_date) as week_start,
-    median(price) as median_price,
-    count(*) as listings
-  from d
-  group by 1,2,3
-)
-select * from w
+-- Weekly median of each listing's latest known price, by posted week (macros/price_trends.sql).
+-- Daily runs recompute only the weeks of listings whose price/posted_date/location changed in the
+-- fact rows loaded since the last build (compared against the snapshot just before them); the
+-- pre_hook deletes those weeks first, so groups left without a priced listing are dropped.
+-- A rewritten day rebuilds it whole (macros/watermark.sql). tests/mart_price_trends_matches_full.sql
+-- checks the result against a full rebuild.
+{% set since = price_trends_since() %}
+
+with
+{% if since %}
+touched as ({{ price_trends_touched_weeks(since) }}),
+{% endif %}
+w as ({{ price_trends_weekly('select week_start from touched' if since else none) }})
+select
+  *,
+  (select max(loaded_at) from {{ ref('fact_listing_daily') }}) as fact_loaded_at
+from w
@@ -0,0 +1,45 @@
+{{ config(
+    materialized='incremental',
+    unique_key='property_id',
+    incremental_strategy='delete+insert',
+    pre_hook="{{ clear_rewritten() }}",
+    post_hook="{{ record_lake_state() }}"
+) }}
+
+-- One search document per property: its canonical address and city (macros/text.sql). Daily runs
+-- read only the int_io_latest_listing versions from the last indexed day on (it may have been
+-- rescraped) and rewrite the properties whose document or snapshot_date changed; indexed_at, which
+-- tells search_grams which rows to (re)build, only moves when the document did. A rewritten day
+-- rebuilds it whole (macros/watermark.sql).
+{% set incremental = is_incremental() and not lake_rewritten() %}
+{% set load_from = watermark('snapshot_date') if incremental else none %}
+{% set now = "cast('" ~ run_started_at.strftime("%Y-%m-%d %H:%M:%S") ~ "' as timestamp)" %}
+
+with l as (
+  select * from {{ ref('int_io_latest_listing') }}
+  {% if load_from %}
+  where snapshot_date >= date '{{ load_from }}'
+  {% endif %}
+),
+d as (
+  select
+    property_id,
+    address,
+    location_id,
+    snapshot_date,
+    concat_ws(' ', {{ canonical_address('address') }}, {{ canonical_place('city') }}) as document
+  from l
+)
+select
+  d.*,
+  len({{ trigrams('d.document') }}) as n_grams,
+  {% if incremental %}coalesce(t.indexed_at, {{ now }}){% else %}{{ now }}{% endif %} as indexed_at
+from d
+{% if incremental %}
+left join {{ this }} t
+  on t.property_id = d.property_id
+  and t.document = d.document
+  and t.location_id = d.location_id
+  and t.address is not distinct from d.address
+where t.property_id is null or t.snapshot_date <> d.snapshot_date
+{% endif %}
@@ -0,0 +1,21 @@
+{{ config(
+    materialized='incremental',
+    unique_key='property_id',
+    incremental_strategy='delete+insert',
+    pre_hook="{{ clear_rewritten() }}",
+    post_hook="{{ record_lake_state() }}"
+) }}
+
+-- Trigram postings of search_documents, (gram, property_id), written in gram order. Daily runs
+-- replace the postings of just the documents indexed since the last build. The dashboard loads
+-- these into an in-memory index once per warehouse build (AddressIndex in streamlit_app/data_access.py).
+-- A rewritten day rebuilds it whole (macros/watermark.sql).
+with d as (
+  select * from {{ ref('search_documents') }}
+  {% if is_incremental() and not lake_rewritten() %}
+  where indexed_at > (select max(indexed_at) from {{ this }})
+  {% endif %}
+)
+select gram, property_id, indexed_at
+from (select property_id, indexed_at, unnest({{ trigrams('document') }}) as gram from d)
+order by gram, property_id
@@ -0,0 +1,35 @@
+{{ config(materialized='view') }}
+{% set cdc_dir = env_var('IO_CDC_DIR', '../data/lake/io_changes') %}
+
+-- CDC change log written by src.ingestion.cdc: one I/U/D record per changed property per snapshot.
+with src as (
+  select *
+  from read_parquet(
+    '{{ cdc_dir }}/snapshot_date=*/*.parquet',
+    hive_partitioning=true,
+    hive_types={'snapshot_date': date},
+    union_by_name=true
+  )
+)
+select
+  op,
+  cast(property_id as int)            as property_id,
+  nullif(address,'')                  as address,
+  nullif(city,'')                     as city,
+  nullif(region,'')                   as region,
+  acres_val                           as acres,
+  sqft_val                            as sqft,
+  price,
+  nullif(status,'')                   as status,
+  nullif(mls_text,'')                 as mls_text,
+  nullif(mls_url,'')                  as mls_url,
+  posted_date,
+  nullif(details_abs,'')              as details_url,
+  nullif(image_abs,'')                as image_url,
+  timezone('UTC', ingested_at)        as ingested_at,
+  row_hash,
+  valid_from,
+  valid_to,
+  prev_valid_from,
+  snapshot_date
+from src
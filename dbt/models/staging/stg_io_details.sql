@@ -0,0 +1,32 @@
+{{ config(materialized='view') }}
+{% set details_dir = env_var('IO_DETAILS_DIR', '../data/lake/io_details') %}
+{% set store = details_dir ~ '/details.parquet' %}
+{#- Until `make details` has run there is no store; the model is then empty, with the same columns. -#}
+{% set has_store = not execute or run_query("select count(*) from glob('" ~ store ~ "')").columns[0].values()[0] > 0 %}
+
+-- Detail-page attributes written by src.ingestion.details: one row per property, latest fetch.
+with src as (
+  {% if has_store %}
+  select * from read_parquet('{{ store }}')
+  {% else %}
+  select
+    null::bigint as property_id,
+    {% for c in ['property_type', 'zoning', 'official_plan', 'legal_description', 'pin', 'frontage', 'services', 'attributes'] -%}
+    null::varchar as {{ c }},
+    {% endfor -%}
+    null::timestamptz as fetched_at
+  limit 0
+  {% endif %}
+)
+select
+  cast(property_id as int)           as property_id,
+  nullif(property_type,'')           as property_type,
+  nullif(zoning,'')                  as zoning,
+  nullif(official_plan,'')           as official_plan,
+  nullif(legal_description,'')       as legal_description,
+  nullif(pin,'')                     as pin,
+  nullif(frontage,'')                as frontage,
+  nullif(services,'')                as services,
+  attributes,
+  timezone('UTC', fetched_at)        as fetched_at
+from src
@@ -1,10 +1,12 @@
 {{ config(materialized='table') }}
 {% set run_date = var('run_date', modules.datetime.date.today().isoformat()) %}
+{% set lake_dir = env_var('IO_LAKE_DIR', '../data/lake/io_listings') %}
 
 with src as (
-  select * from read_csv_auto(
-    '../data/raw/io_listings/' || {{ run_date|tojson }} || '/io_listings.csv',
-    header=true
+  select * from read_parquet(
+    '{{ lake_dir }}/snapshot_date=' || {{ run_date|tojson }} || '/*.parquet',
+    hive_partitioning=true,
+    hive_types={'snapshot_date': date}
   )
 )
 select
@@ -12,15 +14,16 @@ select
   nullif(address,'')              as address,
   nullif(city,'')                 as city,
   nullif(region,'')               as region,
-  try_cast(acres_val as double)   as acres,
-  try_cast(sqft_val as double)    as sqft,
-  try_cast(price as double)       as price,
+  acres_val                       as acres,
+  sqft_val                        as sqft,
+  price,
   nullif(status,'')               as status,
   nullif(mls_text,'')             as mls_text,
   nullif(mls_url,'')              as mls_url,
-  try_cast(posted_date as date)   as posted_date,
+  posted_date,
   nullif(details_abs,'')          as details_url,
   nullif(image_abs,'')            as image_url,
-  try_cast(ingested_at as timestamp) as ingested_at
+  timezone('UTC', ingested_at)    as ingested_at,
+  snapshot_date
 from src
 where property_id is not null
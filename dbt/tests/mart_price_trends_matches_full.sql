@@ -0,0 +1,9 @@
+-- mart_price_trends is built incrementally; it must hold exactly what a full rebuild would.
+-- Returns the groups only one side has (or has with other values).
+with full_build as ({{ price_trends_weekly() }}),
+mart as (
+  select city, region, week_start, median_price, listings from {{ ref('mart_price_trends') }}
+)
+select 'stale' as problem, * from (select * from mart except all select * from full_build)
+union all
+select 'missing', * from (select * from full_build except all select * from mart)
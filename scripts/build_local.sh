@@ -3,4 +3,6 @@ set -euo pipefail
 source .venv/bin/activate
 ./scripts/set_env.sh
 cd dbt
-dbt run --full-refresh
\ No newline at end of file
+dbt run --full-refresh
+cd ..
+python -m scripts.warm_start
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+import argparse
+import json
+import shutil
+from pathlib import Path
+from typing import Optional
+
+# Per-model runtimes from dbt's target/run_results.json, optionally against a saved baseline:
+#   python scripts/dbt_timing_report.py --save before          # after a full rebuild
+#   python scripts/dbt_timing_report.py --baseline before      # after the next daily run
+
+RUN_RESULTS = Path("dbt/target/run_results.json")
+TIMINGS_DIR = Path("dbt/target/timings")
+
+def load_timings(path: Path) -> dict[str, tuple[float, str]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    out = {}
+    for r in data.get("results", []):
+        kind, _, name = r["unique_id"].split(".", 2)
+        if kind in ("model", "snapshot", "seed"):
+            out[name.split(".")[-1]] = (float(r["execution_time"]), r["status"])
+    return out
+
+def resolve(name: str) -> Path:
+    p = Path(name)
+    return p if p.suffix == ".json" else TIMINGS_DIR / f"{name}.json"
+
+def report(current: dict[str, tuple[float, str]], baseline: Optional[dict[str, tuple[float, str]]]) -> None:
+    names = sorted(set(current) | set(baseline or {}), key=lambda n: -current.get(n, (0.0, ""))[0])
+    if baseline is None:
+        print(f"{'model':<28} {'seconds':>9}  status")
+        for n in names:
+            secs, status = current[n]
+            print(f"{n:<28} {secs:>9.2f}  {status}")
+        print(f"{'total':<28} {sum(s for s, _ in current.values()):>9.2f}")
+        return
+
+    print(f"{'model':<28} {'before':>9} {'after':>9} {'speedup':>8}")
+    for n in names:
+        before = baseline.get(n, (None, ""))[0]
+        after = current.get(n, (None, ""))[0]
+        b = f"{before:.2f}" if before is not None else "-"
+        a = f"{after:.2f}" if after is not None else "-"
+        x = f"{before / after:.1f}x" if before and after else "-"
+        print(f"{n:<28} {b:>9} {a:>9} {x:>8}")
+    tb = sum(s for s, _ in baseline.values())
+    ta = sum(s for s, _ in current.values())
+    print(f"{'total':<28} {tb:>9.2f} {ta:>9.2f} {(tb / ta if ta else 0):>7.1f}x")
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-model dbt runtimes, optionally compared to a baseline")
+    ap.add_argument("--results", default=str(RUN_RESULTS), help="run_results.json of the run to report")
+    ap.add_argument("--baseline", help="Saved timing name (dbt/target/timings/<name>.json) or a run_results.json path")
+    ap.add_argument("--save", help="Copy --results to dbt/target/timings/<name>.json for later comparison")
+    args = ap.parse_args()
+
+    results = Path(args.results)
+    if args.save:
+        dest = resolve(args.save)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(results, dest)
+        print(f"Saved {results} -> {dest}")
+    baseline = load_timings(resolve(args.baseline)) if args.baseline else None
+    report(load_timings(results), baseline)
+
+if __name__ == "__main__":
+    main()
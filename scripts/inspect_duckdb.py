@@ -1,21 +1,97 @@
 #!/usr/bin/env python
 import argparse
-import duckdb
-import pandas as pd
+import json
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.common.instrumentation import REPORT_NAME
+
+# duckdb, pandas and the dashboard's data_access (pyarrow) are imported in the functions that use
+# them, so --help doesn't load them.
+if TYPE_CHECKING:
+    import pandas as pd
+
+def load_run_reports(con, runs_dir: str) -> "pd.DataFrame":
+    # One row per scrape run report: run-level fields, counters and per-stage seconds /
+    # items_per_s / p95_ms flattened into columns (dots -> underscores).
+    import pandas as pd
+
+    rows = []
+    for path in sorted(Path(runs_dir).glob(f"*/{REPORT_NAME}")):
+        report = json.loads(path.read_text(encoding="utf-8"))
+        row = {"report_path": str(path)}
+        for key, value in report.items():
+            if key == "stages":
+                for stage, s in value.items():
+                    for field in ("seconds", "items_per_s", "p95_ms"):
+                        row[f"{stage.replace('.', '_')}_{field}"] = s[field]
+            elif key == "counters":
+                row.update({name.replace(".", "_"): v for name, v in value.items()})
+            elif isinstance(value, dict):
+                row.update({f"{key}_{name}": v for name, v in value.items()})
+            else:
+                row[key] = value
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    for col in ("started_at", "finished_at"):
+        df[col] = pd.to_datetime(df[col], utc=True)
+    con.register("run_reports", df)
+    con.execute("CREATE OR REPLACE TABLE pipeline_runs AS SELECT * FROM run_reports ORDER BY started_at")
+    con.unregister("run_reports")
+    return df
+
+def print_runs(df: "pd.DataFrame", limit: int) -> None:
+    import pandas as pd
+
+    print(f"\n== pipeline_runs (latest {limit}) ==")
+    cols = [c for c in (
+        "snapshot_date", "status", "seconds", "rows", "total_records", "peak_rss_mb",
+        "http_fetch_p95_ms", "parse_items_per_s", "normalize_items_per_s", "http_bytes", "http_retries",
+    ) if c in df.columns]
+    print(df.sort_values("started_at", ascending=False)[cols].head(limit).to_string(index=False))
+
+    # Latest run vs. the median of the earlier ones, per timed stage (resumed runs only did part of the work).
+    full = df[df["resumed"] != True] if "resumed" in df.columns else df
+    if len(full) < 2:
+        return
+    ordered = full.sort_values("started_at")
+    latest, earlier = ordered.iloc[-1], ordered.iloc[:-1]
+    timed = [c for c in df.columns if c == "seconds" or c.endswith("_seconds")]
+    rows = []
+    for col in timed:
+        base = earlier[col].median()
+        if pd.notna(base) and base > 0 and pd.notna(latest[col]):
+            ratio = latest[col] / base
+            rows.append((col, round(base, 3), round(latest[col], 3), round(ratio, 2), "REGRESSION" if ratio > 1.5 else ""))
+    print("\n== Latest run vs. median of previous runs ==")
+    print(pd.DataFrame(rows, columns=["metric", "median_before", "latest", "ratio", ""]).to_string(index=False))
 
 def main():
     ap = argparse.ArgumentParser(description="Inspect dbt DuckDB warehouse")
     ap.add_argument("--db", default="dbt/target/io.duckdb", help="Path to DuckDB file")
     ap.add_argument("--limit", type=int, default=5, help="Head rows to show")
+    ap.add_argument("--runs-dir", default="data/raw/io_listings", help="Scrape output folder with <date>/run_report.json")
     args = ap.parse_args()
 
+    import duckdb
+    import pandas as pd
+
+    from streamlit_app.data_access import read_warm_start, row_counts, write_warm_start
+
     # Normalize DB path
     db_path = Path(args.db).resolve()
+    # Checked before connecting: loading pipeline_runs below writes the file.
+    warm = read_warm_start(str(db_path))
+    warm_fresh = warm is not None and warm.fresh(str(db_path))
     con = duckdb.connect(str(db_path))
 
     print(f"\nConnected to {db_path}")
 
+    runs = load_run_reports(con, args.runs_dir)
+    print(f"Loaded {len(runs)} run reports from {args.runs_dir} into pipeline_runs")
+
     print("\n== Tables ==")
     tables_df = con.sql("""
         SELECT table_schema, table_name, table_type
@@ -34,25 +110,20 @@ def main():
             print(f"(skipped: {e})")
 
     # --- Row counts (skip views) ---
-    print("\n== Row counts ==")
-    tables = con.sql("""
-        SELECT table_name, table_type
-        FROM information_schema.tables
-        WHERE table_schema='main'
-        ORDER BY table_name
-    """).fetchall()
-
-    rows = []
-    for tname, ttype in tables:
-        if ttype != "BASE TABLE":
-            continue  # skip views
-        try:
-            cnt = con.sql(f'SELECT COUNT(*) FROM "{tname}"').fetchone()[0]
-            rows.append((tname, cnt))
-        except Exception as e:
-            rows.append((tname, f"error: {e}"))
+    # From the warm start when it was written for this build (counted then), else counted now.
+    if warm_fresh:
+        counts = {**warm.summary["row_counts"], **({"pipeline_runs": len(runs)} if not runs.empty else {})}
+        print(f"\n== Row counts (warm start, {warm.summary['written_at']}) ==")
+    else:
+        counts = row_counts(con)
+        print("\n== Row counts ==")
+    print(pd.DataFrame(sorted(counts.items()), columns=["table_name", "rows"]))
 
-    print(pd.DataFrame(rows, columns=["table_name", "rows"]))
+    print("\n== Default KPIs (warm start) ==")
+    if warm_fresh:
+        print(pd.DataFrame.from_dict(warm.summary["kpis"], orient="index"))
+    else:
+        print("(stale or missing; python -m scripts.warm_start writes it)" if warm else "(no warm start file)")
 
     # --- Quick heads ---
     for t in [
@@ -62,6 +133,8 @@ def main():
         "dim_property",
         "fact_listing_daily",
         "fact_listing_current",
+        "fact_price_history",
+        "fact_price_events",
         "mart_price_trends",
         "mart_source_quality",
     ]:
@@ -83,5 +156,13 @@ def main():
     except Exception as e:
         print(f"(skipped sample join: {e})")
 
+    if not runs.empty:
+        print_runs(runs, args.limit)
+
+    # pipeline_runs changed the file; re-stamp a warm start that was current before it.
+    con.close()
+    if warm_fresh and not runs.empty:
+        write_warm_start(str(db_path))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+import argparse
+import glob
+from pathlib import Path
+
+import pandas as pd
+
+from src.ingestion.lake import partition_dir, to_arrow, write_partition
+
+# One-off: convert the daily CSV snapshots (data/raw/io_listings/YYYY-MM-DD/io_listings.csv)
+# into the Parquet lake read by dbt. Run from the project root:
+#   python -m scripts.migrate_csv_to_lake --raw data/raw/io_listings --lake data/lake/io_listings
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert daily CSV snapshots into the Parquet lake")
+    ap.add_argument("--raw", default="data/raw/io_listings", help="Folder with YYYY-MM-DD/io_listings.csv")
+    ap.add_argument("--lake", default="data/lake/io_listings", help="Lake root to write snapshot_date= partitions")
+    ap.add_argument("--overwrite", action="store_true", help="Rewrite partitions that already exist")
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(str(Path(args.raw) / "*" / "io_listings.csv")))
+    written = 0
+    for path in paths:
+        day = Path(path).parent.name
+        if not args.overwrite and (partition_dir(args.lake, day) / "part-0.parquet").exists():
+            print(f"skip {day} (exists)")
+            continue
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""])
+        entry = write_partition(to_arrow(df), args.lake, day)
+        written += 1
+        print(f"{day}: {entry['rows']} rows -> {entry['path']} ({entry['bytes']:,} bytes)")
+    print(f"Converted {written} of {len(paths)} snapshot(s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 #!/usr/bin/env bash
 set -euo pipefail
 # Call from project root
-export IO_RAW_GLOB="$(pwd)/data/raw/io_listings/*/io_listings.csv"
+export IO_LAKE_DIR="$(pwd)/data/lake/io_listings"
+export IO_CDC_DIR="$(pwd)/data/lake/io_changes"
+export IO_DETAILS_DIR="$(pwd)/data/lake/io_details"
 export IO_DUCKDB_PATH="dbt/target/io.duckdb"
-echo "IO_RAW_GLOB=$IO_RAW_GLOB"
+echo "IO_LAKE_DIR=$IO_LAKE_DIR"
+echo "IO_CDC_DIR=$IO_CDC_DIR"
+echo "IO_DETAILS_DIR=$IO_DETAILS_DIR"
 echo "IO_DUCKDB_PATH=$IO_DUCKDB_PATH"
\ No newline at end of file
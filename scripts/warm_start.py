@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+import argparse
+import time
+
+from streamlit_app.data_access import DB_PATH, warm_start_path, write_warm_start
+
+# Saves the dashboard's first render (every mode, default filters), the location list, date bounds
+# and per-table row counts next to the warehouse. Run it after the last dbt command of a build (the
+# Makefile's dbt targets and src.ingestion.watch do); anything that writes the warehouse afterwards
+# makes it stale and the app falls back to live queries:
+#   python -m scripts.warm_start --db dbt/target/io.duckdb
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the dashboard's warm start file for a warehouse")
+    ap.add_argument("--db", default=DB_PATH, help="Path to DuckDB file")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    warm = write_warm_start(args.db)
+    print(
+        f"Warm start: {len(warm.results)} results, {len(warm.summary['row_counts'])} tables "
+        f"in {time.perf_counter() - t0:.2f}s -> {warm_start_path(args.db)}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.common.io_utils import atomic_open, ensure_dir
+
+# Bodies are stored decoded, so these no longer describe what we replay.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+class OfflineCacheMiss(requests.exceptions.ConnectionError):
+    pass
+
+
+def cache_key(method: str, url: str, body: Optional[str | bytes]) -> str:
+    h = hashlib.sha256()
+    h.update(method.upper().encode())
+    h.update(b"\0")
+    h.update(url.encode())
+    h.update(b"\0")
+    if body:
+        h.update(body if isinstance(body, bytes) else body.encode())
+    return h.hexdigest()
+
+
+class ResponseStore:
+    # Bodies live in <root>/<key[:2]>/<key>; metadata and LRU bookkeeping in a SQLite index.
+    def __init__(self, root: str | Path, max_bytes: int = 2 * 1024**3, max_age: float = 30 * 86400):
+        self.root = ensure_dir(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("""
+            create table if not exists entries (
+              key text primary key,
+              method text,
+              url text,
+              status integer,
+              headers text,
+              etag text,
+              last_modified text,
+              size integer,
+              stored_at real,
+              accessed_at real
+            )
+        """)
+        self._db.execute("create index if not exists entries_accessed on entries (accessed_at)")
+        # Running byte total of the stored bodies, so eviction never has to sum the table.
+        self._total = self._db.execute("select coalesce(sum(size), 0) from entries").fetchone()[0]
+
+    def body_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("select * from entries where key = ?", (key,)).fetchone()
+        if row is None or not self.body_path(key).exists():
+            return None
+        return dict(row)
+
+    def touch(self, key: str, revalidated: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._db.execute("update entries set accessed_at = ?, stored_at = ? where key = ?", (now, now, key))
+            else:
+                self._db.execute("update entries set accessed_at = ? where key = ?", (now, key))
+
+    def put(self, key: str, method: str, url: str, status: int, headers: dict, chunks: Iterable[bytes]) -> dict:
+        dest = ensure_dir(self.body_path(key).parent) / key
+        size = 0
+        with atomic_open(dest) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        kept = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        now = time.time()
+        entry = {
+            "key": key,
+            "method": method,
+            "url": url,
+            "status": status,
+            "headers": json.dumps(kept),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": size,
+            "stored_at": now,
+            "accessed_at": now,
+        }
+        with self._lock:
+            old = self._db.execute("select size from entries where key = ?", (key,)).fetchone()
+            self._db.execute(
+                "insert or replace into entries values "
+                "(:key, :method, :url, :status, :headers, :etag, :last_modified, :size, :stored_at, :accessed_at)",
+                entry,
+            )
+            self._total += size - (old[0] if old else 0)
+        self.evict(keep=key)
+        return entry
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        # Expired entries, then the least recently used until the total fits. `keep` (the entry just
+        # written, about to be replayed) is never removed, even if it alone is over max_bytes.
+        removed: list[tuple[str, int]] = []
+        with self._lock:
+            cutoff = time.time() - self.max_age
+            removed += self._db.execute(
+                "select key, size from entries where accessed_at < ? and key is not ?", (cutoff, keep)
+            ).fetchall()
+            total = self._total - sum(size for _, size in removed)
+            if total > self.max_bytes:
+                for key, size in self._db.execute(
+                    "select key, size from entries where accessed_at >= ? and key is not ? order by accessed_at",
+                    (cutoff, keep),
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    removed.append((key, size))
+                    total -= size
+            self._db.executemany("delete from entries where key = ?", [(k,) for k, _ in removed])
+            self._total = total
+        for key, _ in removed:
+            self.body_path(key).unlink(missing_ok=True)
+        return len(removed)
+
+
+class _CachedBody:
+    # Minimal stand-in for urllib3's raw response: Response.iter_content falls back to read().
+    def __init__(self, path: Path, original_response=None):
+        self._f = open(path, "rb")
+        self._original_response = original_response
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._f.read(-1 if amt is None else amt)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    # Fresh entries (younger than ttl) are replayed without touching the network; stale GETs
+    # are revalidated with If-None-Match/If-Modified-Since unless the caller sent its own. In
+    # offline mode every request must be answered from the store.
+    def __init__(self, store: ResponseStore, ttl: float = 0, offline: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.ttl = ttl
+        self.offline = offline
+
+    def send(self, request, stream=False, **kwargs):
+        method = (request.method or "GET").upper()
+        if method not in ("GET", "POST"):
+            return super().send(request, stream=stream, **kwargs)
+
+        key = cache_key(method, request.url, request.body)
+        entry = self.store.get(key)
+        # A caller revalidating on its own (fetch_map) gets the server's answer, 304 included.
+        conditional = "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+        if entry and (self.offline or (not conditional and time.time() - entry["stored_at"] < self.ttl)):
+            self.store.touch(key)
+            return self._replay(request, entry, stream, hit=True)
+        if self.offline:
+            raise OfflineCacheMiss(f"Not in cache: {method} {request.url}", request=request)
+
+        if entry and method == "GET" and not conditional:
+            if entry["etag"]:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = super().send(request, stream=True, **kwargs)
+        if resp.status_code == 304 and entry and not conditional:
+            original = getattr(resp.raw, "_original_response", None)
+            resp.close()
+            self.store.touch(key, revalidated=True)
+            return self._replay(request, entry, stream, original, hit=True)
+        if resp.status_code != 200:
+            return resp
+
+        original = getattr(resp.raw, "_original_response", None)
+        try:
+            entry = self.store.put(key, method, request.url, resp.status_code, resp.headers, resp.iter_content(64 * 1024))
+        finally:
+            resp.close()
+        return self._replay(request, entry, stream, original)
+
+    def _replay(
+        self, request, entry: dict, stream: bool, original_response=None, hit: bool = False
+    ) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.reason = "OK"
+        resp.headers = CaseInsensitiveDict(json.loads(entry["headers"]))
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.from_cache = hit
+        # Keeping the live http.client response lets Session still pick up Set-Cookie.
+        body = _CachedBody(self.store.body_path(entry["key"]), original_response)
+        if stream:
+            resp.raw = body
+        else:
+            try:
+                resp._content = body.read()
+            finally:
+                body.close()
+            resp.raw = body
+            resp._content_consumed = True
+        return resp
+
+
+def install_cache(
+    session: requests.Session,
+    cache_dir: str | Path,
+    ttl: float = 0,
+    offline: bool = False,
+    max_bytes: int = 2 * 1024**3,
+    **adapter_kwargs,
+) -> CachingAdapter:
+    adapter = CachingAdapter(ResponseStore(cache_dir, max_bytes=max_bytes), ttl=ttl, offline=offline, **adapter_kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return adapter
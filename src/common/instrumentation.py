@@ -0,0 +1,160 @@
+from __future__ import annotations
+import json
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from src.common.io_utils import atomic_open, percentile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Process-wide stage timers and counters for one pipeline run. Stages are timed with
+# `with timer("parse") as t: ...; t["items"] = n` or `@timed("normalize", items=len)`; counters
+# with `count("http.bytes", n)`. At the end the run writes a JSON report next to its snapshot
+# (REPORT_NAME) and, optionally, a Prometheus textfile for node_exporter's textfile collector.
+
+REPORT_NAME = "run_report.json"
+MAX_SAMPLES = 10_000  # per stage, for latency percentiles
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB elsewhere
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self._t0 = time.perf_counter()
+            self.stages: dict[str, dict[str, Any]] = {}
+            self.counters: dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float, items: float = 0) -> None:
+        with self._lock:
+            s = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "items": 0, "samples": []})
+            s["calls"] += 1
+            s["seconds"] += seconds
+            s["items"] += items
+            if len(s["samples"]) < MAX_SAMPLES:
+                s["samples"].append(seconds)
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[dict[str, float]]:
+        t = {"items": 0}
+        t0 = time.perf_counter()
+        try:
+            yield t
+        finally:
+            self.observe(stage, time.perf_counter() - t0, t["items"])
+
+    def timed(self, stage: str, items: Optional[Callable[[Any], float]] = None) -> Callable:
+        # Decorator form of timer(); `items` maps the return value to an item count (e.g. len).
+        def wrap(fn: Callable) -> Callable:
+            @wraps(fn)
+            def inner(*args, **kwargs):
+                with self.timer(stage) as t:
+                    result = fn(*args, **kwargs)
+                    t["items"] = items(result) if items else 0
+                return result
+            return inner
+        return wrap
+
+    def report(self, **info: Any) -> dict[str, Any]:
+        with self._lock:
+            stages = {}
+            for name, s in sorted(self.stages.items()):
+                stages[name] = {
+                    "calls": s["calls"],
+                    "seconds": round(s["seconds"], 4),
+                    "items": s["items"],
+                    "items_per_s": round(s["items"] / s["seconds"], 1) if s["items"] and s["seconds"] > 0 else None,
+                    "p50_ms": round(percentile(s["samples"], 50) * 1000, 2) if s["samples"] else None,
+                    "p95_ms": round(percentile(s["samples"], 95) * 1000, 2) if s["samples"] else None,
+                    "max_ms": round(max(s["samples"]) * 1000, 2) if s["samples"] else None,
+                }
+            counters = dict(sorted(self.counters.items()))
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._t0, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            **info,
+            "stages": stages,
+            "counters": counters,
+        }
+
+
+def write_report(report: dict[str, Any], run_dir: str | Path) -> Path:
+    dest = Path(run_dir) / REPORT_NAME
+    with atomic_open(dest, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return dest
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def write_prometheus(report: dict[str, Any], path: str | Path, job: str = "io_scrape") -> Path:
+    # Gauges describing the last run, in the text exposition format.
+    lines = []
+
+    def gauge(name: str, help_: str, samples: list[tuple[dict[str, str], Any]]) -> None:
+        samples = [(labels, v) for labels, v in samples if v is not None]
+        if not samples:
+            return
+        lines.extend([f"# HELP io_pipeline_{name} {help_}", f"# TYPE io_pipeline_{name} gauge"])
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in {"job": job, **labels}.items())
+            lines.append(f"io_pipeline_{name}{{{label_str}}} {float(value)}")
+
+    finished = datetime.fromisoformat(report["finished_at"]).timestamp()
+    gauge("last_run_timestamp_seconds", "When the last run finished.", [({}, finished)])
+    gauge("run_seconds", "Wall time of the last run.", [({}, report["seconds"])])
+    rss = report["peak_rss_mb"]
+    gauge("peak_rss_bytes", "Peak resident memory of the last run.", [({}, rss * 1024 * 1024 if rss else None)])
+    for field, help_ in (
+        ("seconds", "Time spent in the stage."),
+        ("calls", "Times the stage ran."),
+        ("items", "Items (rows, bytes, files) the stage processed."),
+        ("p95_ms", "95th percentile duration of one call."),
+    ):
+        gauge(f"stage_{field}", help_, [({"stage": stage}, s[field]) for stage, s in report["stages"].items()])
+    for name, value in report["counters"].items():
+        gauge(_metric_name(name), f"Counter {name} for the last run.", [({}, value)])
+
+    dest = Path(path)
+    with atomic_open(dest, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return dest
+
+
+METRICS = Metrics()
+timer = METRICS.timer
+timed = METRICS.timed
+count = METRICS.count
+
+
+def count_retry(retry_state) -> None:
+    # tenacity before_sleep hook: one per retried HTTP attempt.
+    METRICS.count("http.retries")
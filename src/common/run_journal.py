@@ -0,0 +1,75 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from src.common.io_utils import atomic_open, ensure_dir
+
+# Append-only JSON-lines log of the stages a run has completed (one file per run directory).
+# Each entry is {"stage", "key", "at", ...}; stages that produce a file record its sha256 so a
+# resumed run only trusts outputs that are still intact. The latest entry per (stage, key) wins.
+
+JOURNAL_NAME = "_journal.jsonl"
+
+
+def sha256_file(path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RunJournal:
+    def __init__(self, run_dir: str | Path, resume: bool = False):
+        self.path = ensure_dir(run_dir) / JOURNAL_NAME
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], dict[str, Any]] = {}
+        if resume and self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                self._entries[(entry["stage"], entry.get("key", ""))] = entry
+        else:
+            self.path.unlink(missing_ok=True)
+
+    def get(self, stage: str, key: str = "") -> Optional[dict[str, Any]]:
+        return self._entries.get((stage, key))
+
+    def done(self, stage: str, key: str = "", path: Optional[str | Path] = None) -> Optional[dict[str, Any]]:
+        # The entry if the stage completed and, when it produced `path`, that file is unchanged.
+        entry = self.get(stage, key)
+        if entry is None or path is None:
+            return entry
+        p = Path(path)
+        if not p.exists() or sha256_file(p) != entry.get("sha256"):
+            return None
+        return entry
+
+    def record(self, stage: str, key: str = "", path: Optional[str | Path] = None, **info: Any) -> dict[str, Any]:
+        entry = {"stage": stage, "key": key, "at": datetime.now(timezone.utc).isoformat(timespec="seconds"), **info}
+        if path is not None:
+            entry["path"] = str(path)
+            entry["sha256"] = sha256_file(path)
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries[(stage, key)] = entry
+        return entry
+
+    def forget(self, stage: str) -> None:
+        # Drop every entry of a stage (e.g. pages from a crawl that failed validation).
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if k[0] != stage}
+            with atomic_open(self.path, "w") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
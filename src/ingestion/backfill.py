@@ -0,0 +1,174 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+import pyarrow.parquet as pq
+
+from src.common.io_utils import atomic_open, ensure_dir
+from src.ingestion.cdc import rediff
+from src.ingestion.io_scrape import parse_page
+from src.ingestion.lake import PART_NAME, read_manifest, register_partitions, write_csv, write_partition_file
+from src.ingestion.normalize import normalize_batch
+from src.ingestion.parser_backends import PARSER_BACKENDS
+from src.ingestion.raw_archive import RawArchive
+from src.ingestion.row_batch import RowBatch
+from src.ingestion.validate import VALIDATION_NAME, validate
+
+# Rebuilds daily snapshots from the raw archive after the grid parsers or normalize_batch change.
+# Days are independent, so each one is a task for a process pool: re-parse that day's archived
+# pages, re-normalize, validate as a scrape would (a day that fails keeps its old partition and is
+# quarantined), and atomically rewrite its CSV and lake partition. Only the parent touches the lake
+# manifest, once every day is done, and then re-diffs the CDC change log from the first rebuilt day on.
+
+# The dbt models that read the lake or the change log; their incrementals never reload days before
+# their watermark, so rebuilt days reach the warehouse only through a full refresh of these.
+DBT_REFRESH = "dbt build --full-refresh --select stg_io_listings_all+ stg_io_listings+ stg_io_changes+"
+
+
+def rebuild_day(
+    archive_dir: str,
+    day: str,
+    out_dir: Optional[str],
+    lake_dir: str,
+    parser: str,
+    previous_rows: Optional[int] = None,
+    skip_validation: bool = False,
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    archive = RawArchive(archive_dir)
+    index = archive.read_day(day)
+    rows = RowBatch()
+    nbytes = 0
+    for page in index["pages"]:
+        body = archive.get(page["sha256"])
+        nbytes += len(body)
+        parse_page(body.decode("utf-8", errors="replace"), parser, rows)
+
+    # Keeps the original scrape time.
+    table = normalize_batch(rows, ingested_at=index.get("ingested_at"))
+    stats: dict[str, Any] = {"day": day, "pages": len(index["pages"]), "bytes": nbytes, "rows": table.num_rows, "entry": None}
+    if table.num_rows:
+        check = validate(table, index.get("total_records"), previous_rows)
+        stats["validation"] = check["status"]
+        day_dir = ensure_dir(Path(out_dir) / day) if out_dir else None
+        if day_dir:
+            with atomic_open(day_dir / VALIDATION_NAME, "w") as f:
+                json.dump(check, f, indent=2)
+        if check["status"] == "error" and not skip_validation:
+            if day_dir:
+                with atomic_open(ensure_dir(day_dir / "quarantine") / PART_NAME) as f:
+                    pq.write_table(table, f, compression="zstd")
+        else:
+            if day_dir:
+                write_csv(table, day_dir / "io_listings.csv")
+            stats["entry"] = write_partition_file(table, lake_dir, day)
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def backfill(
+    archive_dir: str,
+    lake_dir: str,
+    out_dir: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    workers: Optional[int] = None,
+    parser: str = "lxml",
+    verbose: bool = True,
+    cdc_dir: Optional[str] = None,
+    skip_validation: bool = False,
+) -> dict[str, Any]:
+    days = RawArchive(archive_dir).days(start, end)
+    # row_drop compares each day with the lake's partition before it, as at scrape time.
+    lake = read_manifest(lake_dir)["partitions"]
+    previous = {day: ([p["rows"] for p in lake if p["snapshot_date"] < day] or [None])[-1] for day in days}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(days) or 1))
+    done: list[dict[str, Any]] = []
+    failed: list[str] = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(rebuild_day, archive_dir, day, out_dir, lake_dir, parser, previous[day], skip_validation): day
+            for day in days
+        }
+        for fut in as_completed(futures):
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed.append(futures[fut])
+                print(f"{futures[fut]}: failed ({e})")
+                continue
+            done.append(r)
+            if verbose:
+                print(f"{r['day']}: {r['pages']} pages, {r['rows']} rows in {r['seconds']:.2f}s, validation {r.get('validation')}")
+    entries = [r["entry"] for r in done if r["entry"]]
+    if entries:
+        register_partitions(lake_dir, entries)
+    elapsed = time.perf_counter() - started
+
+    cdc: list[dict[str, Any]] = []
+    if entries and cdc_dir and read_manifest(cdc_dir)["partitions"]:
+        cdc = rediff(lake_dir, cdc_dir, min(e["snapshot_date"] for e in entries))
+
+    rows = sum(r["rows"] for r in done)
+    mb = sum(r["bytes"] for r in done) / 1e6
+    return {
+        "days": len(done),
+        "failed": failed,
+        "quarantined": sorted(r["day"] for r in done if r.get("validation") == "error" and not r["entry"]),
+        "rebuilt": sorted(e["snapshot_date"] for e in entries),
+        "cdc_days": [c["snapshot_date"] for c in cdc],
+        "workers": workers,
+        "pages": sum(r["pages"] for r in done),
+        "rows": rows,
+        "mb": round(mb, 1),
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed) if elapsed > 0 else None,
+        "mb_per_s": round(mb / elapsed, 1) if elapsed > 0 else None,
+        # Sum of per-day work over wall time; close to `workers` when the pool scales linearly.
+        "parallelism": round(sum(r["seconds"] for r in done) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild snapshots for a date range from the raw HTML archive")
+    ap.add_argument("--archive-dir", default="data/raw/io_archive", help="Raw archive written by io_scrape")
+    ap.add_argument("--lake-dir", default="data/lake/io_listings", help="Lake whose partitions are rewritten")
+    ap.add_argument("--out", default="data/raw/io_listings", help="Daily CSV folder to rewrite ('' to skip CSVs)")
+    ap.add_argument("--cdc-dir", default="data/lake/io_changes", help="Change log to re-diff from the first rebuilt day ('' to skip)")
+    ap.add_argument("--start", default=None, help="First snapshot date (YYYY-MM-DD), inclusive")
+    ap.add_argument("--end", default=None, help="Last snapshot date (YYYY-MM-DD), inclusive")
+    ap.add_argument("--workers", type=int, default=None, help="Processes, one snapshot day each (default: all cores)")
+    ap.add_argument("--parser", choices=sorted([*PARSER_BACKENDS, "stream"]), default="lxml")
+    ap.add_argument("--skip-validation", action="store_true", help="Write days that fail validation anyway")
+    args = ap.parse_args()
+
+    stats = backfill(
+        args.archive_dir, args.lake_dir, args.out or None, args.start, args.end, args.workers, args.parser,
+        cdc_dir=args.cdc_dir or None, skip_validation=args.skip_validation,
+    )
+    print(
+        f"Rebuilt {stats['days']} days ({stats['pages']} pages, {stats['mb']} MB HTML, {stats['rows']} rows) "
+        f"in {stats['seconds']}s with {stats['workers']} workers: {stats['rows_per_s']} rows/s, "
+        f"{stats['mb_per_s']} MB/s, parallelism {stats['parallelism']}x"
+    )
+    if stats["cdc_days"]:
+        print(f"Re-diffed the change log for {stats['cdc_days'][0]}..{stats['cdc_days'][-1]} ({len(stats['cdc_days'])} days)")
+    if stats["rebuilt"]:
+        print(f"Load the rebuilt days into the warehouse with: cd dbt && {DBT_REFRESH}")
+    if stats["quarantined"]:
+        print(f"Quarantined (failed validation, lake left as it was): {', '.join(stats['quarantined'])}")
+    if stats["failed"]:
+        print(f"Failed days: {', '.join(sorted(stats['failed']))}")
+        raise SystemExit(1)
+    if stats["quarantined"]:
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from __future__ import annotations
+import argparse
+import hashlib
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.common.io_utils import atomic_open, ensure_dir
+from src.ingestion.lake import LISTINGS_SCHEMA, read_manifest, write_partition
+
+# Change-data-capture over the snapshot lake. Each snapshot is hashed on its business columns
+# and diffed against the previous snapshot's hash index (<cdc>/_index/YYYY-MM-DD.parquet:
+# property_id -> row_hash, valid_from). Only the deltas are written, as SCD2 records, to
+# <cdc>/snapshot_date=YYYY-MM-DD/part-0.parquet:
+#   I  new property          full row, valid_from = snapshot, valid_to = null
+#   U  changed row           full row, valid_from = snapshot, valid_to = null,
+#                            prev_valid_from = the version it closes (its valid_to = snapshot)
+#   D  property disappeared  business columns null, valid_from = closed version, valid_to = snapshot
+
+HASH_COLUMNS = [
+    "address", "city", "region", "acres_val", "sqft_val", "price", "status",
+    "mls_text", "mls_url", "posted_date", "details_abs", "image_abs",
+]
+INDEX_DIR = "_index"
+INDEX_KEEP = 7
+_NULL = "\x00"
+# Parquet metadata tag of files holding row_hashes() values (hash index, details store).
+ROW_HASH_VERSION = b"md5-lower64"
+
+INDEX_SCHEMA = pa.schema([
+    ("property_id", pa.int64()),
+    ("row_hash", pa.int64()),
+    ("valid_from", pa.date32()),
+])
+CHANGES_SCHEMA = pa.schema(
+    [("op", pa.string())]
+    + [LISTINGS_SCHEMA.field(n) for n in LISTINGS_SCHEMA.names]
+    + [("row_hash", pa.int64()), ("valid_from", pa.date32()), ("valid_to", pa.date32()),
+       ("prev_valid_from", pa.date32())]
+)
+
+def row_hashes(table: pa.Table, columns: list[str] = HASH_COLUMNS) -> pa.Array:
+    # Low 64 bits of the md5 of the '|'-joined business columns (nulls as \x00), as int64, all in one
+    # DuckDB query over the Arrow table.
+    import duckdb
+
+    joined = ", ".join(f"coalesce(cast(\"{c}\" as varchar), chr(0))" for c in columns)
+    con = duckdb.connect()
+    con.execute("set enable_progress_bar = false")
+    try:
+        con.register("listings", table.select(columns))
+        hashes = con.execute(f"select md5_number_lower(concat_ws('|', {joined})) as h from listings").arrow()
+    finally:
+        con.close()
+    return pc.cast(hashes.column("h"), pa.int64(), safe=False).combine_chunks()
+
+def _legacy_row_hashes(table: pa.Table, columns: list[str] = HASH_COLUMNS) -> pa.Array:
+    # row_hashes() before ROW_HASH_VERSION (blake2b per row in Python); only read to carry stored hashes over.
+    parts = [pc.fill_null(pc.cast(table.column(c), pa.string()), _NULL) for c in columns]
+    return pa.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little", signed=True)
+         for s in pc.binary_join_element_wise(*parts, "|").to_pylist()],
+        type=pa.int64(),
+    )
+
+def current_hashes(path: str | Path) -> bool:
+    # Whether a stored hash index / details store holds row_hashes() (tagged in its Parquet metadata).
+    return (pq.read_schema(path).metadata or {}).get(b"row_hash") == ROW_HASH_VERSION
+
+def upgrade_hashes(known: pa.Table, table: pa.Table) -> pa.Table:
+    # `known` (property_id, row_hash, ...) stored before ROW_HASH_VERSION: a row_hash still equal to
+    # the old hash of the property's row in `table` becomes its row_hashes(); the rest stay, and differ.
+    ids = table.column("property_id")
+    first = pc.equal(pa.array(range(table.num_rows), pa.int64()), pc.index_in(ids, ids))
+    table = table.filter(first)
+    cur = pa.table({
+        "property_id": table.column("property_id"),
+        "_legacy": _legacy_row_hashes(table),
+        "_hash": row_hashes(table),
+    })
+    both = known.join(cur, "property_id", join_type="left outer")
+    same = pc.fill_null(pc.equal(both.column("row_hash"), both.column("_legacy")), False)
+    both = both.set_column(
+        both.schema.get_field_index("row_hash"), "row_hash", pc.if_else(same, both.column("_hash"), both.column("row_hash"))
+    )
+    return both.select(known.schema.names).cast(known.schema).sort_by("property_id")
+
+def index_path(cdc_dir: str | Path, snapshot_date: str) -> Path:
+    return Path(cdc_dir) / INDEX_DIR / f"{snapshot_date}.parquet"
+
+def index_dates(cdc_dir: str | Path) -> list[str]:
+    root = Path(cdc_dir) / INDEX_DIR
+    return sorted(p.stem for p in root.glob("*.parquet")) if root.exists() else []
+
+def load_index(cdc_dir: str | Path, before: str) -> tuple[Optional[str], pa.Table]:
+    dates = index_dates(cdc_dir)
+    later = [d for d in dates if d > before]
+    if later:
+        raise ValueError(f"CDC index already has {later[-1]}; snapshots must be applied in date order")
+    prior = [d for d in dates if d < before]
+    if not prior:
+        return None, INDEX_SCHEMA.empty_table()
+    return prior[-1], pq.read_table(index_path(cdc_dir, prior[-1]), schema=INDEX_SCHEMA)
+
+def _snapshot_rows(table: pa.Table) -> pa.Table:
+    table = table.select(LISTINGS_SCHEMA.names).cast(LISTINGS_SCHEMA)
+    table = table.filter(pc.is_valid(table.column("property_id")))
+    # Keep the first row per property_id (the grid should not repeat ids, but don't trust it).
+    first = pc.equal(
+        pa.array(range(table.num_rows), pa.int64()),
+        pc.index_in(table.column("property_id"), table.column("property_id")),
+    )
+    return table.filter(first)
+
+def diff_snapshot(
+    table: pa.Table, index: pa.Table, snapshot_date: str, legacy_index: bool = False
+) -> tuple[pa.Table, pa.Table]:
+    table = _snapshot_rows(table)
+    if legacy_index:
+        index = upgrade_hashes(index, table)
+    day = date.fromisoformat(snapshot_date)
+    n = table.num_rows
+
+    cur = pa.table({
+        "property_id": table.column("property_id"),
+        "row_hash": row_hashes(table),
+        "row": pa.array(range(n), pa.int64()),
+    })
+    both = cur.join(index, "property_id", join_type="full outer", right_suffix="_prev")
+    in_cur = pc.is_valid(both.column("row"))
+    in_prev = pc.is_valid(both.column("valid_from"))
+    inserted = pc.and_(in_cur, pc.invert(in_prev))
+    updated = pc.and_kleene(pc.and_(in_cur, in_prev), pc.not_equal(both.column("row_hash"), both.column("row_hash_prev")))
+    unchanged = pc.and_(pc.and_(in_cur, in_prev), pc.invert(updated))
+    deleted = pc.and_(pc.invert(in_cur), in_prev)
+
+    def _versions(mask, op: str) -> pa.Table:
+        sel = both.filter(mask)
+        rows = table.take(sel.column("row"))
+        m = rows.num_rows
+        out = rows.add_column(0, "op", pa.array([op] * m, pa.string()))
+        out = out.append_column("row_hash", sel.column("row_hash"))
+        out = out.append_column("valid_from", pa.array([day] * m, pa.date32()))
+        out = out.append_column("valid_to", pa.nulls(m, pa.date32()))
+        prev = sel.column("valid_from") if op == "U" else pa.nulls(m, pa.date32())
+        return out.append_column("prev_valid_from", prev)
+
+    gone = both.filter(deleted)
+    k = gone.num_rows
+    tombstones = {f.name: pa.nulls(k, f.type) for f in CHANGES_SCHEMA}
+    tombstones.update({
+        "op": pa.array(["D"] * k, pa.string()),
+        "property_id": gone.column("property_id"),
+        "row_hash": gone.column("row_hash_prev"),
+        "valid_from": gone.column("valid_from"),
+        "valid_to": pa.array([day] * k, pa.date32()),
+    })
+    changes = pa.concat_tables([
+        _versions(inserted, "I").cast(CHANGES_SCHEMA),
+        _versions(updated, "U").cast(CHANGES_SCHEMA),
+        pa.table(tombstones, schema=CHANGES_SCHEMA),
+    ]).sort_by("property_id")
+
+    kept = both.filter(unchanged)
+    new_index = pa.concat_tables([
+        pa.table({
+            "property_id": kept.column("property_id"),
+            "row_hash": kept.column("row_hash"),
+            "valid_from": kept.column("valid_from"),
+        }, schema=INDEX_SCHEMA),
+        changes.filter(pc.is_in(changes.column("op"), pa.array(["I", "U"])))
+               .select(INDEX_SCHEMA.names).cast(INDEX_SCHEMA),
+    ]).sort_by("property_id")
+    return changes, new_index
+
+def write_index(index: pa.Table, cdc_dir: str | Path, snapshot_date: str) -> Path:
+    dest = ensure_dir(Path(cdc_dir) / INDEX_DIR) / f"{snapshot_date}.parquet"
+    with atomic_open(dest) as f:
+        pq.write_table(index.replace_schema_metadata({b"row_hash": ROW_HASH_VERSION}), f, compression="zstd")
+    for old in index_dates(cdc_dir)[:-INDEX_KEEP]:
+        index_path(cdc_dir, old).unlink(missing_ok=True)
+    return dest
+
+def apply_snapshot(table: pa.Table, cdc_dir: str | Path, snapshot_date: str) -> dict[str, Any]:
+    prev_date, index = load_index(cdc_dir, snapshot_date)
+    legacy = prev_date is not None and not current_hashes(index_path(cdc_dir, prev_date))
+    changes, new_index = diff_snapshot(table, index, snapshot_date, legacy_index=legacy)
+    entry = write_partition(changes, cdc_dir, snapshot_date)
+    write_index(new_index, cdc_dir, snapshot_date)
+    ops = changes.column("op").to_pylist()
+    return {
+        **entry,
+        "previous": prev_date,
+        "inserted": ops.count("I"),
+        "updated": ops.count("U"),
+        "deleted": ops.count("D"),
+        "unchanged": new_index.num_rows - ops.count("I") - ops.count("U"),
+    }
+
+def index_as_of(table: pa.Table, cdc_dir: str | Path, snapshot_date: str) -> pa.Table:
+    # The hash index after `snapshot_date`, for when its _index file was pruned: today's hashes of that
+    # day's snapshot, each property's valid_from from its latest I/U record up to that day.
+    table = _snapshot_rows(table)
+    parts = [p for p in read_manifest(cdc_dir)["partitions"] if p["snapshot_date"] <= snapshot_date]
+    changes = pa.concat_tables(
+        [pq.read_table(Path(cdc_dir) / p["path"], columns=["op", "property_id", "valid_from"]) for p in parts]
+        or [CHANGES_SCHEMA.empty_table().select(["op", "property_id", "valid_from"])]
+    )
+    opened = (
+        changes.filter(pc.is_in(changes.column("op"), pa.array(["I", "U"])))
+        .group_by("property_id").aggregate([("valid_from", "max")])
+    )
+    index = pa.table({"property_id": table.column("property_id"), "row_hash": row_hashes(table)})
+    index = index.join(opened, "property_id", join_type="left outer")
+    # A property the change log never saw opened (none should be) starts its version that day.
+    valid_from = pc.fill_null(index.column("valid_from_max"), pa.scalar(date.fromisoformat(snapshot_date)))
+    return index.append_column("valid_from", valid_from).select(INDEX_SCHEMA.names).cast(INDEX_SCHEMA).sort_by("property_id")
+
+def rediff(lake_dir: str | Path, cdc_dir: str | Path, start: str) -> list[dict[str, Any]]:
+    # Re-derives the change log from `start` to the newest lake day, after those lake partitions
+    # were rewritten (backfill). The diff of `start` needs the index of the lake day before it,
+    # rebuilt by index_as_of when it is no longer kept.
+    parts = read_manifest(lake_dir)["partitions"]
+    before = [p for p in parts if p["snapshot_date"] < start]
+    for day in index_dates(cdc_dir):
+        if day >= start:
+            index_path(cdc_dir, day).unlink()
+    if before and not index_path(cdc_dir, before[-1]["snapshot_date"]).exists():
+        day = before[-1]["snapshot_date"]
+        index = index_as_of(pq.read_table(Path(lake_dir) / before[-1]["path"]), cdc_dir, day)
+        # Written directly: write_index would prune it right away when 7 newer indexes exist.
+        with atomic_open(ensure_dir(Path(cdc_dir) / INDEX_DIR) / f"{day}.parquet") as f:
+            pq.write_table(index.replace_schema_metadata({b"row_hash": ROW_HASH_VERSION}), f, compression="zstd")
+    return [
+        apply_snapshot(pq.read_table(Path(lake_dir) / p["path"]), cdc_dir, p["snapshot_date"])
+        for p in parts if p["snapshot_date"] >= start
+    ]
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay lake snapshots through CDC (missing days only)")
+    ap.add_argument("--lake-dir", default="data/lake/io_listings", help="Snapshot lake (snapshot_date=)")
+    ap.add_argument("--cdc-dir", default="data/lake/io_changes", help="Change log + hash index output")
+    args = ap.parse_args()
+
+    done = set(index_dates(args.cdc_dir))
+    last = max(done) if done else ""
+    for part in read_manifest(args.lake_dir)["partitions"]:
+        day = part["snapshot_date"]
+        if day in done or day < last:
+            continue
+        stats = apply_snapshot(pq.read_table(Path(args.lake_dir) / part["path"]), args.cdc_dir, day)
+        print(f"{day}: +{stats['inserted']} ~{stats['updated']} -{stats['deleted']} ={stats['unchanged']}")
+
+if __name__ == "__main__":
+    main()
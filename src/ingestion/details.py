@@ -0,0 +1,239 @@
+from __future__ import annotations
+import argparse
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.common.io_utils import DEF_USER_AGENT, HostRateLimiter, atomic_open, ensure_dir, percentile
+from src.ingestion.cdc import ROW_HASH_VERSION, current_hashes, row_hashes, upgrade_hashes
+from src.ingestion.io_scrape import fetch
+from src.ingestion.lake import read_manifest
+
+# requests and lxml load where they are first used, as in io_scrape, so --help returns at once.
+if TYPE_CHECKING:
+    import requests
+
+# Detail-page enrichment: fetches pspropertydetails.aspx for each listing and keeps one typed row
+# per property in <details>/details.parquet. A page is refetched only when the property's grid row
+# hash changed (same hash as the CDC stage) or its copy is older than the TTL. Every fetched page is
+# appended to <details>/_checkpoint.jsonl as it completes, so an interrupted run resumes where it
+# stopped; the checkpoint is folded into details.parquet at the end of a run.
+
+STORE_NAME = "details.parquet"
+CHECKPOINT_NAME = "_checkpoint.jsonl"
+TTL_DAYS = 7
+
+# Typed column -> page labels it is read from (compared lowercased, without the trailing colon).
+DETAIL_FIELDS = {
+    "property_type": ("property type", "type of property"),
+    "zoning": ("zoning",),
+    "official_plan": ("official plan", "official plan designation"),
+    "legal_description": ("legal description",),
+    "pin": ("pin", "property identification number"),
+    "frontage": ("frontage",),
+    "services": ("services", "servicing"),
+}
+
+DETAILS_SCHEMA = pa.schema(
+    [("property_id", pa.int64()), ("row_hash", pa.int64()), ("details_url", pa.string())]
+    + [(name, pa.string()) for name in DETAIL_FIELDS]
+    + [("attributes", pa.string()), ("fetched_at", pa.timestamp("s", tz="UTC"))]
+)
+
+_LABEL_RE = re.compile(r"\s+")
+
+@cache
+def _text_nodes():
+    from lxml import etree
+
+    return etree.XPath("descendant-or-self::text()[not(parent::script or parent::style)]", smart_strings=False)
+
+def _text(el) -> str:
+    return " ".join(s for s in (t.strip() for t in _text_nodes()(el)) if s)
+
+def _label(text: str) -> str:
+    return _LABEL_RE.sub(" ", text).strip().rstrip(":").strip().lower()
+
+def parse_detail_page(text: str | bytes) -> dict[str, Optional[str]]:
+    # Label/value pairs from two-cell table rows and <dt>/<dd> lists, mapped onto DETAIL_FIELDS;
+    # every pair is also kept in `attributes` (JSON) so unmapped labels are not lost.
+    from lxml import html as lxml_html
+
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    doc = lxml_html.document_fromstring(text, parser=lxml_html.HTMLParser(encoding="utf-8"))
+    pairs: dict[str, str] = {}
+    for tr in doc.iter("tr"):
+        cells = [c for c in tr if c.tag in ("th", "td")]
+        if len(cells) == 2:
+            key, value = _label(_text(cells[0])), _text(cells[1])
+            if key and value:
+                pairs.setdefault(key, value)
+    for dt in doc.iter("dt"):
+        dd = dt.getnext()
+        if dd is not None and dd.tag == "dd":
+            key, value = _label(_text(dt)), _text(dd)
+            if key and value:
+                pairs.setdefault(key, value)
+
+    out: dict[str, Optional[str]] = {}
+    for name, labels in DETAIL_FIELDS.items():
+        out[name] = next((pairs[l] for l in labels if l in pairs), None)
+    out["attributes"] = json.dumps(pairs, ensure_ascii=False, sort_keys=True) if pairs else None
+    return out
+
+def store_path(details_dir: str | Path) -> Path:
+    return Path(details_dir) / STORE_NAME
+
+def checkpoint_path(details_dir: str | Path) -> Path:
+    return Path(details_dir) / CHECKPOINT_NAME
+
+def _record_table(records: list[dict[str, Any]]) -> pa.Table:
+    rows = [{**r, "fetched_at": datetime.fromisoformat(r["fetched_at"])} for r in records]
+    return pa.Table.from_pylist(rows, schema=DETAILS_SCHEMA)
+
+def load_store(details_dir: str | Path) -> pa.Table:
+    # details.parquet with any checkpointed records from an interrupted run laid over it.
+    path = store_path(details_dir)
+    store = pq.read_table(path, schema=DETAILS_SCHEMA) if path.exists() else DETAILS_SCHEMA.empty_table()
+    ckpt = checkpoint_path(details_dir)
+    if not ckpt.exists():
+        return store
+    records = []
+    for line in ckpt.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue  # a line cut off by the interruption
+    return merge(store, _record_table(records))
+
+def merge(store: pa.Table, fresh: pa.Table) -> pa.Table:
+    # Latest record per property_id wins.
+    keep = store.filter(pc.invert(pc.is_in(store.column("property_id"), fresh.column("property_id"))))
+    last = {pid: i for i, pid in enumerate(fresh.column("property_id").to_pylist())}
+    fresh = fresh.take(pa.array(sorted(last.values()), pa.int64()))
+    return pa.concat_tables([keep, fresh]).sort_by("property_id")
+
+def write_store(store: pa.Table, details_dir: str | Path) -> Path:
+    dest = ensure_dir(details_dir) / STORE_NAME
+    with atomic_open(dest) as f:
+        pq.write_table(store.replace_schema_metadata({b"row_hash": ROW_HASH_VERSION}), f, compression="zstd")
+    checkpoint_path(details_dir).unlink(missing_ok=True)
+    return dest
+
+def due_properties(
+    table: pa.Table, store: pa.Table, ttl_days: float = TTL_DAYS, now: Optional[datetime] = None
+) -> list[tuple[int, int, str]]:
+    # (property_id, row_hash, details_url) of listings that are new, changed, or stale.
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=ttl_days)
+    known = {
+        r["property_id"]: (r["row_hash"], r["fetched_at"])
+        for r in store.select(["property_id", "row_hash", "fetched_at"]).to_pylist()
+    }
+    hashes = row_hashes(table).to_pylist()
+    due = []
+    for pid, url, h in zip(table.column("property_id").to_pylist(), table.column("details_abs").to_pylist(), hashes):
+        if pid is None or not url:
+            continue
+        prev = known.get(pid)
+        if prev is None or prev[0] != h or prev[1] is None or prev[1] < cutoff:
+            due.append((pid, h, url))
+    return due
+
+def enrich(
+    table: pa.Table,
+    details_dir: str | Path,
+    session: requests.Session,
+    workers: int = 4,
+    sleep: float = 1.0,
+    ttl_days: float = TTL_DAYS,
+    limit: Optional[int] = None,
+) -> dict[str, Any]:
+    store = load_store(details_dir)
+    if store_path(details_dir).exists() and not current_hashes(store_path(details_dir)):
+        store = upgrade_hashes(store, table)
+    due = due_properties(table, store, ttl_days)
+    linked = sum(1 for url in table.column("details_abs").to_pylist() if url)
+    stats: dict[str, Any] = {"due": len(due), "fetched": 0, "failed": 0, "fresh": linked - len(due)}
+    if limit is not None:
+        due = due[:limit]
+
+    limiter = HostRateLimiter(rate=1.0 / sleep if sleep > 0 else 0)
+
+    def fetch_one(pid: int, h: int, url: str) -> tuple[dict[str, Any], float]:
+        limiter.acquire(url)
+        t0 = time.perf_counter()
+        r = fetch(session, url)
+        fields = parse_detail_page(r.content)
+        fetched_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+        return {"property_id": pid, "row_hash": h, "details_url": url, **fields, "fetched_at": fetched_at}, time.perf_counter() - t0
+
+    ensure_dir(details_dir)
+    latencies: list[float] = []
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        with open(checkpoint_path(details_dir), "a", encoding="utf-8") as ckpt:
+            futures = {pool.submit(fetch_one, *job): job[0] for job in due}
+            for fut in as_completed(futures):
+                try:
+                    record, latency = fut.result()
+                except Exception:
+                    stats["failed"] += 1
+                    print(f"Failed details for {futures[fut]}")
+                    continue
+                ckpt.write(json.dumps(record, ensure_ascii=False) + "\n")
+                ckpt.flush()
+                stats["fetched"] += 1
+                latencies.append(latency)
+    finally:
+        # On Ctrl-C, drop the queued pages instead of fetching them; the checkpoint has the rest.
+        pool.shutdown(cancel_futures=True)
+    elapsed = time.perf_counter() - started
+
+    store = load_store(details_dir)
+    stats["path"] = str(write_store(store, details_dir))
+    stats["properties"] = store.num_rows
+    stats["seconds"] = round(elapsed, 3)
+    stats["p50_ms"] = round(percentile(latencies, 50) * 1000, 1) if latencies else None
+    stats["p95_ms"] = round(percentile(latencies, 95) * 1000, 1) if latencies else None
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Fetch detail pages for new/changed/stale listings into details.parquet")
+    ap.add_argument("--lake-dir", default="data/lake/io_listings", help="Snapshot lake (the latest partition is enriched)")
+    ap.add_argument("--details-dir", default="data/lake/io_details", help="details.parquet + resume checkpoint")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent detail fetches (rate limit still applies)")
+    ap.add_argument("--sleep", type=float, default=1.0, help="Seconds between requests to the site, on average")
+    ap.add_argument("--ttl-days", type=float, default=TTL_DAYS, help="Refetch unchanged listings older than this")
+    ap.add_argument("--limit", type=int, default=None, help="Max pages to fetch this run")
+    args = ap.parse_args()
+
+    parts = read_manifest(args.lake_dir)["partitions"]
+    if not parts:
+        print(f"No partitions in {args.lake_dir}")
+        return
+    import requests
+
+    table = pq.read_table(Path(args.lake_dir) / parts[-1]["path"])
+    session = requests.Session()
+    session.headers.update({"User-Agent": DEF_USER_AGENT})
+    stats = enrich(table, args.details_dir, session, args.workers, args.sleep, args.ttl_days, args.limit)
+    print(
+        f"Details for {parts[-1]['snapshot_date']}: {stats['fetched']} fetched, {stats['failed']} failed, "
+        f"{stats['fresh']} fresh, {stats['due'] - stats['fetched'] - stats['failed']} deferred "
+        f"in {stats['seconds']}s (p50 {stats['p50_ms']} ms) -> {stats['path']} ({stats['properties']} properties)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from __future__ import annotations
 import re
+from itertools import islice
 from typing import Any, Optional
 from bs4 import BeautifulSoup
 
+from src.ingestion.row_batch import RowBatch
+
+def load_document(text: str) -> BeautifulSoup:
+    return BeautifulSoup(text, "html.parser")
+
 def extract_form_state(soup: BeautifulSoup) -> dict[str, str]:
     fields = {}
     for name in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"]:
@@ -74,3 +80,19 @@ def parse_results_table(soup: BeautifulSoup) -> list[dict[str, Any]]:
             "image_url": link("Image"),
         })
     return rows
+
+def parse_results_batch(soup: BeautifulSoup, batch: Optional[RowBatch] = None) -> RowBatch:
+    batch = batch if batch is not None else RowBatch()
+    for row in parse_results_table(soup):
+        batch.append_dict(row)
+    return batch
+
+def parse_total_records(soup: BeautifulSoup) -> Optional[int]:
+    # From the pager summary around the "Total Records:" label (the label's element or up to two
+    # of its parents), not the text of the whole page.
+    for label in soup.find_all(string=re.compile("Total Records")):
+        for el in islice(label.parents, 3):
+            m = re.search(r"Total Records:\s*(\d+)", el.get_text(" ", strip=True))
+            if m:
+                return int(m.group(1))
+    return None
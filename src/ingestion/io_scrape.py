@@ -1,223 +1,685 @@
 from __future__ import annotations
 import argparse
-import csv
+import codecs
+import hashlib
+import json
 import os
-from datetime import datetime
-from typing import Optional
-
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from tenacity import retry, stop_after_attempt, wait_exponential
-import re
-
-from src.common.io_utils import DEF_USER_AGENT, ensure_dir, polite_sleep, today_str
-from src.ingestion.html_parsers import (
-    extract_form_state,
-    find_pagination_postbacks,
-    parse_results_table,
+import queue
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional
+
+from src.common.instrumentation import METRICS, REPORT_NAME, count, count_retry, timer, write_prometheus, write_report
+from src.common.run_journal import RunJournal
+from src.common.io_utils import (
+    DEF_USER_AGENT,
+    HostRateLimiter,
+    TokenBucket,
+    atomic_open,
+    ensure_dir,
+    percentile,
+    today_str,
 )
+from src.ingestion.map_store import MapStore
+from src.ingestion.parser_backends import PARSER_BACKENDS, get_parser_backend
 
-BASE_URL = "https://apps.infrastructureontario.ca/propertiesforsale/Home.aspx"
-DETAILS_BASE = "https://apps.infrastructureontario.ca/propertiesforsale/pspropertydetails.aspx"
-IMAGE_BASE = "https://apps.infrastructureontario.ca/propertiesforsale/imageview.aspx"
+# requests, pyarrow (and pandas through normalize/lake), tenacity and the Arrow-based stages are
+# imported where they are first used, so --help, argument errors and `import io_scrape` for
+# arg_parser() (watch) stay cheap; bench/bench_startup.py times it.
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import requests
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=8))
-def fetch(session: requests.Session, url: str, method: str = "GET", data: Optional[dict] = None) -> requests.Response:
-    if method == "POST":
-        r = session.post(url, data=data, timeout=30)
-    else:
-        r = session.get(url, timeout=30)
-    r.raise_for_status()
+    from src.ingestion.raw_archive import RawArchive
+    from src.ingestion.row_batch import RowBatch
+
+BASE_URL = "https://apps.infrastructureontario.ca/propertiesforsale/Home.aspx"
+# Per-run folder (next to the journal) of each crawled page's rows, kept until the snapshot is in the lake and CDC.
+PAGES_DIR = "pages"
+PAGE_SUFFIX = ".arrow"
+
+
+class PageCrawlError(RuntimeError):
+    pass
+
+def _with_retries(fn: Callable) -> Callable:
+    # tenacity's retry (3 attempts, exponential backoff, never on an offline cache miss), built on
+    # the first call.
+    retrying: Optional[Callable] = None
+
+    @wraps(fn)
+    def call(*args, **kwargs):
+        nonlocal retrying
+        if retrying is None:
+            from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+            from src.common.http_cache import OfflineCacheMiss
+            retrying = retry(
+                stop=stop_after_attempt(3),
+                wait=wait_exponential(multiplier=1, min=1, max=8),
+                retry=retry_if_not_exception_type(OfflineCacheMiss),
+                before_sleep=count_retry,
+            )(fn)
+        return retrying(*args, **kwargs)
+
+    return call
+
+@_with_retries
+def fetch(
+    session: requests.Session, url: str, method: str = "GET", data: Optional[dict] = None, stream: bool = False
+) -> requests.Response:
+    # Latency to the full body, or to the headers for streamed responses (their bytes are counted by the reader).
+    with timer("http.fetch"):
+        if method == "POST":
+            r = session.post(url, data=data, timeout=30, stream=stream)
+        else:
+            r = session.get(url, timeout=30, stream=stream)
+        r.raise_for_status()
+    count("http.requests")
+    if not stream:
+        count("http.bytes", len(r.content))
     return r
 
-def discover_pages(session: requests.Session, page_size: str = "all", sleep: float = 1.0) -> list[BeautifulSoup]:
-    soups: list[BeautifulSoup] = []
+def clone_session(session: requests.Session) -> requests.Session:
+    # Same headers, cookies (ASP.NET session) and mounted adapters, but its own cookie jar, so
+    # concurrent postbacks never write to a shared jar.
+    import requests
+
+    clone = requests.Session()
+    clone.headers.update(session.headers)
+    clone.cookies = session.cookies.copy()
+    for prefix, adapter in session.adapters.items():
+        clone.mount(prefix, adapter)
+    return clone
+
+def parse_page(text: str, parser: str = "lxml", batch: Optional[RowBatch] = None) -> tuple[RowBatch, dict[str, Any]]:
+    # Rows of one grid page (appended to `batch` if given) plus what the crawl needs from it
+    # (form state, pager links, total).
+    from src.ingestion.row_batch import RowBatch
+    from src.ingestion.stream_parser import GridStreamParser, feed_grid
+
+    with timer("parse") as t:
+        rows = batch if batch is not None else RowBatch()
+        start = len(rows)
+        if parser == "stream":
+            grid = feed_grid([text], GridStreamParser(batch=rows))
+            meta = {"form_state": grid.form_state, "postbacks": grid.postbacks, "total_records": grid.total_records}
+        else:
+            backend = get_parser_backend(parser)
+            doc = backend.load_document(text)
+            backend.parse_results_batch(doc, rows)
+            meta = {
+                "form_state": backend.extract_form_state(doc),
+                "postbacks": backend.find_pagination_postbacks(doc),
+                "total_records": backend.parse_total_records(doc),
+            }
+        t["items"] = len(rows) - start
+    return rows, meta
+
+def _iter_page_rows(
+    resp: requests.Response, parser: str, archive: Optional[RawArchive] = None, meta: Optional[dict] = None
+) -> Iterator[RowBatch]:
+    # parse_page on a response, as row chunks: the stream backend parses while it downloads and
+    # hands over every CHUNK_ROWS rows; the DOM backends need the whole body and yield one batch.
+    # `meta` receives form state, pager links and total once the page is done. With an archive,
+    # the body is stored there as it arrives (never buffered whole) and its hash put in raw_sha256.
+    from src.ingestion.row_batch import CHUNK_ROWS, RowBatch
+    from src.ingestion.stream_parser import GridStreamParser
+
+    meta = meta if meta is not None else {}
+    if parser != "stream":
+        sha = archive.put([resp.content]) if archive else None
+        rows, page_meta = parse_page(resp.text, parser)
+        meta.update(page_meta, raw_sha256=sha)
+        yield rows
+        return
 
-    resp = fetch(session, BASE_URL)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    grid = GridStreamParser(batch=RowBatch())
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    obj = archive.open_object() if archive else None
+    seconds, items = 0.0, 0
+    try:
+        with resp:
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                count("http.bytes", len(chunk))
+                t0 = time.perf_counter()
+                if obj:
+                    obj.write(chunk)
+                grid.feed(decoder.decode(chunk))
+                seconds += time.perf_counter() - t0
+                if len(grid.batch) >= CHUNK_ROWS:
+                    rows, grid.batch = grid.batch, RowBatch()
+                    items += len(rows)
+                    yield rows
+            t0 = time.perf_counter()
+            grid.feed(decoder.decode(b"", final=True))
+            grid.close()
+            sha = obj.commit() if obj else None
+            seconds += time.perf_counter() - t0
+        meta.update(form_state=grid.form_state, postbacks=grid.postbacks, total_records=grid.total_records, raw_sha256=sha)
+        if len(grid.batch):
+            items += len(grid.batch)
+            yield grid.batch
+    finally:
+        if obj:
+            obj.discard()
+        # Parsing and archiving only; the download and whatever the caller does between chunks are not in it.
+        METRICS.observe("parse", seconds, items)
+
+def _page_file(journal: Optional[RunJournal], label: str) -> Optional[Path]:
+    # The page's saved rows, if they are journaled and still intact.
+    entry = journal.get("page", label) if journal else None
+    if entry is None or not entry.get("path", "").endswith(PAGE_SUFFIX) or not journal.done("page", label, entry["path"]):
+        return None
+    return Path(entry["path"])
+
+def _read_page(path: Path) -> Iterator[RowBatch]:
+    import pyarrow as pa
+
+    from src.ingestion.row_batch import RowBatch
+
+    with pa.ipc.open_stream(str(path)) as reader:
+        for batch in reader:
+            yield RowBatch.from_arrow(pa.Table.from_batches([batch]))
+
+def iter_crawl(
+    session: requests.Session,
+    page_size: str = "all",
+    sleep: float = 1.0,
+    parser: str = "lxml",
+    workers: int = 1,
+    state: Optional[dict] = None,
+    journal: Optional[RunJournal] = None,
+    strict: bool = True,
+    archive: Optional[RawArchive] = None,
+) -> Iterator[RowBatch]:
+    # Page-at-a-time crawl, yielding rows in page order as they arrive (a chunk at a time while the
+    # stream backend downloads a page): the first page's __VIEWSTATE/__EVENTVALIDATION is captured
+    # once and the numeric-page postbacks are replayed by `workers` cloned sessions, at most
+    # `workers` pages ahead of the consumer. One token bucket caps them all at `workers` requests
+    # per `sleep` seconds, i.e. each session keeps the sequential pace. With a journal, every page's
+    # rows are saved (pages/<label>.arrow, an Arrow IPC stream written chunk by chunk) and pages
+    # already saved by an earlier attempt are not fetched again. Once the last page is through,
+    # raises PageCrawlError (just warns unless `strict`) if two pages came back identical or the
+    # rows don't add up to the site's "Total Records"; a consumer then discards what it took. With
+    # an archive, each response body is stored there too and its hash journaled with the page
+    # (raw_sha256). `state` receives pages, labels, total_records and fetched.
+    import pyarrow as pa
+
+    from src.ingestion.row_batch import RAW_SCHEMA, RowBatch
+
+    state = state if state is not None else {}
+    stream = parser == "stream"
+    pages_dir = ensure_dir(journal.path.parent / PAGES_DIR) if journal else None
+
+    def get(s: requests.Session, label: str, page_meta: dict, **kwargs) -> Iterator[RowBatch]:
+        chunks = _iter_page_rows(fetch(s, BASE_URL, stream=stream, **kwargs), parser, archive, page_meta)
+        if journal:
+            path, n = pages_dir / f"{label}{PAGE_SUFFIX}", 0
+            with atomic_open(path) as f, pa.ipc.new_stream(f, RAW_SCHEMA) as writer:
+                for rows in chunks:
+                    writer.write_table(rows.to_arrow())
+                    n += len(rows)
+                    yield rows
+            info = {"raw_sha256": page_meta["raw_sha256"]} if archive else {}
+            if label == "all":
+                info["postbacks"] = page_meta["postbacks"]
+            journal.record("page", label, path=path, rows=n, **info)
+        else:
+            yield from chunks
+        state["fetched"] += 1
+
+    problems: list[str] = []
+    seen: dict[str, str] = {}
+    total = 0
+
+    def checked(label: str, chunks: Iterable[RowBatch]) -> Iterator[RowBatch]:
+        # Passes the page through, digesting its rows to spot a page the site served twice.
+        nonlocal total
+        h = hashlib.sha256()
+        for rows in chunks:
+            for row in zip(*rows.to_pydict().values()):
+                h.update(repr(row).encode())
+            total += len(rows)
+            yield rows
+        key = h.hexdigest()
+        if key in seen:
+            problems.append(f"page {label} came back identical to page {seen[key]}")
+        seen.setdefault(key, label)
+
+    state["fetched"] = 0
+    meta: dict[str, Any] = {}
+    # One page at most; held back in case "All" replaces it.
+    lead: tuple[str, Iterable[RowBatch]] = ("1", list(get(session, "1", meta)))
+    state["pages"] = 1
+    all_meta: Optional[dict] = None
 
-    tried_all = False
     if page_size.lower() == "all":
-        postbacks = find_pagination_postbacks(soup)
-        all_pb = next((pb for pb in postbacks if pb.get("text", "").lower() == "all"), None)
+        all_pb = next((pb for pb in meta["postbacks"] if pb.get("text", "").lower() == "all"), None)
+        saved = _page_file(journal, "all") if all_pb else None
+        if saved is not None:
+            lead = ("all", _read_page(saved))
+            meta = {**meta, "postbacks": journal.get("page", "all")["postbacks"]}
+        elif all_pb:
+            payload = {"__EVENTTARGET": all_pb["target"], "__EVENTARGUMENT": all_pb.get("argument", ""), **meta["form_state"]}
+            all_meta = {}
+            lead = ("all", get(session, "all", all_meta, method="POST", data=payload))
         if all_pb:
-            tried_all = True
-            form_state = extract_form_state(soup)
-            payload = {
-                "__EVENTTARGET": all_pb["target"],
-                "__EVENTARGUMENT": all_pb.get("argument", ""),
-                **form_state,
-            }
-            resp = fetch(session, BASE_URL, method="POST", data=payload)
-            soup = BeautifulSoup(resp.text, "html.parser")
-            # After attempting All, keep going below. We will still fall back to paging if needed.
-
-    soups.append(soup)
-
-    # Fallback: if All wasn't available or didn't increase rows, iterate numeric pages
-    postbacks = find_pagination_postbacks(soup)
-    page_pbs = [pb for pb in postbacks if pb.get("text", "").isdigit()]
-
-    # If there are no numeric pages, we're done (either All worked or only one page exists)
-    if not page_pbs:
-        return soups
-
-    # keep first postback for each page label (avoids top+bottom duplicates)
-    uniq_by_label = {}
-    for pb in page_pbs:
-        label = pb.get("text")
-        if label not in uniq_by_label:
-            uniq_by_label[label] = pb
+            state["pages"] += 1
+    yield from checked(*lead)
+    if all_meta is not None:
+        # The "All" page has no total of its own; keep the first page's.
+        meta = {**all_meta, "total_records": meta["total_records"] or all_meta["total_records"]}
+    state["total_records"] = meta["total_records"]
+
+    uniq_by_label: dict[str, dict] = {}
+    for pb in meta["postbacks"]:
+        if pb.get("text", "").isdigit() and pb["text"] != "1":
+            uniq_by_label.setdefault(pb["text"], pb)
+    labels = sorted(uniq_by_label, key=int)
+    state["labels"] = [lead[0], *labels]
+    if not labels:
+        return
 
-    for label, pb in sorted(uniq_by_label.items(), key=lambda kv: int(kv[0])):
-        if label == "1":
-            continue
-        form_state = extract_form_state(soup)
+    form_state = meta["form_state"]
+    sessions: queue.Queue[requests.Session] = queue.Queue()
+    for _ in range(max(1, workers)):
+        sessions.put(clone_session(session))
+    bucket = TokenBucket(rate=max(1, workers) / sleep if sleep > 0 else 0)
+
+    def page(s: requests.Session, label: str) -> Iterator[RowBatch]:
+        saved = _page_file(journal, label)
+        if saved is not None:
+            yield from _read_page(saved)
+            return
+        pb = uniq_by_label[label]
+        bucket.acquire()
         payload = {"__EVENTTARGET": pb["target"], "__EVENTARGUMENT": pb.get("argument", ""), **form_state}
-        polite_sleep(sleep)
-        r = fetch(session, BASE_URL, method="POST", data=payload)
-        soups.append(BeautifulSoup(r.text, "html.parser"))
-
-    return soups
-
-
-def normalize_rows(rows: list[dict]) -> pd.DataFrame:
-    if not rows:
-        return pd.DataFrame()
-    df = pd.DataFrame(rows).drop_duplicates(subset=["property_id", "address", "posted"], keep="first")
-
-    def to_float(x: Optional[str]) -> Optional[float]:
-        if x is None:
-            return None
-        x = str(x).replace(",", "").strip()
-        try:
-            return float(x)
-        except Exception:
-            return None
-
-    def clean_price(x: Optional[str]) -> Optional[float]:
-        if not x:
-            return None
-        digits = "".join(ch for ch in str(x) if ch.isdigit() or ch == ".")
-        return float(digits) if digits else None
-
-    df["acres_val"] = df["acres"].apply(to_float)
-    df["sqft_val"] = df["sqft"].apply(to_float)
-    df["price"] = df["price_raw"].apply(clean_price)
-
-    def parse_date(s: Optional[str]) -> Optional[str]:
-        if not s:
-            return None
-        try:
-            return pd.to_datetime(s, errors="coerce").date().isoformat()
-        except Exception:
-            return None
-
-    df["posted_date"] = df["posted"].apply(parse_date)
-
-    def abs_url(u: Optional[str], base: str) -> Optional[str]:
-        if not u:
-            return None
-        if u.startswith("http"):
-            return u
-        if u.startswith("/"):
-            return f"https://apps.infrastructureontario.ca{u}"
-        if "?" in u:
-            return f"https://apps.infrastructureontario.ca/propertiesforsale/{u}"
-        return f"{base}?{u}"
-
-    df["details_abs"] = df["details_url"].apply(lambda u: abs_url(u, DETAILS_BASE))
-    df["image_abs"] = df["image_url"].apply(lambda u: abs_url(u, IMAGE_BASE))
-
-    df["ingested_at"] = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-
-    cols = [
-        "property_id", "address", "city", "region",
-        "acres", "acres_val", "sqft", "sqft_val",
-        "price_raw", "price", "status", "mls_text", "mls_url",
-        "posted", "posted_date", "details_abs", "image_abs", "ingested_at"
-    ]
-    return df[cols]
-
-def download_image_pdfs(session: requests.Session, df: pd.DataFrame, out_dir: str, sleep: float = 1.0, limit: Optional[int] = None) -> None:
-    if df.empty:
-        return
-    out = ensure_dir(out_dir)
+        yield from get(s, label, {}, method="POST", data=payload)
+
+    if workers <= 1:
+        s = sessions.get()
+        for label in labels:
+            yield from checked(label, page(s, label))
+    else:
+        def whole_page(label: str) -> RowBatch:
+            s = sessions.get()
+            try:
+                rows = RowBatch()
+                for chunk in page(s, label):
+                    rows.extend(chunk)
+                return rows
+            finally:
+                sessions.put(s)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ahead = deque(pool.submit(whole_page, label) for label in labels[:workers])
+            for i, label in enumerate(labels):
+                rows = ahead.popleft().result()
+                if i + workers < len(labels):
+                    ahead.append(pool.submit(whole_page, labels[i + workers]))
+                yield from checked(label, [rows])
+    state["pages"] += len(labels)
+
+    if meta["total_records"] is not None and total != meta["total_records"]:
+        problems.append(f"the crawl returned {total} rows; the site reports {meta['total_records']}")
+    if problems and strict:
+        raise PageCrawlError("; ".join(problems))
+    for problem in problems:
+        print(f"Warning: {problem}")
+
+@_with_retries
+def fetch_map(
+    session: requests.Session, url: str, store: MapStore, property_id: str, known: Optional[dict] = None,
+    chunk_size: int = 64 * 1024,
+) -> tuple[str, int]:
+    # Conditional refresh of a stored map: sent with the ETag/Last-Modified it was fetched with,
+    # a 304 means unchanged; without validators, a Content-Length equal to the stored size does
+    # (the body is then never read). Returns the outcome and the bytes downloaded.
+    headers = {}
+    if known and known["url"] in (None, url):
+        if known["etag"]:
+            headers["If-None-Match"] = known["etag"]
+        if known["last_modified"]:
+            headers["If-Modified-Since"] = known["last_modified"]
+    with timer("http.download") as t, session.get(url, timeout=30, stream=True, headers=headers) as r:
+        count("http.requests")
+        same_size = known is not None and not headers and r.headers.get("Content-Length") == str(known["size"])
+        if known and (r.status_code == 304 or (r.ok and same_size)):
+            store.checked(property_id)
+            return "unchanged", 0
+        r.raise_for_status()
+        row = store.put(property_id, r.iter_content(chunk_size=chunk_size), url, r.headers)
+        t["items"] = row["size"]
+    count("http.bytes", row["size"])
+    if known and row["sha256"] == known["sha256"]:
+        return "unchanged", row["size"]
+    return ("downloaded" if row["new_blob"] else "deduped"), row["size"]
+
+def download_image_pdfs(
+    session: requests.Session,
+    table: pa.Table,
+    store: MapStore,
+    sleep: float = 1.0,
+    limit: Optional[int] = None,
+    workers: int = 4,
+    refresh_days: float = 7.0,
+) -> dict:
+    # Maps checked within `refresh_days` are skipped without a request; older ones are refreshed
+    # conditionally (fetch_map). "deduped" maps were new to their property but already stored
+    # for another one. `table` needs property_id and image_abs.
+    stats = {"downloaded": 0, "deduped": 0, "unchanged": 0, "existing": 0, "failed": 0, "bytes": 0}
+    if not table.num_rows:
+        return stats
+
+    jobs: list[tuple[str, str, Optional[dict]]] = []
     n = 0
-    for _, row in df.iterrows():
+    fresh_after = time.time() - refresh_days * 86400
+    for pid, url in zip(table["property_id"].to_pylist(), table["image_abs"].to_pylist()):
         if limit is not None and n >= limit:
             break
-        url = row.get("image_abs")
-        pid = row.get("property_id")
         if not url or not pid:
             continue
-        dest = out / f"{pid}.pdf"
-        if dest.exists():
-            n += 1
-            print(f"Exists {n}: {dest}")
+        pid = str(pid)
+        n += 1
+        known = store.get(pid) or store.adopt(pid)
+        if known and known["checked_at"] >= fresh_after:
+            stats["existing"] += 1
+            print(f"Exists {n}: {store.view_path(pid)}")
             continue
-        try:
-            r = fetch(session, url)
-            with open(dest, "wb") as f:
-                f.write(r.content)
-            n += 1
-            print(f"Downloaded {n}: {dest}")
-        except Exception:
-            print(f"Failed image for {pid}")
-        polite_sleep(sleep)
-
-def main():
-    ap = argparse.ArgumentParser(description="Scrape IO Properties grid -> CSV/Parquet snapshot")
+        jobs.append((pid, url, known))
+
+    # Shared across workers: `sleep` seconds between requests to the same host on average.
+    limiter = HostRateLimiter(rate=1.0 / sleep if sleep > 0 else 0)
+
+    def download(pid: str, url: str, known: Optional[dict]) -> tuple[str, int, float]:
+        limiter.acquire(url)
+        t0 = time.perf_counter()
+        outcome, nbytes = fetch_map(session, url, store, pid, known)
+        return outcome, nbytes, time.perf_counter() - t0
+
+    latencies: list[float] = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(download, pid, url, known): pid for pid, url, known in jobs}
+        for fut in as_completed(futures):
+            pid = futures[fut]
+            try:
+                outcome, nbytes, latency = fut.result()
+            except Exception:
+                stats["failed"] += 1
+                print(f"Failed image for {pid}")
+                continue
+            stats[outcome] += 1
+            stats["bytes"] += nbytes
+            latencies.append(latency)
+            print(f"{outcome.capitalize()}: {store.view_path(pid)}")
+    elapsed = time.perf_counter() - started
+
+    fetched = stats["downloaded"] + stats["deduped"]
+    stats["seconds"] = round(elapsed, 3)
+    stats["files_per_s"] = round(fetched / elapsed, 3) if elapsed > 0 else None
+    stats["mb_per_s"] = round(stats["bytes"] / 1e6 / elapsed, 3) if elapsed > 0 else None
+    stats["p50_ms"] = round(percentile(latencies, 50) * 1000, 1) if latencies else None
+    stats["p95_ms"] = round(percentile(latencies, 95) * 1000, 1) if latencies else None
+    stats["store"] = store.stats()
+    if jobs:
+        print(
+            f"Images: {stats['downloaded']} downloaded, {stats['deduped']} deduped, {stats['unchanged']} unchanged, "
+            f"{stats['failed']} failed, {stats['existing']} existing in {elapsed:.1f}s ({stats['files_per_s']} files/s, "
+            f"{stats['mb_per_s']} MB/s, p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms); store holds "
+            f"{stats['store']['maps']} maps in {stats['store']['blobs']} blobs "
+            f"({stats['store']['stored_bytes'] / 1e6:.1f} of {stats['store']['logical_bytes'] / 1e6:.1f} MB)"
+        )
+    return stats
+
+def _journaled_pages(journal: RunJournal) -> Optional[list[Path]]:
+    # Saved pages of a finished crawl, if all of them are still intact.
+    crawl = journal.get("crawl")
+    if crawl is None:
+        return None
+    paths = [_page_file(journal, label) for label in crawl["pages"]]
+    return None if None in paths else paths
+
+def _finish_run(
+    out_dir: Path, journal: RunJournal, info: dict[str, Any], status: str, textfile: Optional[str]
+) -> dict[str, Any]:
+    crawl = journal.get("crawl") or {}
+    report = METRICS.report(
+        status=status, **info, total_records=crawl.get("total_records"), pages=len(crawl.get("pages", [])),
+        fetched=crawl.get("fetched"),
+    )
+    stages = ", ".join(f"{name} {s['seconds']:.2f}s" for name, s in report["stages"].items()) or "nothing to do"
+    print(f"Run {status} in {report['seconds']:.1f}s (peak RSS {report['peak_rss_mb']} MB): {stages}")
+    earlier = out_dir / REPORT_NAME
+    if not report["stages"] and earlier.exists():
+        # A resume of a finished run: that run's report (stage timings, rows) stays, noting the resume.
+        report = {**json.loads(earlier.read_text(encoding="utf-8")), "noop_resume_at": report["finished_at"]}
+    path = write_report(report, out_dir)
+    if textfile:
+        write_prometheus(report, textfile)
+    print(f"Run report -> {path}")
+    return report
+
+def arg_parser(**kwargs: Any) -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Scrape IO Properties grid -> CSV/Parquet snapshot", **kwargs)
     ap.add_argument("--out", required=True, help="Output folder for daily snapshots")
+    ap.add_argument("--lake-dir", default="data/lake/io_listings", help="Hive-partitioned Parquet lake (snapshot_date=)")
+    ap.add_argument("--cdc-dir", default="data/lake/io_changes", help="Change log (I/U/D deltas) + hash index")
+    ap.add_argument(
+        "--archive-dir",
+        default="data/raw/io_archive",
+        help="Keep every raw grid response here (zstd, content-addressed) for backfills; '' to disable",
+    )
     ap.add_argument("--download-images", action="store_true", help="Download per-property PDF maps")
-    ap.add_argument("--images-dir", default="data/raw/images", help="Where to save images if downloading")
+    ap.add_argument("--images-dir", default="data/raw/images", help="Where <property_id>.pdf links to each map appear")
+    ap.add_argument("--maps-dir", default="data/raw/io_maps", help="Content-addressed map store and its SQLite index")
+    ap.add_argument(
+        "--image-refresh-days", type=float, default=7.0, help="Re-check stored maps (conditionally) after this many days"
+    )
     ap.add_argument("--image-limit", type=int, default=10, help="Max images to fetch this run (safety)")
+    ap.add_argument("--image-workers", type=int, default=4, help="Concurrent image downloads (rate limit still applies)")
     ap.add_argument("--page-size", choices=["50", "100", "150", "all"], default="all")
     ap.add_argument("--sleep", type=float, default=1.0, help="Seconds between requests")
-    args = ap.parse_args()
-
+    ap.add_argument(
+        "--page-workers",
+        type=int,
+        default=1,
+        help="Fetch numeric pages concurrently with this many cloned sessions (when 'All' is not offered)",
+    )
+    ap.add_argument(
+        "--parser",
+        choices=sorted([*PARSER_BACKENDS, "stream"]),
+        default="lxml",
+        help="HTML parsing backend; 'stream' parses rows incrementally without building a document",
+    )
+    ap.add_argument("--cache-dir", default=None, help="On-disk HTTP response cache (conditional GETs, replayable)")
+    ap.add_argument("--cache-ttl", type=float, default=0, help="Seconds a cached response is served without revalidating")
+    ap.add_argument("--cache-max-mb", type=int, default=2048, help="Evict least recently used entries beyond this size")
+    ap.add_argument("--offline", action="store_true", help="Replay the whole scrape from --cache-dir; no network")
+    ap.add_argument(
+        "--metrics-textfile",
+        default=None,
+        help="Also write the run's metrics here in Prometheus text format (node_exporter textfile collector)",
+    )
+    ap.add_argument(
+        "--skip-validation",
+        action="store_true",
+        help="Write the snapshot even if the data-quality checks fail (they still run and are reported)",
+    )
+    ap.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue today's run from its journal: skip pages and stages that already completed",
+    )
+    return ap
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    # One scrape with parsed arg_parser() arguments; returns the run report.
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    from src.common.http_cache import install_cache
+    from src.ingestion.cdc import apply_snapshot
+    from src.ingestion.lake import PART_NAME, partition_dir, read_manifest, write_csv, write_partition
+    from src.ingestion.normalize import finish_chunks, normalize_chunk
+    from src.ingestion.raw_archive import RawArchive
+    from src.ingestion.validate import VALIDATION_NAME, describe, validate
+
+    METRICS.reset()
     session = requests.Session()
     session.headers.update({"User-Agent": DEF_USER_AGENT})
-
-    soups = discover_pages(session, page_size=args.page_size, sleep=args.sleep)
-
-    all_rows: list[dict] = []
-    for soup in soups:
-        rows = parse_results_table(soup)
-        all_rows.extend(rows)
-
-    # for i, sp in enumerate(soups, start=1):
-    #     rows = parse_results_table(sp)
-    #     # print(f"Page {i}: parsed {len(rows)} rows")
-    #     all_rows.extend(rows)
-
-    df = normalize_rows(all_rows)
-    if df.empty:
-        print("No rows parsed; check selectors or site changes.")
-        return
-    
-    def parse_total_records(soup: BeautifulSoup) -> int | None:
-        text = soup.get_text(" ", strip=True)
-        m = re.search(r"Total Records:\s*(\d+)", text)
-        return int(m.group(1)) if m else None
-
-    # after collecting all soups and building df:
-    total_records = parse_total_records(soups[0])
-    unique_props = df["property_id"].nunique()
-    # print(f"Site total_records={total_records}, unique_property_ids={unique_props}")
+    pool_maxsize = max(10, args.image_workers)
+    if args.cache_dir:
+        install_cache(
+            session,
+            args.cache_dir,
+            ttl=args.cache_ttl,
+            offline=args.offline,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            pool_maxsize=pool_maxsize,
+        )
+    else:
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    if args.offline:
+        args.sleep = 0
 
     day = today_str()
     out_dir = ensure_dir(os.path.join(args.out, day))
+    # Without --resume the journal starts empty, so every stage runs (and overwrites) as before.
+    journal = RunJournal(out_dir, resume=args.resume)
+    archive = RawArchive(args.archive_dir) if args.archive_dir else None
     csv_path = out_dir / "io_listings.csv"
-    pq_path = out_dir / "io_listings.parquet"
-    df.to_csv(csv_path, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    df.to_parquet(pq_path, index=False)
-    print(f"Wrote {len(df)} cleaned rows -> {csv_path} and {pq_path}")
-
-    if args.download_images:
-        download_image_pdfs(session, df, args.images_dir, sleep=args.sleep, limit=args.image_limit)
+    lake_path = partition_dir(args.lake_dir, day) / PART_NAME
+
+    info: dict[str, Any] = {
+        "snapshot_date": day, "parser": args.parser, "page_workers": args.page_workers, "resumed": args.resume,
+    }
+    wrote_snapshot = False
+    if journal.done("csv", path=csv_path) and journal.done("lake", path=lake_path):
+        table = pq.read_table(lake_path)
+        print(f"Resume: snapshot already written ({table.num_rows} rows) -> {csv_path} and {lake_path}")
+    else:
+        # Each chunk is normalized as it arrives, so only the cleaned columns pile up; one stamp for all of them.
+        ingested_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        saved = _journaled_pages(journal)
+        if saved is not None:
+            pieces = [normalize_chunk(rows, ingested_at) for path in saved for rows in _read_page(path)]
+            print(f"Resume: reusing {sum(p.num_rows for p in pieces)} crawled rows from {journal.path}")
+        else:
+            crawl_state: dict = {}
+            with timer("crawl") as t:
+                try:
+                    pieces = [
+                        normalize_chunk(rows, ingested_at) for rows in iter_crawl(
+                            session, page_size=args.page_size, sleep=args.sleep, parser=args.parser,
+                            workers=args.page_workers, state=crawl_state, journal=journal,
+                            strict=args.page_workers > 1, archive=archive,
+                        )
+                    ]
+                except PageCrawlError as e:
+                    print(f"Parallel page crawl rejected ({e}); falling back to one page at a time.")
+                    journal.forget("page")
+                    pieces = [
+                        normalize_chunk(rows, ingested_at) for rows in iter_crawl(
+                            session, page_size=args.page_size, sleep=args.sleep, parser=args.parser,
+                            workers=1, state=crawl_state, journal=journal, strict=False, archive=archive,
+                        )
+                    ]
+                t["items"] = sum(p.num_rows for p in pieces)
+            journal.record(
+                "crawl", pages=crawl_state["labels"], rows=t["items"],
+                total_records=crawl_state.get("total_records"), fetched=crawl_state["fetched"],
+            )
+
+        table = finish_chunks(pieces)
+        del pieces
+        info["unique_props"] = pc.count_distinct(table["property_id"]).as_py()
+        if not table.num_rows:
+            print("No rows parsed; check selectors or site changes.")
+            return _finish_run(out_dir, journal, info, "empty", args.metrics_textfile)
+        if archive:
+            crawl = journal.get("crawl")
+            pages = [{"label": l, "sha256": journal.get("page", l).get("raw_sha256")} for l in crawl["pages"]]
+            if all(p["sha256"] for p in pages):
+                archive.write_day(
+                    day, pages, parser=args.parser, total_records=crawl["total_records"],
+                    ingested_at=pc.strftime(table["ingested_at"][0], format="%Y-%m-%dT%H:%M:%SZ").as_py(),
+                )
+
+        earlier = [p for p in read_manifest(args.lake_dir)["partitions"] if p["snapshot_date"] < day]
+        check = validate(table, journal.get("crawl")["total_records"], earlier[-1]["rows"] if earlier else None)
+        with atomic_open(out_dir / VALIDATION_NAME, "w") as f:
+            json.dump(check, f, indent=2)
+        info["validation"] = {k: check[k] for k in ("status", "errors", "warnings")}
+        print(describe(check))
+        if check["status"] == "error" and not args.skip_validation:
+            dest = ensure_dir(out_dir / "quarantine") / PART_NAME
+            with atomic_open(dest) as f:
+                pq.write_table(table, f, compression="zstd")
+            print(f"Snapshot quarantined -> {dest}; lake, CSV and CDC left as they were (--skip-validation to write it)")
+            return _finish_run(out_dir, journal, info, "quarantined", args.metrics_textfile)
+
+        with timer("write.csv") as t:
+            write_csv(table, csv_path)
+            t["items"] = table.num_rows
+        journal.record("csv", path=csv_path, rows=table.num_rows)
+        with timer("write.lake") as t:
+            part = write_partition(table, args.lake_dir, day)
+            t["items"] = part["rows"]
+        journal.record("lake", path=lake_path, rows=part["rows"])
+        wrote_snapshot = True
+        print(f"Wrote {table.num_rows} cleaned rows -> {csv_path} and {lake_path}")
+
+    cdc_path = partition_dir(args.cdc_dir, day) / PART_NAME
+    if not wrote_snapshot and journal.done("cdc", path=cdc_path):
+        print(f"Resume: CDC already applied -> {cdc_path}")
+    else:
+        with timer("cdc") as t:
+            cdc = apply_snapshot(table, args.cdc_dir, day)
+            t["items"] = table.num_rows
+        journal.record("cdc", path=cdc_path, **{k: cdc[k] for k in ("inserted", "updated", "deleted", "unchanged")})
+        print(
+            f"CDC vs {cdc['previous'] or 'empty'}: {cdc['inserted']} inserted, {cdc['updated']} updated, "
+            f"{cdc['deleted']} deleted, {cdc['unchanged']} unchanged -> {os.path.join(args.cdc_dir, cdc['path'])}"
+        )
+    # A resume now starts from the lake partition, so the pages' copies of its rows can go (their
+    # journal entries, raw_sha256 included, stay).
+    shutil.rmtree(out_dir / PAGES_DIR, ignore_errors=True)
+
+    if args.download_images and journal.done("images"):
+        print("Resume: images already downloaded")
+    elif args.download_images:
+        with timer("images") as t:
+            stats = download_image_pdfs(
+                session, table, MapStore(args.maps_dir, args.images_dir), sleep=args.sleep, limit=args.image_limit,
+                workers=args.image_workers, refresh_days=args.image_refresh_days,
+            )
+            t["items"] = stats["downloaded"]
+        info["images"] = {k: stats[k] for k in ("downloaded", "deduped", "unchanged", "existing", "failed", "bytes")}
+        # Failed files are retried by the next --resume; the ones on disk are skipped anyway.
+        if not stats["failed"]:
+            journal.record("images", **{k: stats[k] for k in ("downloaded", "deduped", "unchanged", "existing", "bytes")})
         print("Image download step completed (best-effort).")
 
+    info["rows"] = table.num_rows
+    return _finish_run(out_dir, journal, info, "ok", args.metrics_textfile)
+
+def main():
+    ap = arg_parser()
+    args = ap.parse_args()
+    if args.offline and not args.cache_dir:
+        ap.error("--offline requires --cache-dir")
+    if run(args)["status"] == "quarantined":
+        raise SystemExit(2)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from src.common.io_utils import atomic_open, ensure_dir
+
+# Hive-partitioned snapshot lake: <lake>/snapshot_date=YYYY-MM-DD/part-0.parquet, plus
+# <lake>/_manifest.json listing every partition with its row count.
+
+LISTINGS_SCHEMA = pa.schema([
+    ("property_id", pa.int64()),
+    ("address", pa.string()),
+    ("city", pa.string()),
+    ("region", pa.string()),
+    ("acres", pa.string()),
+    ("acres_val", pa.float64()),
+    ("sqft", pa.string()),
+    ("sqft_val", pa.float64()),
+    ("price_raw", pa.string()),
+    ("price", pa.float64()),
+    ("status", pa.string()),
+    ("mls_text", pa.string()),
+    ("mls_url", pa.string()),
+    ("posted", pa.string()),
+    ("posted_date", pa.date32()),
+    ("details_abs", pa.string()),
+    ("image_abs", pa.string()),
+    ("ingested_at", pa.timestamp("s", tz="UTC")),
+])
+MANIFEST_NAME = "_manifest.json"
+PART_NAME = "part-0.parquet"
+ROW_GROUP_SIZE = 64 * 1024
+
+def to_arrow(df: pd.DataFrame, schema: pa.Schema = LISTINGS_SCHEMA) -> pa.Table:
+    typed = pd.DataFrame(index=df.index)
+    for field in schema:
+        col = df[field.name] if field.name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if pa.types.is_integer(field.type):
+            typed[field.name] = pd.to_numeric(col, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            typed[field.name] = pd.to_numeric(col, errors="coerce").astype("float64")
+        elif pa.types.is_date(field.type):
+            typed[field.name] = pd.to_datetime(col, format="%Y-%m-%d", errors="coerce").dt.date
+        elif pa.types.is_timestamp(field.type):
+            typed[field.name] = pd.to_datetime(col, errors="coerce", utc=True)
+        else:
+            typed[field.name] = col.astype(object).where(col.notna(), None)
+    table = pa.Table.from_pandas(typed, schema=schema, preserve_index=False).replace_schema_metadata(None)
+    # Sorted keys give tight per-row-group min/max stats for property_id lookups.
+    return table.sort_by("property_id")
+
+def write_csv(table: pa.Table, path: str | Path) -> None:
+    # The daily CSV straight from a LISTINGS_SCHEMA table; ingested_at keeps its ISO "...Z" form.
+    stamps = pc.strftime(table["ingested_at"], format="%Y-%m-%dT%H:%M:%SZ")
+    table = table.set_column(table.schema.get_field_index("ingested_at"), "ingested_at", stamps)
+    with atomic_open(path) as f:
+        pa_csv.write_csv(table, f, pa_csv.WriteOptions(quoting_style="needed"))
+
+def partition_dir(lake_dir: str | Path, snapshot_date: str) -> Path:
+    return Path(lake_dir) / f"snapshot_date={snapshot_date}"
+
+def read_manifest(lake_dir: str | Path) -> dict[str, Any]:
+    path = Path(lake_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"partitions": []}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def write_manifest(lake_dir: str | Path, manifest: dict[str, Any]) -> None:
+    with atomic_open(Path(lake_dir) / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def write_partition_file(table: pa.Table, lake_dir: str | Path, snapshot_date: str) -> dict[str, Any]:
+    # Just the partition file and its manifest entry; safe to call from parallel processes.
+    part_dir = ensure_dir(partition_dir(lake_dir, snapshot_date))
+    dest = part_dir / PART_NAME
+    with atomic_open(dest) as f:
+        pq.write_table(
+            table,
+            f,
+            compression="zstd",
+            write_statistics=True,
+            row_group_size=ROW_GROUP_SIZE,
+        )
+    return {
+        "snapshot_date": snapshot_date,
+        "path": str(dest.relative_to(lake_dir)),
+        "rows": table.num_rows,
+        "bytes": dest.stat().st_size,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def register_partitions(lake_dir: str | Path, entries: list[dict[str, Any]]) -> None:
+    manifest = read_manifest(lake_dir)
+    days = {e["snapshot_date"] for e in entries}
+    partitions = [p for p in manifest["partitions"] if p["snapshot_date"] not in days] + entries
+    manifest["partitions"] = sorted(partitions, key=lambda p: p["snapshot_date"])
+    manifest["total_rows"] = sum(p["rows"] for p in manifest["partitions"])
+    manifest["updated_at"] = max(e["written_at"] for e in entries)
+    write_manifest(lake_dir, manifest)
+
+def write_partition(table: pa.Table, lake_dir: str | Path, snapshot_date: str) -> dict[str, Any]:
+    entry = write_partition_file(table, lake_dir, snapshot_date)
+    register_partitions(lake_dir, [entry])
+    return entry
@@ -0,0 +1,122 @@
+from __future__ import annotations
+import re
+from typing import Any, Iterator, Optional
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from src.ingestion.row_batch import RAW_FIELDS, RowBatch
+
+# Same contract as html_parsers, on an lxml tree. Text is joined from stripped text nodes
+# (script/style excluded) so every value matches BeautifulSoup's get_text(strip=True).
+_TEXT_NODES = etree.XPath("descendant-or-self::text()[not(parent::script or parent::style)]", smart_strings=False)
+_POSTBACK_RE = re.compile(r"__doPostBack\('([^']+)'\s*,\s*'([^']*)'\)")
+_GRID_ID_RE = re.compile(r"gvPropertyList", re.I)
+_TOTAL_RE = re.compile(r"Total Records:\s*(\d+)")
+_ID_RE = re.compile(r"\d+")
+_TOTAL_LABEL = etree.XPath("//text()[contains(., 'Total Records')]")
+
+def load_document(text: str | bytes) -> lxml_html.HtmlElement:
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    return lxml_html.document_fromstring(text, parser=lxml_html.HTMLParser(encoding="utf-8"))
+
+def _text(el, sep: str = "") -> str:
+    return sep.join(s for s in (t.strip() for t in _TEXT_NODES(el)) if s)
+
+def extract_form_state(doc) -> dict[str, str]:
+    fields = {}
+    for name in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"]:
+        tags = doc.xpath("//input[@name=$name]", name=name)
+        if tags and tags[0].get("value"):
+            fields[name] = tags[0].get("value")
+    return fields
+
+def find_pagination_postbacks(doc) -> list[dict[str, str]]:
+    out: list[dict[str, str]] = []
+    for a in doc.iter("a"):
+        href = a.get("href")
+        if href is None:
+            continue
+        m = _POSTBACK_RE.search(href)
+        if m:
+            out.append({"target": m.group(1), "argument": m.group(2), "text": _text(a)})
+    return out
+
+def _get_results_table(doc):
+    for t in doc.iter("table"):
+        if _GRID_ID_RE.search(t.get("id") or ""):
+            return t
+    for t in doc.iter("table"):
+        if any("Municipal Address" in _text(th) for th in t.iter("th")):
+            return t
+    return None
+
+def _iter_rows(doc) -> Iterator[tuple]:
+    # One tuple of RAW_FIELDS values per listing row.
+    table = _get_results_table(doc)
+    if table is None:
+        return
+
+    headers = [_text(th) for th in table.iter("th")]
+    idx = {h: i for i, h in enumerate(headers)}
+    n = len(headers)
+
+    def col(h: str) -> Optional[int]:
+        return idx.get(h)
+
+    i_id, i_mls, i_details, i_image = col("ID"), col("MLS"), col("Details"), col("Image")
+    # address, region, city, acres, sqft, price_raw, status, mls_text, posted
+    text_cols = [
+        col("Municipal Address"), col("Region"), col("City"), col("Acres"), col("Square Feet"),
+        col("Price"), col("Status"), i_mls, col("Posted"),
+    ]
+
+    def link(tds, i: Optional[int]) -> Optional[str]:
+        if i is None:
+            return None
+        for a in tds[i].iter("a"):
+            href = a.get("href")
+            if href is not None:
+                return href
+        return None
+
+    for tr in table.iter("tr"):
+        tds = list(tr.iter("td"))
+        if not tds or len(tds) != n:
+            continue
+
+        prop_id = _text(tds[i_id]) if i_id is not None else ""
+        if not _ID_RE.fullmatch(prop_id):
+            continue
+
+        yield (
+            prop_id,
+            *(_text(tds[i]) if i is not None else "" for i in text_cols),
+            link(tds, i_mls),
+            link(tds, i_details),
+            link(tds, i_image),
+        )
+
+def parse_results_table(doc) -> list[dict[str, Any]]:
+    return [dict(zip(RAW_FIELDS, row)) for row in _iter_rows(doc)]
+
+def parse_results_batch(doc, batch: Optional[RowBatch] = None) -> RowBatch:
+    batch = batch if batch is not None else RowBatch()
+    for row in _iter_rows(doc):
+        batch.append(row)
+    return batch
+
+def parse_total_records(doc) -> Optional[int]:
+    # From the pager summary around the "Total Records:" label (the label's element or up to two
+    # of its parents), not the text of the whole page.
+    for label in _TOTAL_LABEL(doc):
+        el = label.getparent()
+        for _ in range(3):
+            if el is None:
+                break
+            m = _TOTAL_RE.search(_text(el, " "))
+            if m:
+                return int(m.group(1))
+            el = el.getparent()
+    return None
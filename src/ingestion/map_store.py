@@ -0,0 +1,183 @@
+from __future__ import annotations
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from src.common.io_utils import ensure_dir
+
+# Content-addressed store for the per-property PDF maps:
+#   <maps>/blobs/<sha[:2]>/<sha>.pdf   every distinct map once, named by the sha256 of its bytes
+#   <maps>/index.sqlite                maps: property_id -> blob, plus the validators (size, ETag,
+#                                      Last-Modified) it was fetched with and when it was last checked
+#                                      blobs: sha256 -> size, page count, page size, PDF version
+# <images_dir>/<property_id>.pdf stays the way to open a map: a hardlink to its blob (a symlink
+# where hardlinks fail, e.g. across devices).
+
+BLOB_SUFFIX = ".pdf"
+
+_VERSION_RE = re.compile(rb"%PDF-(\d+\.\d+)")
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+_MEDIABOX_RE = re.compile(rb"/MediaBox\s*\[\s*(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s*\]")
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+
+
+def pdf_metadata(body: bytes) -> dict[str, Any]:
+    # Best effort, without a PDF library: page objects and the first MediaBox, looked for in
+    # Flate-compressed object streams too when the file keeps none in the clear.
+    texts = [body]
+    if not _PAGE_RE.search(body):
+        for m in _STREAM_RE.finditer(body):
+            try:
+                texts.append(zlib.decompress(m.group(1)))
+            except zlib.error:
+                continue
+    pages = sum(len(_PAGE_RE.findall(t)) for t in texts)
+    box = next((m for m in (_MEDIABOX_RE.search(t) for t in texts) if m), None)
+    version = _VERSION_RE.match(body)
+    x0, y0, x1, y1 = (float(v) for v in box.groups()) if box else (None,) * 4
+    return {
+        "pages": pages or None,
+        "width_pt": round(abs(x1 - x0), 2) if box else None,
+        "height_pt": round(abs(y1 - y0), 2) if box else None,
+        "pdf_version": version.group(1).decode() if version else None,
+        "encrypted": b"/Encrypt" in body,
+    }
+
+
+class MapStore:
+    def __init__(self, root: str | Path, views_dir: str | Path):
+        self.root = ensure_dir(root)
+        self.views_dir = ensure_dir(views_dir)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            create table if not exists blobs (
+              sha256 text primary key,
+              size integer,
+              pages integer,
+              width_pt real,
+              height_pt real,
+              pdf_version text,
+              encrypted integer,
+              stored_at real
+            );
+            create table if not exists maps (
+              property_id text primary key,
+              sha256 text references blobs(sha256),
+              url text,
+              etag text,
+              last_modified text,
+              size integer,
+              fetched_at real,
+              checked_at real
+            );
+            create index if not exists maps_sha256 on maps(sha256);
+        """)
+
+    def blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / f"{sha}{BLOB_SUFFIX}"
+
+    def view_path(self, property_id: str) -> Path:
+        return self.views_dir / f"{property_id}{BLOB_SUFFIX}"
+
+    def get(self, property_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("select * from maps where property_id = ?", (property_id,)).fetchone()
+        if row is None or not self.blob_path(row["sha256"]).exists():
+            return None
+        return dict(row)
+
+    def checked(self, property_id: str) -> None:
+        with self._lock:
+            self._db.execute("update maps set checked_at = ? where property_id = ?", (time.time(), property_id))
+
+    def put(
+        self, property_id: str, chunks: Iterable[bytes], url: Optional[str] = None, headers: Optional[dict] = None
+    ) -> dict[str, Any]:
+        # Streams the body into the blob store (kept once per sha256), indexes it and points the
+        # property's view at it. Returns the maps row plus `new_blob`.
+        blobs = ensure_dir(self.root / "blobs")
+        h = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=blobs, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    h.update(chunk)
+                    size += len(chunk)
+            sha = h.hexdigest()
+            dest = self.blob_path(sha)
+            new_blob = not dest.exists()
+            if new_blob:
+                meta = pdf_metadata(Path(tmp).read_bytes())
+                ensure_dir(dest.parent)
+                os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+        headers = headers or {}
+        now = time.time()
+        row = {
+            "property_id": property_id, "sha256": sha, "url": url, "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"), "size": size, "fetched_at": now, "checked_at": now,
+        }
+        with self._lock:
+            if new_blob:
+                self._db.execute(
+                    "insert or replace into blobs values (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (sha, size, meta["pages"], meta["width_pt"], meta["height_pt"], meta["pdf_version"],
+                     int(meta["encrypted"]), now),
+                )
+            self._db.execute("insert or replace into maps values (?, ?, ?, ?, ?, ?, ?, ?)", tuple(row.values()))
+        self._link(property_id, dest)
+        return {**row, "new_blob": new_blob}
+
+    def adopt(self, property_id: str) -> Optional[dict[str, Any]]:
+        # A map downloaded before the store existed: move it in (dated by its mtime), leaving a view.
+        view = self.view_path(property_id)
+        if view.is_symlink() or not view.is_file():
+            return None
+        mtime = view.stat().st_mtime
+        with open(view, "rb") as f:
+            row = self.put(property_id, iter(lambda: f.read(1024 * 1024), b""))
+        with self._lock:
+            self._db.execute(
+                "update maps set fetched_at = ?, checked_at = ? where property_id = ?", (mtime, mtime, property_id)
+            )
+        return {**row, "fetched_at": mtime, "checked_at": mtime}
+
+    def _link(self, property_id: str, blob: Path) -> None:
+        view = self.view_path(property_id)
+        tmp = view.with_name(f".{view.name}.tmp")
+        if tmp.exists() or tmp.is_symlink():
+            tmp.unlink()
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob, view.parent), tmp)
+            except OSError:
+                shutil.copyfile(blob, tmp)
+        os.replace(tmp, view)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            row = self._db.execute("""
+                select
+                  (select count(*) from maps) as maps,
+                  (select count(*) from blobs) as blobs,
+                  (select coalesce(sum(size), 0) from maps) as logical_bytes,
+                  (select coalesce(sum(size), 0) from blobs) as stored_bytes
+            """).fetchone()
+        return dict(row)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.common.instrumentation import timed
+from src.ingestion.lake import LISTINGS_SCHEMA
+from src.ingestion.row_batch import RowBatch
+
+SITE_ROOT = "https://apps.infrastructureontario.ca"
+DETAILS_BASE = f"{SITE_ROOT}/propertiesforsale/pspropertydetails.aspx"
+IMAGE_BASE = f"{SITE_ROOT}/propertiesforsale/imageview.aspx"
+
+# The grid shows dates as m/d/yyyy; anything else falls back to pandas' per-value inference.
+POSTED_FORMAT = "%m/%d/%Y"
+
+OUTPUT_COLUMNS = [
+    "property_id", "address", "city", "region",
+    "acres", "acres_val", "sqft", "sqft_val",
+    "price_raw", "price", "status", "mls_text", "mls_url",
+    "posted", "posted_date", "details_abs", "image_abs", "ingested_at"
+]
+DEDUPE_KEYS = ["property_id", "address", "posted"]
+# Raw copies of the DEDUPE_KEYS that cleaning changes, carried by normalize_chunk's output (address passes through as is).
+_CHUNK_KEYS = {"property_id": "_key_property_id", "posted": "_key_posted"}
+
+# --- scalar reference semantics (also used as the fallback for odd values) ---
+
+def to_float(x: Optional[str]) -> Optional[float]:
+    if x is None:
+        return None
+    x = str(x).replace(",", "").strip()
+    try:
+        return float(x)
+    except Exception:
+        return None
+
+def clean_price(x: Optional[str]) -> Optional[float]:
+    if not x:
+        return None
+    digits = "".join(ch for ch in str(x) if ch.isdigit() or ch == ".")
+    return float(digits) if digits else None
+
+def parse_date(s: Optional[str]) -> Optional[str]:
+    if not s:
+        return None
+    try:
+        return pd.to_datetime(s, errors="coerce").date().isoformat()
+    except Exception:
+        return None
+
+def abs_url(u: Optional[str], base: str) -> Optional[str]:
+    if not u:
+        return None
+    if u.startswith("http"):
+        return u
+    if u.startswith("/"):
+        return f"{SITE_ROOT}{u}"
+    if "?" in u:
+        return f"{SITE_ROOT}/propertiesforsale/{u}"
+    return f"{base}?{u}"
+
+# --- vectorized column kernels (Arrow compute; odd values fall back to the scalar functions) ---
+
+# ASCII-only shape that float() and Arrow's string->double cast agree on, bit for bit.
+_PLAIN_NUMBER = r"^[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?$"
+
+def _arrow_strings(s: pd.Series) -> pa.Array:
+    return pa.array(s.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+
+def _mask(arr) -> np.ndarray:
+    return pc.fill_null(arr, False).to_numpy(zero_copy_only=False)
+
+def _like_apply(values: np.ndarray) -> np.ndarray:
+    # Series.apply returning only None yields an object column, not float NaN; keep that.
+    if np.isnan(values).all():
+        return np.full(len(values), None, dtype=object)
+    return values
+
+def _numeric(raw: pa.Array, cleaned: pa.Array, candidates: np.ndarray, scalar, bulk_ok=None) -> np.ndarray:
+    plain = candidates & _mask(pc.match_substring_regex(cleaned, _PLAIN_NUMBER))
+    if bulk_ok is not None:
+        plain &= bulk_ok
+    out = pc.cast(pc.if_else(pa.array(plain), cleaned, pa.scalar(None, pa.string())), pa.float64())
+    out = out.to_numpy(zero_copy_only=False).astype(np.float64)
+    odd = candidates & ~plain
+    if odd.any():
+        values = raw.to_numpy(zero_copy_only=False)[odd]
+        lookup = {v: scalar(v) for v in pd.unique(values)}
+        out[odd] = np.array([lookup[v] for v in values], dtype=np.float64)
+    return out
+
+def to_float_arr(arr: pa.Array) -> np.ndarray:
+    cleaned = pc.utf8_trim_whitespace(pc.replace_substring(arr, ",", ""))
+    return _numeric(arr, cleaned, _mask(pc.is_valid(arr)), to_float)
+
+def clean_price_arr(arr: pa.Array) -> np.ndarray:
+    digits = pc.replace_substring_regex(arr, r"[^0-9.]", "")
+    has_digits = _mask(pc.not_equal(digits, ""))
+    # str.isdigit() also accepts non-ASCII digits; let the scalar path handle those values.
+    ascii_only = _mask(pc.string_is_ascii(arr))
+    non_ascii = ~ascii_only & _mask(pc.is_valid(arr))
+    return _numeric(arr, digits, has_digits | non_ascii, clean_price, bulk_ok=ascii_only)
+
+def _parse_dates(uniques: np.ndarray, fmt: str) -> list[Optional[str]]:
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors="coerce")
+    return [ts.date().isoformat() if not pd.isna(ts) else parse_date(raw) for raw, ts in zip(uniques, parsed)]
+
+def parse_date_arr(arr: pa.Array, fmt: str = POSTED_FORMAT) -> pa.Array:
+    enc = pc.dictionary_encode(arr)
+    dates = pa.array(_parse_dates(enc.dictionary.to_numpy(zero_copy_only=False), fmt), pa.string())
+    # Like lake.to_arrow: whatever isn't a YYYY-MM-DD date (parse_date's "NaT") becomes null.
+    dates = pc.strptime(dates, format="%Y-%m-%d", unit="s", error_is_null=True)
+    return pc.cast(dates, pa.date32()).take(enc.indices)
+
+def abs_url_arr(arr: pa.Array, base: str) -> pa.Array:
+    def prefixed(prefix: str) -> pa.Array:
+        return pc.binary_join_element_wise(prefix, arr, "")
+
+    out = pc.if_else(
+        pc.starts_with(arr, "http"), arr,
+        pc.if_else(
+            pc.starts_with(arr, "/"), prefixed(SITE_ROOT),
+            pc.if_else(pc.match_substring(arr, "?"), prefixed(f"{SITE_ROOT}/propertiesforsale/"), prefixed(f"{base}?")),
+        ),
+    )
+    present = pc.and_kleene(pc.is_valid(arr), pc.not_equal(arr, ""))
+    return pc.if_else(present, out, pa.scalar(None, pa.string()))
+
+def to_float_col(s: pd.Series) -> pd.Series:
+    return pd.Series(_like_apply(to_float_arr(_arrow_strings(s))), index=s.index)
+
+def clean_price_col(s: pd.Series) -> pd.Series:
+    return pd.Series(_like_apply(clean_price_arr(_arrow_strings(s))), index=s.index)
+
+def parse_date_col(s: pd.Series, fmt: str = POSTED_FORMAT) -> pd.Series:
+    # Dates repeat heavily, so parse each distinct value once (in bulk, with an explicit format)
+    # and broadcast back through the factorized codes.
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    mapped = np.array([*_parse_dates(np.asarray(uniques, dtype=object), fmt), None], dtype=object)
+    return pd.Series(mapped[codes], index=s.index)
+
+def abs_url_col(s: pd.Series, base: str) -> pd.Series:
+    return pd.Series(abs_url_arr(_arrow_strings(s), base).to_numpy(zero_copy_only=False), index=s.index)
+
+@timed("normalize", items=len)
+def normalize_rows(rows: list[dict]) -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows).drop_duplicates(subset=DEDUPE_KEYS, keep="first")
+
+    df["acres_val"] = to_float_col(df["acres"])
+    df["sqft_val"] = to_float_col(df["sqft"])
+    df["price"] = clean_price_col(df["price_raw"])
+    df["posted_date"] = parse_date_col(df["posted"])
+    df["details_abs"] = abs_url_col(df["details_url"], DETAILS_BASE)
+    df["image_abs"] = abs_url_col(df["image_url"], IMAGE_BASE)
+
+    df["ingested_at"] = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+    return df[OUTPUT_COLUMNS]
+
+def _first_rows(table: pa.Table, keys: list[str]) -> pa.Table:
+    # drop_duplicates(keep="first"): the lowest row index of each key group, in original order.
+    index = pa.array(np.arange(table.num_rows))
+    firsts = table.select(keys).append_column("_row", index).group_by(keys, use_threads=False).aggregate([("_row", "min")])
+    return table.take(pc.sort_indices(firsts["_row_min"]).to_numpy())
+
+@timed("normalize", items=len)
+def normalize_batch(rows: RowBatch | pa.Table, ingested_at: Optional[str] = None) -> pa.Table:
+    # normalize_rows + lake.to_arrow in one pass over Arrow columns: same values, LISTINGS_SCHEMA
+    # out, sorted by property_id, with no DataFrame or per-row dicts in between.
+    raw = rows.to_arrow() if isinstance(rows, RowBatch) else rows
+    if not raw.num_rows:
+        return LISTINGS_SCHEMA.empty_table()
+    raw = _first_rows(raw, DEDUPE_KEYS).combine_chunks()
+    return _clean(raw, ingested_at).sort_by("property_id")
+
+@timed("normalize", items=len)
+def normalize_chunk(rows: RowBatch | pa.Table, ingested_at: str) -> pa.Table:
+    # normalize_batch for one chunk of a crawl still in progress, so its raw strings can go: cleaned,
+    # but not deduplicated or sorted, with the raw DEDUPE_KEYS that cleaning changes kept (_key_*)
+    # for finish_chunks. Every chunk of a crawl needs the same ingested_at.
+    raw = (rows.to_arrow() if isinstance(rows, RowBatch) else rows).combine_chunks()
+    out = _clean(raw, ingested_at)
+    for k, name in _CHUNK_KEYS.items():
+        out = out.append_column(name, pc.cast(raw[k], pa.string()))
+    return out
+
+@timed("normalize")
+def finish_chunks(chunks: list[pa.Table]) -> pa.Table:
+    # What normalize_batch returns for all the chunks' rows: the first of each DEDUPE_KEYS across
+    # chunks, sorted by property_id.
+    if not chunks or not sum(c.num_rows for c in chunks):
+        return LISTINGS_SCHEMA.empty_table()
+    keys = [_CHUNK_KEYS.get(k, k) for k in DEDUPE_KEYS]
+    table = _first_rows(pa.concat_tables(chunks), keys)
+    return table.drop_columns(list(_CHUNK_KEYS.values())).sort_by("property_id")
+
+def _clean(raw: pa.Table, ingested_at: Optional[str]) -> pa.Table:
+    def col(name: str) -> pa.Array:
+        arr = raw[name].combine_chunks()
+        return pc.cast(arr, pa.string()) if pa.types.is_dictionary(arr.type) else arr
+
+    def floats(values: np.ndarray) -> pa.Array:
+        return pa.array(values, pa.float64(), from_pandas=True)
+
+    ingested_at = ingested_at or datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    stamp = pd.to_datetime(ingested_at, utc=True)
+    columns = {
+        "property_id": pc.cast(col("property_id"), pa.int64()),
+        "acres_val": floats(to_float_arr(col("acres"))),
+        "sqft_val": floats(to_float_arr(col("sqft"))),
+        "price": floats(clean_price_arr(col("price_raw"))),
+        "posted_date": parse_date_arr(col("posted")),
+        "details_abs": abs_url_arr(col("details_url"), DETAILS_BASE),
+        "image_abs": abs_url_arr(col("image_url"), IMAGE_BASE),
+        "ingested_at": pa.repeat(pa.scalar(stamp.to_pydatetime(), LISTINGS_SCHEMA.field("ingested_at").type), raw.num_rows),
+    }
+    arrays = [columns[f.name] if f.name in columns else col(f.name) for f in LISTINGS_SCHEMA]
+    return pa.Table.from_arrays(arrays, schema=LISTINGS_SCHEMA)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+import importlib
+from types import ModuleType
+
+# Each backend module exposes load_document, extract_form_state, find_pagination_postbacks,
+# parse_results_table (or parse_results_batch, into a RowBatch) and parse_total_records, all
+# returning identical values.
+PARSER_BACKENDS = {
+    "bs4": "src.ingestion.html_parsers",
+    "lxml": "src.ingestion.lxml_parsers",
+}
+
+def get_parser_backend(name: str) -> ModuleType:
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend {name!r}; choose from {sorted(PARSER_BACKENDS)}")
+    return importlib.import_module(PARSER_BACKENDS[name])
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import pyarrow as pa
+
+from src.common.io_utils import atomic_open, ensure_dir
+
+# Content-addressed archive of the raw grid responses a scrape parsed:
+#   <archive>/objects/<sha[:2]>/<sha>.html.zst   response body, zstd-compressed, keyed by sha256 of the body
+#   <archive>/days/<YYYY-MM-DD>.json             the pages (in crawl order) whose rows make that day's snapshot
+# A page that comes back byte-identical on another day is stored once. backfill.py rebuilds snapshots from it.
+
+OBJECT_SUFFIX = ".html.zst"
+
+
+class RawArchive:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def object_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / f"{sha}{OBJECT_SUFFIX}"
+
+    def day_path(self, day: str) -> Path:
+        return self.root / "days" / f"{day}.json"
+
+    def put(self, chunks: Iterable[bytes]) -> str:
+        # Streams the body through sha256 and zstd into a temp file as it arrives; kept once per sha256.
+        obj = self.open_object()
+        try:
+            for chunk in chunks:
+                obj.write(chunk)
+            return obj.commit()
+        finally:
+            obj.discard()
+
+    def open_object(self) -> ObjectWriter:
+        # put() for a body whose chunks are handed over one at a time (a parser that yields as it reads).
+        return ObjectWriter(self)
+
+    def get(self, sha: str) -> bytes:
+        with pa.input_stream(str(self.object_path(sha)), compression="zstd") as f:
+            body = f.read()
+        if hashlib.sha256(body).hexdigest() != sha:
+            raise ValueError(f"archived object {sha} is corrupt")
+        return body
+
+    def write_day(self, day: str, pages: list[dict[str, Any]], **info: Any) -> Path:
+        dest = ensure_dir(self.root / "days") / f"{day}.json"
+        with atomic_open(dest, "w") as f:
+            json.dump({"snapshot_date": day, **info, "pages": pages}, f, indent=2)
+        return dest
+
+    def read_day(self, day: str) -> dict[str, Any]:
+        return json.loads(self.day_path(day).read_text(encoding="utf-8"))
+
+    def days(self, start: Optional[str] = None, end: Optional[str] = None) -> list[str]:
+        root = self.root / "days"
+        found = sorted(p.stem for p in root.glob("*.json")) if root.exists() else []
+        return [d for d in found if (start is None or d >= start) and (end is None or d <= end)]
+
+
+class ObjectWriter:
+    def __init__(self, archive: RawArchive):
+        self.archive = archive
+        self._h = hashlib.sha256()
+        fd, self._tmp = tempfile.mkstemp(dir=ensure_dir(archive.root / "objects"), suffix=".tmp")
+        os.close(fd)
+        self._z = pa.output_stream(self._tmp, compression="zstd")
+
+    def write(self, chunk: bytes) -> None:
+        self._z.write(chunk)
+        self._h.update(chunk)
+
+    def commit(self) -> str:
+        self._z.close()
+        sha = self._h.hexdigest()
+        dest = self.archive.object_path(sha)
+        if not dest.exists():
+            ensure_dir(dest.parent)
+            os.chmod(self._tmp, 0o644)
+            os.replace(self._tmp, dest)
+        return sha
+
+    def discard(self) -> None:
+        # After commit() or instead of it: drops the temp file if it is still there.
+        if not self._z.closed:
+            self._z.close()
+        if os.path.exists(self._tmp):
+            os.unlink(self._tmp)
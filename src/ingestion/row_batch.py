@@ -0,0 +1,111 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Column-oriented buffer the grid parsers append into, instead of building one dict per row.
+# Low-cardinality fields (region, city, status) are dictionary-encoded as they arrive (int32
+# codes into one shared value list), and every `chunk_rows` rows the Python lists are frozen
+# into an Arrow record batch, so at most one chunk of per-row str objects is alive at a time.
+
+RAW_FIELDS = (
+    "property_id", "address", "region", "city", "acres", "sqft", "price_raw",
+    "status", "mls_text", "posted", "mls_url", "details_url", "image_url",
+)
+DICT_FIELDS = ("region", "city", "status")
+RAW_SCHEMA = pa.schema([
+    (f, pa.dictionary(pa.int32(), pa.string()) if f in DICT_FIELDS else pa.string()) for f in RAW_FIELDS
+])
+CHUNK_ROWS = 16 * 1024
+
+_PLAIN = tuple(i for i, f in enumerate(RAW_FIELDS) if f not in DICT_FIELDS)
+_CODED = tuple(i for i, f in enumerate(RAW_FIELDS) if f in DICT_FIELDS)
+
+
+class RowBatch:
+    __slots__ = ("chunk_rows", "_cols", "_values", "_codes", "_chunks", "_flushed")
+
+    def __init__(self, chunk_rows: int = CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self._cols: list[Any] = [array("i") if i in _CODED else [] for i in range(len(RAW_FIELDS))]
+        self._values: dict[int, list[str]] = {i: [] for i in _CODED}
+        self._codes: dict[int, dict[Optional[str], int]] = {i: {None: -1} for i in _CODED}
+        self._chunks: list[pa.RecordBatch] = []
+        self._flushed = 0
+
+    def __len__(self) -> int:
+        return self._flushed + len(self._cols[0])
+
+    def append(self, row: tuple) -> None:
+        # `row` holds the RAW_FIELDS values in order.
+        cols = self._cols
+        for i in _PLAIN:
+            cols[i].append(row[i])
+        for i in _CODED:
+            codes = self._codes[i]
+            code = codes.get(row[i])
+            if code is None:
+                code = codes[row[i]] = len(self._values[i])
+                self._values[i].append(row[i])
+            cols[i].append(code)
+        if len(cols[0]) >= self.chunk_rows:
+            self._flush()
+
+    def append_dict(self, row: dict[str, Any]) -> None:
+        self.append(tuple(row.get(f) for f in RAW_FIELDS))
+
+    def extend(self, other: RowBatch) -> None:
+        self._flush()
+        for b in other.to_arrow().to_batches():
+            self._chunks.append(b)
+            self._flushed += b.num_rows
+
+    def _flush(self) -> None:
+        n = len(self._cols[0])
+        if not n:
+            return
+        arrays = []
+        for i, col in enumerate(self._cols):
+            if i in self._values:
+                codes = pa.array(np.frombuffer(col, dtype=np.int32))
+                codes = pc.if_else(pc.equal(codes, -1), pa.scalar(None, pa.int32()), codes)
+                arrays.append(pa.DictionaryArray.from_arrays(codes, pa.array(self._values[i], pa.string())))
+            else:
+                arrays.append(pa.array(col, pa.string()))
+        self._chunks.append(pa.RecordBatch.from_arrays(arrays, schema=RAW_SCHEMA))
+        self._flushed += n
+        self._cols = [array("i") if i in _CODED else [] for i in range(len(RAW_FIELDS))]
+
+    def to_arrow(self) -> pa.Table:
+        self._flush()
+        return pa.Table.from_batches(self._chunks, schema=RAW_SCHEMA)
+
+    def to_pydict(self) -> dict[str, list]:
+        # Plain lists per column (dictionary columns decoded); what the run journal stores per page.
+        return self.to_arrow().to_pydict()
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        return self.to_arrow().to_pylist()
+
+    @classmethod
+    def from_pydict(cls, columns: dict[str, list]) -> RowBatch:
+        batch = cls()
+        arrays = []
+        for f in RAW_FIELDS:
+            arr = pa.array(columns[f], pa.string())
+            arrays.append(arr.dictionary_encode().cast(RAW_SCHEMA.field(f).type) if f in DICT_FIELDS else arr)
+        table = pa.Table.from_arrays(arrays, schema=RAW_SCHEMA)
+        batch._chunks = table.to_batches()
+        batch._flushed = table.num_rows
+        return batch
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> RowBatch:
+        # What to_arrow() returned (RAW_SCHEMA), e.g. read back from a journaled page file.
+        batch = cls()
+        batch._chunks = table.cast(RAW_SCHEMA).to_batches()
+        batch._flushed = table.num_rows
+        return batch
@@ -0,0 +1,228 @@
+from __future__ import annotations
+import re
+from collections import deque
+from html.parser import HTMLParser
+from typing import Any, Iterable, Iterator, Optional
+
+from src.ingestion.row_batch import RowBatch
+
+# Event-driven counterpart of html_parsers: rows are emitted as soon as their </tr> is seen,
+# and only the form state / pager links / "Total Records" are kept from the rest of the page.
+# Cell text is built the same way as get_text(strip=True) so rows match the DOM backends.
+
+FORM_FIELDS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION")
+_POSTBACK_RE = re.compile(r"__doPostBack\('([^']+)'\s*,\s*'([^']*)'\)")
+_GRID_ID_RE = re.compile(r"gvPropertyList", re.I)
+_TOTAL_RE = re.compile(r"Total Records:\s*(\d+)")
+_ID_RE = re.compile(r"\d+")
+_SKIP_TEXT = {"script", "style"}
+_TAIL_CHARS = 256
+
+ROW_FIELDS = {
+    "address": "Municipal Address",
+    "region": "Region",
+    "city": "City",
+    "acres": "Acres",
+    "sqft": "Square Feet",
+    "price_raw": "Price",
+    "status": "Status",
+    "mls_text": "MLS",
+    "posted": "Posted",
+}
+LINK_FIELDS = {"mls_url": "MLS", "details_url": "Details", "image_url": "Image"}
+
+
+class GridStreamParser(HTMLParser):
+    def __init__(self, batch: Optional[RowBatch] = None):
+        super().__init__(convert_charrefs=True)
+        # With a batch, rows are appended to it instead of queued as dicts in `rows`.
+        self.batch = batch
+        self.rows: deque[dict[str, Any]] = deque()
+        self.form_state: dict[str, str] = {}
+        self.postbacks: list[dict[str, str]] = []
+        self.total_records: Optional[int] = None
+        self.headers: list[str] = []
+
+        self._seen_fields: set[str] = set()
+        self._skip_depth = 0
+        self._text_tail = ""
+        self._pending: list[str] = []
+        self._anchor: Optional[dict[str, Any]] = None
+
+        self._table_depth = 0
+        self._table_headers: list[list[str]] = []
+        self._grid_depth: Optional[int] = None
+        self._grid_done = False
+        self._th: Optional[list[str]] = None
+        self._row: Optional[list[tuple[str, Optional[str]]]] = None
+        self._idx: dict[str, int] = {}
+        self._idx_len = -1
+        self._row_tds = 0
+        self._cell: Optional[list[str]] = None
+        self._cell_href: Optional[str] = None
+
+    # --- tree events ---
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        self._flush_text()
+        if tag in _SKIP_TEXT:
+            self._skip_depth += 1
+            return
+        if tag == "input":
+            self._on_input(dict(attrs))
+        elif tag == "a":
+            self._on_anchor(dict(attrs))
+        elif tag == "table":
+            self._table_depth += 1
+            self._table_headers.append([])
+            if self._grid_depth is None and not self._grid_done and _GRID_ID_RE.search(dict(attrs).get("id") or ""):
+                self._use_grid()
+        elif tag == "th" and self._table_depth:
+            self._th = []
+        elif self._grid_depth is None:
+            return
+        elif tag == "tr" and self._table_depth == self._grid_depth:
+            self._finish_row()
+            self._row = []
+            self._row_tds = 0
+        elif tag == "td" and self._row is not None:
+            self._row_tds += 1
+            if self._table_depth == self._grid_depth:
+                self._finish_cell()
+                self._cell = []
+                self._cell_href = None
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush_text()
+        if tag in _SKIP_TEXT:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "a" and self._anchor is not None:
+            a = self._anchor
+            self._anchor = None
+            self.postbacks.append({"target": a["target"], "argument": a["argument"], "text": "".join(a["text"])})
+        elif tag == "th" and self._th is not None:
+            text = "".join(self._th)
+            self._th = None
+            self._table_headers[-1].append(text)
+            if self._grid_depth is None and not self._grid_done and "Municipal Address" in text:
+                self._use_grid()
+        elif tag == "td" and self._table_depth == self._grid_depth:
+            self._finish_cell()
+        elif tag == "tr" and self._table_depth == self._grid_depth:
+            self._finish_row()
+        elif tag == "table":
+            if self._table_depth == self._grid_depth:
+                self._finish_row()
+                self._grid_depth = None
+                self._grid_done = True
+            if self._table_depth:
+                self._table_depth -= 1
+                self._table_headers.pop()
+
+    def handle_data(self, data: str) -> None:
+        # A text node can arrive in several pieces when it straddles a feed() boundary.
+        self._pending.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        self._flush_text()
+
+    def close(self) -> None:
+        super().close()
+        self._flush_text()
+        self._finish_row()
+
+    # --- helpers ---
+
+    def _flush_text(self) -> None:
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending.clear()
+        if self._skip_depth:
+            return
+        text = data.strip()
+        if not text:
+            return
+        if self._cell is not None:
+            self._cell.append(text)
+        if self._th is not None:
+            self._th.append(text)
+        if self._anchor is not None:
+            self._anchor["text"].append(text)
+        if self.total_records is None:
+            self._text_tail = (self._text_tail + " " + text)[-_TAIL_CHARS:]
+            m = _TOTAL_RE.search(self._text_tail)
+            if m:
+                self.total_records = int(m.group(1))
+
+    def _use_grid(self) -> None:
+        self._grid_depth = self._table_depth
+        self.headers = self._table_headers[-1]
+
+    def _on_input(self, attrs: dict[str, Optional[str]]) -> None:
+        name = attrs.get("name")
+        if name in FORM_FIELDS and name not in self._seen_fields:
+            self._seen_fields.add(name)
+            if attrs.get("value"):
+                self.form_state[name] = attrs["value"]
+
+    def _on_anchor(self, attrs: dict[str, Optional[str]]) -> None:
+        href = attrs.get("href")
+        if href is None:
+            return
+        if self._cell is not None and self._cell_href is None:
+            self._cell_href = href
+        m = _POSTBACK_RE.search(href)
+        if m:
+            self._anchor = {"target": m.group(1), "argument": m.group(2), "text": []}
+
+    def _finish_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            self._row.append(("".join(self._cell), self._cell_href))
+        self._cell = None
+        self._cell_href = None
+
+    def _finish_row(self) -> None:
+        self._finish_cell()
+        row, n_tds = self._row, self._row_tds
+        self._row = None
+        if not row or n_tds != len(row) or len(row) != len(self.headers):
+            return
+        if self._idx_len != len(self.headers):
+            self._idx = {h: i for i, h in enumerate(self.headers)}
+            self._idx_len = len(self.headers)
+        idx = self._idx
+        prop_id = row[idx["ID"]][0] if "ID" in idx else ""
+        if not _ID_RE.fullmatch(prop_id):
+            return
+        if self.batch is not None:
+            self.batch.append((
+                prop_id,
+                *(row[idx[header]][0] if header in idx else "" for header in ROW_FIELDS.values()),
+                *(row[idx[header]][1] if header in idx else None for header in LINK_FIELDS.values()),
+            ))
+            return
+        out: dict[str, Any] = {"property_id": prop_id}
+        for key, header in ROW_FIELDS.items():
+            out[key] = row[idx[header]][0] if header in idx else ""
+        for key, header in LINK_FIELDS.items():
+            out[key] = row[idx[header]][1] if header in idx else None
+        self.rows.append(out)
+
+
+def iter_grid_rows(chunks: Iterable[str], parser: Optional[GridStreamParser] = None) -> Iterator[dict[str, Any]]:
+    parser = parser if parser is not None else GridStreamParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        while parser.rows:
+            yield parser.rows.popleft()
+    parser.close()
+    while parser.rows:
+        yield parser.rows.popleft()
+
+def feed_grid(chunks: Iterable[str], parser: GridStreamParser) -> GridStreamParser:
+    # For a parser with a batch: nothing is queued, so just run the chunks through it.
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.common.instrumentation import timed
+from src.ingestion.lake import read_manifest
+
+# Data-quality gate on a normalized snapshot (LISTINGS_SCHEMA), run before anything is written: the
+# checks dbt runs after the build (unique/not-null keys) plus null rates, numeric ranges, URL shape
+# and row counts against the site's "Total Records" and the previous snapshot. Each check is a few
+# Arrow kernels over one column and yields a value with a warn and an error bound; any error makes
+# io_scrape quarantine the snapshot instead of writing it.
+#   python -m src.ingestion.validate --lake-dir data/lake/io_listings [--date YYYY-MM-DD]
+
+VALIDATION_NAME = "validation.json"
+
+# column: (warn above, error above) fraction of nulls ('' counts as null, as in the staging models)
+NULL_RATES = {
+    "property_id": (0.0, 0.0),
+    "address": (0.01, 0.5),
+    "city": (0.01, 0.5),
+    "region": (0.01, 0.5),
+    "posted_date": (0.0, 0.9),
+    "price": (0.5, 0.95),
+    "sqft_val": (0.5, 0.95),
+    "acres_val": (0.6, 0.95),
+}
+# column: (min, max) for non-null values
+RANGES = {"price": (0.0, 1e9), "acres_val": (0.0, 1e6), "sqft_val": (0.0, 1e8)}
+URL_COLUMNS = ["details_abs", "image_abs", "mls_url"]
+URL_PATTERN = r"^https?://[^\s/?#]+[^\s]*$"
+# (warn above, error above) fraction of non-null values out of range / malformed
+BAD_VALUES = (0.0, 0.05)
+# (warn above, error above) relative difference from the site's "Total Records"
+TOTAL_DRIFT = (0.0, 0.01)
+# (warn above, error above) relative drop in rows from the previous snapshot
+ROW_DROP = (0.2, 0.5)
+
+
+def _result(check: str, value: Optional[float], bounds: tuple[float, float], **extra: Any) -> dict[str, Any]:
+    warn, error = bounds
+    level = "ok" if value is None or value <= warn else "warn" if value <= error else "error"
+    return {"check": check, **extra, "value": value, "warn": warn, "error": error, "level": level}
+
+
+def _null_fraction(col: pa.ChunkedArray) -> float:
+    nulls = col.null_count
+    if pa.types.is_string(col.type):
+        nulls += pc.sum(pc.equal(col, "")).as_py() or 0
+    return nulls / len(col)
+
+
+@timed("validate", items=len)
+def validate(
+    table: pa.Table, total_records: Optional[int] = None, previous_rows: Optional[int] = None
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    n = table.num_rows
+    results = [_result("rows", 0.0 if n else 1.0, (0.0, 0.0), rows=n)]
+    if n:
+        dupes = n - pc.count_distinct(table["property_id"]).as_py()
+        results.append(_result("unique", dupes / n, (0.0, 0.0), column="property_id", rows=dupes))
+        for name, bounds in NULL_RATES.items():
+            results.append(_result("null_rate", _null_fraction(table[name]), bounds, column=name))
+        for name, (lo, hi) in RANGES.items():
+            col = table[name]
+            present = len(col) - col.null_count
+            bad = pc.sum(pc.or_(pc.less(col, lo), pc.greater(col, hi))).as_py() or 0
+            results.append(_result("range", bad / present if present else None, BAD_VALUES, column=name, rows=bad))
+        for name in URL_COLUMNS:
+            col = table[name]
+            present = len(col) - col.null_count
+            bad = pc.sum(pc.invert(pc.match_substring_regex(col, URL_PATTERN))).as_py() or 0
+            results.append(_result("url", bad / present if present else None, BAD_VALUES, column=name, rows=bad))
+    if total_records:
+        results.append(_result("total_records", abs(n - total_records) / total_records, TOTAL_DRIFT, expected=total_records))
+    if previous_rows:
+        results.append(_result("row_drop", max(0.0, 1 - n / previous_rows), ROW_DROP, expected=previous_rows))
+
+    levels = {r["level"] for r in results}
+    return {
+        "status": "error" if "error" in levels else "warn" if "warn" in levels else "ok",
+        "rows": n,
+        "errors": sum(r["level"] == "error" for r in results),
+        "warnings": sum(r["level"] == "warn" for r in results),
+        "ms": round((time.perf_counter() - t0) * 1000, 2),
+        "checks": results,
+    }
+
+
+def describe(report: dict[str, Any]) -> str:
+    flagged = [r for r in report["checks"] if r["level"] != "ok"]
+    lines = [f"Validation {report['status']}: {report['rows']} rows, {report['errors']} errors, "
+             f"{report['warnings']} warnings in {report['ms']} ms"]
+    for r in flagged:
+        value = f"{r['value']:.4f}" if isinstance(r["value"], float) else r["value"]
+        lines.append(f"  {r['level']:<5} {r['check']:<13} {r.get('column', ''):<12} {value} (warn > {r['warn']}, error > {r['error']})")
+    return "\n".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the snapshot data-quality checks on a lake partition")
+    ap.add_argument("--lake-dir", default="data/lake/io_listings")
+    ap.add_argument("--date", default=None, help="Snapshot date (default: the latest)")
+    ap.add_argument("--total-records", type=int, default=None, help="The site's 'Total Records' for that day, if known")
+    ap.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = ap.parse_args()
+
+    parts = read_manifest(args.lake_dir)["partitions"]
+    if args.date:
+        parts = [p for p in parts if p["snapshot_date"] <= args.date]
+    if not parts or (args.date and parts[-1]["snapshot_date"] != args.date):
+        raise SystemExit(f"No partition for {args.date or 'any date'} in {args.lake_dir}")
+    table = pq.read_table(Path(args.lake_dir) / parts[-1]["path"])
+    previous = parts[-2]["rows"] if len(parts) > 1 else None
+    report = validate(table, args.total_records, previous)
+    print(json.dumps(report, indent=2) if args.json else describe(report))
+    raise SystemExit(1 if report["status"] == "error" else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from src.common.io_utils import DEF_USER_AGENT, atomic_open, ensure_dir, today_str
+from src.common.run_journal import RunJournal
+from src.ingestion import io_scrape
+
+# requests, pyarrow and the details/lake modules load in cycle(), like io_scrape's own heavy imports,
+# so --help and argument errors return at once.
+if TYPE_CHECKING:
+    import requests
+
+# Usage:
+#   python -m src.ingestion.watch --out data/raw/io_listings [--interval-min 60] [io_scrape flags...]   (make watch)
+# Long-running alternative to `make daily`. Every interval (jittered) it probes the site with one GET
+# of Home.aspx and compares "Total Records" and a hash of the first page's grid rows with the last
+# full scrape. Only when they differ (or after --max-quiet-hours without a full scrape, since a change
+# past the first page doesn't move either) does it run the scrape, the detail enrichment and a dbt
+# build of the models downstream of the stores the cycle actually changed, plus those edited model code
+# feeds (state:modified+ against the manifest of the last successful build). A scrape that rewrites a
+# day already in the lake needs nothing more: the models that can't take a day back out rebuild
+# themselves (macros/watermark.sql).
+# Failed cycles back off exponentially. State: <out>/_watch_state.json.
+
+STATE_NAME = "_watch_state.json"
+# Staging models over the lake, CDC and details stores; a build selects these and everything downstream.
+LISTING_MODELS = ["stg_io_listings+", "stg_io_listings_all+"]
+CHANGE_MODELS = ["stg_io_changes+"]
+DETAIL_MODELS = ["stg_io_details+"]
+
+
+def probe(session: requests.Session) -> dict[str, Any]:
+    r = io_scrape.fetch(session, io_scrape.BASE_URL)
+    rows, meta = io_scrape.parse_page(r.text, "lxml")
+    grid = json.dumps(rows.to_pydict(), ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return {
+        "total_records": meta["total_records"],
+        "grid_sha256": hashlib.sha256(grid).hexdigest(),
+        "page_rows": len(rows),
+        "bytes": len(r.content),
+    }
+
+
+def change_reason(state: dict[str, Any], seen: dict[str, Any], max_quiet_hours: float) -> Optional[str]:
+    last = state.get("scraped")
+    if last is None:
+        return "no full scrape on record"
+    if seen["total_records"] != last["total_records"]:
+        return f"Total Records {last['total_records']} -> {seen['total_records']}"
+    if seen["grid_sha256"] != last["grid_sha256"]:
+        return "first grid page changed"
+    quiet = (time.time() - last["at"]) / 3600
+    if quiet >= max_quiet_hours:
+        return f"no full scrape for {quiet:.0f}h"
+    return None
+
+
+def dbt_build(dbt_dir: str | Path, state_dir: str | Path, args: argparse.Namespace, select: list[str]) -> int:
+    # `select`: the data models to build (with state:modified+).
+    dbt_dir, state_dir = Path(dbt_dir), Path(state_dir)
+    cmd = ["dbt", "build", "--threads", str(args.dbt_threads)]
+    if (state_dir / "manifest.json").exists():
+        cmd += ["--select", "state:modified+", *select, "--state", str(state_dir.resolve())]
+    env = {
+        **os.environ, "IO_LAKE_DIR": os.path.abspath(args.lake_dir), "IO_CDC_DIR": os.path.abspath(args.cdc_dir),
+        "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION": "python",
+    }
+    if args.details_dir:
+        env["IO_DETAILS_DIR"] = os.path.abspath(args.details_dir)
+    print(f"$ {' '.join(cmd)}", flush=True)
+    rc = subprocess.run(cmd, cwd=dbt_dir, env=env).returncode
+    # The next build's state:modified+ compares against the last one that fully succeeded.
+    if rc == 0:
+        ensure_dir(state_dir)
+        shutil.copyfile(dbt_dir / "target" / "manifest.json", state_dir / "manifest.json")
+        # Last writer of the warehouse this cycle, so the dashboard's first render can come from it.
+        from streamlit_app.data_access import write_warm_start
+
+        write_warm_start(str(dbt_dir / "target" / "io.duckdb"))
+    return rc
+
+
+def cycle(args: argparse.Namespace, state: dict[str, Any]) -> dict[str, Any]:
+    import requests
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": DEF_USER_AGENT})
+    seen = probe(session)
+    state["probes"] = state.get("probes", 0) + 1
+    state["probed"] = {**seen, "at": time.time()}
+    reason = change_reason(state, seen, args.max_quiet_hours)
+    if reason is None:
+        print(f"Probe: {seen['total_records']} records, first page unchanged ({seen['bytes']:,} bytes); nothing to do")
+        return state
+
+    from src.ingestion.lake import PART_NAME, partition_dir
+
+    print(f"Probe: {reason}; running the full scrape", flush=True)
+    day = today_str()
+    rewrites_day = (partition_dir(args.lake_dir, day) / PART_NAME).exists()
+    report = io_scrape.run(args)
+    state["scraped"] = {**seen, "at": time.time(), "status": report["status"], "rows": report.get("rows")}
+    state["scrapes"] = state.get("scrapes", 0) + 1
+    if report["status"] != "ok":
+        return state
+
+    # The lake always gets the day's partition; the change log only moves when rows changed, or when
+    # a rewritten day's changes (re-diffed against the day before) may now differ.
+    cdc = RunJournal(Path(args.out) / report["snapshot_date"], resume=True).get("cdc") or {}
+    changed = any(cdc.get(k) for k in ("inserted", "updated", "deleted"))
+    select = LISTING_MODELS + (CHANGE_MODELS if changed or rewrites_day else [])
+    if args.details_dir:
+        import pyarrow.parquet as pq
+
+        from src.ingestion.details import TTL_DAYS, enrich
+        from src.ingestion.lake import read_manifest
+
+        ttl_days = TTL_DAYS if args.details_ttl_days is None else args.details_ttl_days
+        parts = read_manifest(args.lake_dir)["partitions"]
+        table = pq.read_table(Path(args.lake_dir) / parts[-1]["path"])
+        stats = enrich(table, args.details_dir, session, sleep=args.sleep, ttl_days=ttl_days)
+        print(f"Details: {stats['fetched']} fetched, {stats['failed']} failed, {stats['fresh']} fresh")
+        if stats["fetched"]:
+            select += DETAIL_MODELS
+    if not args.skip_dbt:
+        state["scraped"]["dbt_rc"] = dbt_build(args.dbt_dir, args.dbt_state_dir, args, select)
+    return state
+
+
+def _wait(minutes: float, jitter: float) -> float:
+    return max(1.0, minutes * 60 * random.uniform(1 - jitter, 1 + jitter))
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Probe the IO site and scrape + build only when the grid changed",
+        parents=[io_scrape.arg_parser(add_help=False)],
+    )
+    ap.add_argument("--interval-min", type=float, default=60, help="Minutes between probes")
+    ap.add_argument("--jitter", type=float, default=0.2, help="Randomize each wait by +/- this fraction")
+    ap.add_argument("--retry-min", type=float, default=5, help="First wait after a failed cycle (doubles per failure)")
+    ap.add_argument("--max-backoff-min", type=float, default=240, help="Longest wait after repeated failures")
+    ap.add_argument(
+        "--max-quiet-hours", type=float, default=168, help="Full scrape at least this often even if the probe sees no change"
+    )
+    ap.add_argument("--details-dir", default="data/lake/io_details", help="Enrich detail pages after a scrape ('' to skip)")
+    ap.add_argument("--details-ttl-days", type=float, help="Refetch unchanged detail pages older than this (default: details' TTL_DAYS)")
+    ap.add_argument("--dbt-dir", default="dbt")
+    ap.add_argument("--dbt-state-dir", default="dbt/state", help="Manifest of the last successful build (state:modified)")
+    ap.add_argument("--dbt-threads", type=int, default=4)
+    ap.add_argument("--skip-dbt", action="store_true")
+    ap.add_argument("--once", action="store_true", help="Run a single probe cycle and exit (for cron)")
+    args = ap.parse_args()
+    if args.offline:
+        ap.error("--offline can't detect changes; run io_scrape directly")
+
+    state_path = ensure_dir(args.out) / STATE_NAME
+    failures = 0
+    while True:
+        state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        try:
+            state = cycle(args, state)
+            failures = 0
+            wait = _wait(args.interval_min, args.jitter)
+        except Exception as e:
+            failures += 1
+            state["failures"] = state.get("failures", 0) + 1
+            wait = _wait(min(args.retry_min * 2 ** (failures - 1), args.max_backoff_min), args.jitter)
+            print(f"Cycle failed ({failures} in a row): {e!r}")
+        with atomic_open(state_path, "w") as f:
+            json.dump(state, f, indent=2)
+        if args.once:
+            raise SystemExit(1 if failures else 0)
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        print(f"[{now}] next probe in {wait / 60:.1f} min", flush=True)
+        time.sleep(wait)
+
+
+if __name__ == "__main__":
+    main()
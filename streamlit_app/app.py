@@ -1,9 +1,8 @@
 import os
-import duckdb
-import pandas as pd
-import altair as alt
+from datetime import date, timedelta
 import streamlit as st
-from datetime import date
+
+from data_access import MOVES_DAYS, DataAccess, Filters
 
 
 # ---------- Config ----------
@@ -13,70 +12,27 @@ RAW_GLOB = os.getenv("IO_RAW_GLOB", "")
 # st.caption(f"RAW_GLOB: {RAW_GLOB or '(not set)'}")
 
 @st.cache_resource(show_spinner=False)
-def get_conn():
-    return duckdb.connect(DB_PATH, read_only=True)
-
-@st.cache_data(ttl=60, show_spinner=False)
-def load_dim_location():
-    con = get_conn()
-    return con.sql("""
-        select location_id, city, region
-        from dim_location
-        order by region, city
-    """).df()
-
-@st.cache_data(ttl=60, show_spinner=False)
-def load_current(filters):
-    con = get_conn()
-    base = """
-      select f.property_id, l.city, l.region, f.as_of_date, f.price, f.status,
-             f.acres, f.sqft
-      from fact_listing_current f
-      join dim_location l using (location_id)
-      where 1=1
-    """
-    params = []
-    if filters["regions"]:
-        base += " and l.region in ({})".format(",".join(["?"]*len(filters["regions"])))
-        params += filters["regions"]
-    if filters["cities"]:
-        base += " and l.city in ({})".format(",".join(["?"]*len(filters["cities"])))
-        params += filters["cities"]
-    if filters["status"]:
-        base += " and f.status in ({})".format(",".join(["?"]*len(filters["status"])))
-        params += filters["status"]
-    return con.execute(base, params).df()
-
-@st.cache_data(ttl=60, show_spinner=False)
-def load_price_trends(filters):
-    con = get_conn()
-    base = """
-      select city, region, week_start, median_price, listings
-      from mart_price_trends
-      where 1=1
-    """
-    params = []
-    if filters["regions"]:
-        base += " and region in ({})".format(",".join(["?"]*len(filters["regions"])))
-        params += filters["regions"]
-    if filters["cities"]:
-        base += " and city in ({})".format(",".join(["?"]*len(filters["cities"])))
-        params += filters["cities"]
-    return con.execute(base, params).df()
+def get_data_access():
+    # Shared across sessions: per-thread cursors + results memoized per warehouse build. The first
+    # render comes from the warm start file when it matches the warehouse (see data_access.py).
+    return DataAccess(DB_PATH)
+
+da = get_data_access()
 
 # ---------- Sidebar filters ----------
 st.sidebar.title("Filters")
 
-loc = load_dim_location()
-regions = sorted(loc["region"].dropna().unique().tolist())
-cities = sorted(loc["city"].dropna().unique().tolist())
+loc = da.locations().to_pylist()
+regions = sorted({l["region"] for l in loc if l["region"] is not None})
+cities = sorted({l["city"] for l in loc if l["city"] is not None})
 
-mode = st.sidebar.radio("Mode", ["Current", "Historical"], horizontal=True, key="mode_picker")
+modes = ["Current", "Historical"] + (["As of"] if da.has_history() else [])
+mode = st.sidebar.radio("Mode", modes, horizontal=True, key="mode_picker")
 
 sel_regions = st.sidebar.multiselect("Region", regions, key="region_filter")
 cities_scoped = sorted(
-    loc.loc[loc["region"].isin(sel_regions), "city"].unique().tolist()
-) if sel_regions else sorted(loc["city"].dropna().unique().tolist())
+    {l["city"] for l in loc if l["city"] is not None and l["region"] in sel_regions}
+) if sel_regions else cities
 sel_cities  = st.sidebar.multiselect("City", cities_scoped, key="city_filter")
 
 status_choices = [
@@ -85,117 +41,100 @@ status_choices = [
 ]
 sel_status  = st.sidebar.multiselect("Status", status_choices, key="status_filter")
 
-# cache-buster
+# cache-buster (results are also dropped automatically after a dbt run)
 if st.sidebar.button("Reload data"):
-    st.cache_data.clear()
+    da.clear()
 
-filters = {"regions": sel_regions, "cities": sel_cities, "status": sel_status}
+filters = Filters(tuple(sel_regions), tuple(sel_cities), tuple(sel_status))
 
 # ---------- Data selection (single source of truth) ----------
+date_range_used = None
 if mode == "Current":
     # No date picker in Current mode
-    df_display = load_current(filters)
-    trend = load_price_trends(filters)   # overall trend (or filter by city/region only)
-    date_range_used = None
+    source = "current"
+    trend = da.price_trends(filters)   # overall trend (or filter by city/region only)
+
+elif mode == "As of":
+    # The market as it stood on one day, read back from fact_price_history
+    source = "as_of"
+    hmin, hmax = da.as_of_bounds()
+    if hmin is None:
+        st.info("No price history yet. Run a scrape + dbt run to populate fact_price_history.")
+        st.stop()
+    as_of = st.sidebar.date_input("As of", value=hmax, min_value=hmin, max_value=hmax, key="as_of_picker")
+    filters = filters._replace(as_of=as_of)
+    trend = da.price_trends(filters)
 
 else:
-    # Historical mode (one date_input only)
-    con = get_conn()
-    dmin, dmax = con.sql(
-        "select min(posted_date), max(posted_date) from fact_listing_daily"
-    ).fetchone()
+    # Historical mode (one date_input only): each listing's latest state, by posted date
+    source = "historical"
+    dmin, dmax = da.date_bounds()
 
     if dmin is None or dmax is None:
         st.info("No historical rows found yet. Run a scrape + dbt run to populate fact_listing_daily.")
-        df_display = pd.DataFrame(columns=["property_id","city","region","as_of_date","price","status","acres","sqft"])
-        trend = pd.DataFrame(columns=["city","region","week_start","median_price","listings"])
-        date_range_used = None
+        st.stop()
+
+    picker = st.sidebar.date_input(
+        "Posted date range",
+        value=(dmin, dmax),
+        min_value=dmin,
+        max_value=dmax
+    )
+
+    # normalize picker to (start, end)
+    if isinstance(picker, (tuple, list)):
+        if len(picker) == 2:
+            start, end = picker
+        elif len(picker) == 1:
+            start = end = picker[0]
+        else:
+            start, end = dmin, dmax
     else:
-        picker = st.sidebar.date_input(
-            "Posted date range",
-            value=(dmin, dmax),
-            min_value=dmin,
-            max_value=dmax
-        )
+        start = end = picker
 
-        # normalize picker to (start, end)
-        if isinstance(picker, (tuple, list)):
-            if len(picker) == 2:
-                start, end = picker
-            elif len(picker) == 1:
-                start = end = picker[0]
-            else:
-                start, end = dmin, dmax
-        else:
-            start = end = picker
-
-        start = pd.to_datetime(start).date()
-        end   = pd.to_datetime(end).date()
-        if start > end:
-            start, end = end, start
-        date_range_used = (start, end)
-
-        q = """
-          select f.property_id, l.city, l.region, f.posted_date as as_of_date,
-                 f.price, f.status, f.acres, f.sqft
-          from fact_listing_daily f
-          join dim_location l using (location_id)
-          where f.posted_date between cast(? as date) and cast(? as date)
-        """
-        params = [start, end]
-
-        if filters["regions"]:
-            q += " and l.region in ({})".format(",".join(["?"] * len(filters["regions"])))
-            params += filters["regions"]
-
-        if filters["cities"]:
-            q += " and l.city in ({})".format(",".join(["?"] * len(filters["cities"])))
-            params += filters["cities"]
-
-        if filters["status"]:
-            q += " and f.status in ({})".format(",".join(["?"] * len(filters["status"])))
-            params += filters["status"]
-
-        df_display = con.execute(q, params).df()
-
-        # trend filtered to same window (optional)
-        trend = load_price_trends(filters)
-        if not trend.empty:
-            trend = trend[
-                (trend["week_start"] >= pd.to_datetime(start)) &
-                (trend["week_start"] <= pd.to_datetime(end))
-            ]
+    if start > end:
+        start, end = end, start
+    date_range_used = (start, end)
+    filters = filters._replace(start=start, end=end)
+
+    # trend filtered to same window
+    trend = da.price_trends(filters)
 
 # ---------- KPIs ----------
-st.title(f"IO Properties – {'Current Listings' if mode=='Current' else 'Historical Listings'}")
+titles = {"Current": "Current Listings", "Historical": "Historical Listings", "As of": f"Listings as of {filters.as_of}"}
+st.title(f"IO Properties – {titles[mode]}")
 
+kpi = da.kpis(source, filters)
 c1, c2, c3, c4 = st.columns(4)
-c1.metric("Listings", int(len(df_display)))
-if df_display["price"].notna().any():
-    c2.metric("Median price", f"${int(df_display['price'].median()):,}")
-else:
-    c2.metric("Median price", "n/a")
-c3.metric("Median sqft", "n/a" if df_display["sqft"].dropna().empty else int(df_display["sqft"].median()))
-c4.metric("Median acres", "n/a" if df_display["acres"].dropna().empty else round(float(df_display["acres"].median()), 3))
+c1.metric("Listings", int(kpi["listings"]))
+c2.metric("Median price", "n/a" if kpi["median_price"] is None else f"${int(kpi['median_price']):,}")
+c3.metric("Median sqft", "n/a" if kpi["median_sqft"] is None else int(kpi["median_sqft"]))
+c4.metric("Median acres", "n/a" if kpi["median_acres"] is None else round(float(kpi["median_acres"]), 3))
 
 # ---------- Charts ----------
+# Imported here, not at the top, so the sidebar and KPI tiles are on screen before altair (and
+# pandas, for the chart data) load on a cold start.
+import altair as alt
+
 st.subheader("Price distribution")
-if df_display["price"].dropna().empty:
+bins = da.price_histogram(source, filters)
+if not bins.num_rows:
     st.info("No price data available for the selected filters.")
 else:
-    hist = alt.Chart(df_display.dropna(subset=["price"])).mark_bar().encode(
-        alt.X("price", bin=alt.Bin(maxbins=30), title="Price"),
-        alt.Y("count()", title="Listings")
+    hist = alt.Chart(bins.to_pandas()).mark_bar().encode(
+        alt.X("bin_start:Q", bin="binned", title="Price"),
+        alt.X2("bin_end:Q"),
+        alt.Y("listings:Q", title="Listings")
     ).properties(height=280)
     st.altair_chart(hist, use_container_width=True)
 
 st.subheader("Weekly median price")
-if trend.empty:
+if not trend.num_rows:
     st.info("No trend rows for the selected filters{}.".format(
         "" if not date_range_used else f" in {date_range_used[0]} to {date_range_used[1]}"
     ))
 else:
-    line = alt.Chart(trend).mark_line(point=True).encode(
+    line = alt.Chart(trend.to_pandas()).mark_line(point=True).encode(
         x=alt.X("week_start:T", title="Week"),
         y=alt.Y("median_price:Q", title="Median price"),
         color=alt.Color("city:N", title="City")
@@ -203,18 +142,73 @@ else:
     st.altair_chart(line, use_container_width=True)
 
 # ---------- Table ----------
+# Keyset paging: session_state keeps the cursor each visited page started from, and is reset
+# whenever the mode or filters change. Only one page is ever fetched or sent to the browser.
 st.subheader("Listings")
+page_key = (source, filters)
+if st.session_state.get("page_key") != page_key:
+    st.session_state["page_key"] = page_key
+    st.session_state["page_cursors"] = [None]
+cursors = st.session_state["page_cursors"]
+page, next_cursor = da.listings_page(source, filters, after=cursors[-1])
+
 show_cols = ["property_id", "city", "region", "as_of_date", "status", "price", "acres", "sqft"]
-if "as_of_date" not in df_display.columns and "posted_date" in df_display.columns:
-    df_display = df_display.rename(columns={"posted_date": "as_of_date"})
-st.dataframe(
-    df_display[show_cols].sort_values(
-        ["region", "city", "as_of_date"], ascending=[True, True, False]
-    ),
-    use_container_width=True
-)
+st.dataframe(page.select(show_cols), use_container_width=True, hide_index=True)
+
+first_row = (len(cursors) - 1) * da.page_size
+p1, p2, p3 = st.columns([1, 1, 4])
+if p1.button("◀ Previous", disabled=len(cursors) == 1):
+    cursors.pop()
+    st.rerun()
+if p2.button("Next ▶", disabled=next_cursor is None):
+    cursors.append(next_cursor)
+    st.rerun()
+p3.caption(f"Rows {first_row + 1 if page.num_rows else 0:,}–{first_row + page.num_rows:,} of {int(kpi['listings']):,}")
+
+# ---------- Price history ----------
+if mode == "As of":
+    since = filters.as_of - timedelta(days=MOVES_DAYS)
+    st.subheader(f"Largest price changes, {since} to {filters.as_of}")
+    moves = da.price_moves(filters, since, filters.as_of)
+    if moves.num_rows:
+        st.dataframe(moves, use_container_width=True, hide_index=True)
+    else:
+        st.info("No price changes in that window.")
+
+if da.has_history():
+    st.subheader("Property price history")
+    if da.has_search():
+        # Typeahead: each edit reruns the script and re-ranks the whole index (a few ms).
+        text = st.text_input("Find a property by address", key="timeline_search")
+        matches = da.search(text, k=10).to_pylist() if text else []
+        pick = st.selectbox(
+            "Matches", matches, index=None, key="timeline_match",
+            format_func=lambda m: f"{m['address']}, {m['city']} ({m['property_id']})",
+            placeholder="No matches" if text and not matches else "Choose a property",
+        )
+        pid = pick["property_id"] if pick else None
+    else:
+        pid = st.number_input("Property ID", min_value=0, step=1, value=None, key="timeline_pid")
+    if pid is not None:
+        versions, events = da.timeline(int(pid))
+        if not versions.num_rows:
+            st.info(f"No history for property {int(pid)}.")
+        else:
+            # Each version holds its price until the next one starts (or until today while current).
+            hist = versions.to_pandas()
+            hist["valid_to"] = hist["valid_to"].fillna(date.today())
+            steps = alt.Chart(hist).mark_rule(strokeWidth=3).encode(
+                x=alt.X("valid_from:T", title="Date"),
+                x2="valid_to:T",
+                y=alt.Y("price:Q", title="Price"),
+                color=alt.Color("status:N", title="Status"),
+                tooltip=["valid_from:T", "valid_to:T", "price:Q", "status:N", "price_change_pct:Q"],
+            ).properties(height=240)
+            st.altair_chart(steps, use_container_width=True)
+            st.dataframe(events, use_container_width=True, hide_index=True)
 
 st.caption(
     f"DB: {DB_PATH} • Mode: {mode} • Regions: {sel_regions or 'All'} | Cities: {sel_cities or 'All'} | "
     f"Status: {sel_status or 'All'}{' | Range: ' + str(date_range_used) if date_range_used else ''}"
+    f"{' | As of: ' + str(filters.as_of) if filters.as_of else ''}"
 )
\ No newline at end of file
@@ -0,0 +1,678 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    import duckdb
+
+# Read-side query layer for the dashboard. Every query is a fixed, parameterized statement
+# (filters are bound as lists, an empty list meaning "no filter"), aggregates are computed in
+# DuckDB, and results come back as Arrow tables memoized per (build version, query, filters).
+# The build version is the warehouse file's mtime/size, so a dbt run invalidates everything
+# and reopens the pool. The listings table is paged with a keyset on
+# (region, city, as_of_date desc, property_id), so each page costs the same regardless of depth.
+# KPIs, the histogram and the trend chart are answered from mart_listing_cube (merging the
+# per-cell sketches) whenever the filters line up with its weekly grain; the fact tables are
+# only scanned for the listings table, partial-week date ranges, or a warehouse without the cube.
+# Address search ranks search_documents against a typed query with an in-memory trigram index
+# (AddressIndex), loaded from search_grams once per build.
+# "as_of" mode reads fact_price_history: the versions valid on Filters.as_of, one pass over the
+# table; a property's timeline and events are point lookups on its (property_id, ...) sort order.
+# Warm start: after each dbt build, write_warm_start saves the answers to the app's first render
+# in every mode (locations, bounds, default KPIs/histogram/trend/first page) plus per-table row
+# counts next to the warehouse, stamped with its build version. While the warehouse is still that
+# build, DataAccess serves those answers without importing duckdb or opening the file.
+
+DB_PATH = os.getenv("IO_DUCKDB_PATH", "dbt/target/io.duckdb")
+PAGE_SIZE = 100
+HIST_BINS = 30
+MEMO_SIZE = 256
+MOVES_DAYS = 30
+
+
+class Filters(NamedTuple):
+    regions: tuple[str, ...] = ()
+    cities: tuple[str, ...] = ()
+    status: tuple[str, ...] = ()
+    start: Optional[date] = None
+    end: Optional[date] = None
+    as_of: Optional[date] = None
+
+
+# Both modes expose the same columns; historical mode is each listing's latest known state.
+SOURCES = {
+    "current": """
+        select f.property_id, l.city, l.region, f.as_of_date, f.price, f.status, f.acres, f.sqft
+        from fact_listing_current f
+        join dim_location l using (location_id)
+    """,
+    "historical": """
+        select h.property_id, l.city, l.region, h.posted_date as as_of_date, h.price, h.status, h.acres, h.sqft
+        from (select * exclude (city, region) from int_io_latest_listing) h
+        join dim_location l using (location_id)
+    """,
+    "as_of": """
+        select h.property_id, l.city, l.region, h.posted_date as as_of_date, h.price, h.status, h.acres, h.sqft
+        from (
+          select * from fact_price_history
+          where valid_from <= $as_of and (valid_to is null or valid_to > $as_of)
+        ) h
+        join dim_location l using (location_id)
+    """,
+}
+# Modes mart_listing_cube has cells for.
+CUBE_SOURCES = ("current", "historical")
+
+_WHERE = """
+    where (len($regions) = 0 or list_contains($regions, region))
+      and (len($cities) = 0 or list_contains($cities, city))
+      and (len($status) = 0 or list_contains($status, status))
+      and ($start is null or as_of_date >= $start)
+      and ($end is null or as_of_date <= $end)
+"""
+
+# Without a date range the all_weeks rows answer; otherwise a week is in range when it overlaps
+# [start, end], and DataAccess only uses the cube when that is exact.
+_CUBE_WHERE = """
+    where source = $source
+      and all_weeks = ($start is null and $end is null)
+      and (len($regions) = 0 or list_contains($regions, region))
+      and (len($cities) = 0 or list_contains($cities, city))
+      and (len($status) = 0 or list_contains($status, status))
+      and ($start is null or week_start + 6 >= $start)
+      and ($end is null or week_start <= $end)
+"""
+
+# Merged sketch buckets (b) -> midpoint value and the rank range each bucket covers, per group.
+_SKETCH_VALUES = """
+    v as (
+      select
+        *,
+        gamma ** bucket * (1 + gamma) / 2 as value,
+        sum(n) over (partition by {keys} order by bucket) - n as first_rank,
+        sum(n) over (partition by {keys}) as total
+      from b
+    )
+"""
+
+# median() semantics over the ranks: the mean of the two middle values (the same one when odd).
+_SKETCH_MEDIAN = """(
+    max(value) filter (where first_rank <= (total - 1) // 2 and (total - 1) // 2 < first_rank + n)
+  + max(value) filter (where first_rank <= total // 2 and total // 2 < first_rank + n)
+) / 2"""
+
+SQL = {
+    "locations": "select location_id, city, region from dim_location order by region, city",
+    "date_bounds": "select min(posted_date), max(posted_date) from int_io_latest_listing",
+    "history_bounds": "select min(valid_from), max(coalesce(valid_to, valid_from)) from fact_price_history",
+    # KPIs and the price histogram share one pass: medians and bin counts are computed in DuckDB.
+    "summary": """
+        , k as (
+          select
+            count(*)      as listings,
+            median(price) as median_price,
+            median(sqft)  as median_sqft,
+            median(acres) as median_acres,
+            min(price)    as lo,
+            greatest((max(price) - min(price)) / $bins, 1e-9) as width
+          from src
+        ),
+        h as (
+          select least(floor((price - k.lo) / k.width), $bins - 1)::int as bin, count(*) as n
+          from src, k
+          where price is not null
+          group by 1
+        )
+        select
+          k.listings, k.median_price, k.median_sqft, k.median_acres,
+          (
+            select list(struct_pack(
+              bin_start := (k.lo + bin * k.width)::double,
+              bin_end   := (k.lo + (bin + 1) * k.width)::double,
+              listings  := n
+            ) order by bin)
+            from h
+          ) as histogram
+        from k
+    """,
+    # Sort keys are null-coalesced so the keyset comparison below is total.
+    "listings": """
+        , keyed as (
+          select
+            *,
+            coalesce(region, '')                      as _region,
+            coalesce(city, '')                        as _city,
+            coalesce(as_of_date, date '0001-01-01')   as _date
+          from src
+        )
+        select * exclude (_region, _city, _date)
+        from keyed
+        where $after_region is null
+           or _region > $after_region
+           or (_region = $after_region and _city > $after_city)
+           or (_region = $after_region and _city = $after_city and _date < $after_date)
+           or (_region = $after_region and _city = $after_city and _date = $after_date
+               and property_id > $after_id)
+        order by _region, _city, _date desc, property_id
+        limit $limit
+    """,
+    "table_exists": """
+        select count(*) > 0 as ok from information_schema.tables where table_name = $table
+    """,
+    # Same columns as "summary". Sketch buckets are merged across the matching cells, each bucket
+    # stands for its midpoint, and medians are clamped to the merged min/max.
+    "cube_summary": f"""
+        with cells as (select * from mart_listing_cube {_CUBE_WHERE}),
+        k as (
+          select
+            coalesce(sum(listings), 0)::bigint as listings,
+            min(price_min) as price_lo, max(price_max) as price_hi,
+            min(sqft_min)  as sqft_lo,  max(sqft_max)  as sqft_hi,
+            min(acres_min) as acres_lo, max(acres_max) as acres_hi,
+            greatest((max(price_max) - min(price_min)) / $bins, 1e-9) as width
+          from cells
+        ),
+        b as materialized (
+          select measure, gamma, bucket, sum(n) as n
+          from (
+            select 'price' as measure, sketch_gamma as gamma,
+                   unnest(map_keys(price_sketch)) as bucket, unnest(map_values(price_sketch)) as n
+            from cells
+            union all
+            select 'sqft', sketch_gamma, unnest(map_keys(sqft_sketch)), unnest(map_values(sqft_sketch))
+            from cells
+            union all
+            select 'acres', sketch_gamma, unnest(map_keys(acres_sketch)), unnest(map_values(acres_sketch))
+            from cells
+          )
+          group by all
+        ),
+        {_SKETCH_VALUES.format(keys="measure")},
+        m as materialized (select measure, {_SKETCH_MEDIAN} as median from v group by 1),
+        h as (
+          select least(floor((least(greatest(value, k.price_lo), k.price_hi) - k.price_lo) / k.width), $bins - 1)::int as bin,
+                 sum(n)::bigint as n
+          from v, k
+          where measure = 'price'
+          group by 1
+        )
+        select
+          k.listings,
+          least(greatest((select median from m where measure = 'price'), k.price_lo), k.price_hi) as median_price,
+          least(greatest((select median from m where measure = 'sqft'),  k.sqft_lo),  k.sqft_hi)  as median_sqft,
+          least(greatest((select median from m where measure = 'acres'), k.acres_lo), k.acres_hi) as median_acres,
+          (
+            select list(struct_pack(
+              bin_start := (k.price_lo + bin * k.width)::double,
+              bin_end   := (k.price_lo + (bin + 1) * k.width)::double,
+              listings  := n
+            ) order by bin)
+            from h
+          ) as histogram
+        from k
+    """,
+    # Weekly median of each listing's latest price like mart_price_trends, for status filters.
+    "cube_trends": f"""
+        with b as (
+          select city, region, week_start, gamma, bucket, sum(n) as n
+          from (
+            select city, region, week_start, sketch_gamma as gamma,
+                   unnest(map_keys(price_sketch)) as bucket, unnest(map_values(price_sketch)) as n
+            from mart_listing_cube
+            where source = 'historical' and not all_weeks and week_start is not null
+              and (len($regions) = 0 or list_contains($regions, region))
+              and (len($cities) = 0 or list_contains($cities, city))
+              and (len($status) = 0 or list_contains($status, status))
+              and ($start is null or week_start >= $start)
+              and ($end is null or week_start <= $end)
+          )
+          group by all
+        ),
+        {_SKETCH_VALUES.format(keys="city, region, week_start")}
+        select city, region, week_start, {_SKETCH_MEDIAN} as median_price, sum(n)::bigint as listings
+        from v
+        group by city, region, week_start
+        order by week_start
+    """,
+    "timeline": """
+        select valid_from, valid_to, price, status, price_delta, price_change_pct, days_on_market
+        from fact_price_history
+        where property_id = $property_id
+        order by valid_from
+    """,
+    "property_events": """
+        select event_date, event_type, price, prev_price, price_delta, price_change_pct, status, prev_status, days_on_market
+        from fact_price_events
+        where property_id = $property_id
+        order by event_date, event_type
+    """,
+    # Largest price moves in (since, until], for the same location/status filters.
+    "price_moves": """
+        select e.property_id, l.city, l.region, e.event_date, e.prev_price, e.price, e.price_delta,
+               e.price_change_pct, e.days_on_market
+        from fact_price_events e
+        join dim_location l using (location_id)
+        where e.event_type = 'price_change'
+          and e.event_date > $since and e.event_date <= $until
+          and (len($regions) = 0 or list_contains($regions, l.region))
+          and (len($cities) = 0 or list_contains($cities, l.city))
+          and (len($status) = 0 or list_contains($status, e.status))
+        order by abs(e.price_change_pct) desc nulls last, e.property_id
+        limit $limit
+    """,
+    # Point-in-time lookup for arbitrary (property_id, at) probes: the version valid on `at` (null
+    # columns when there was none, or the property was delisted then). Versions of a property don't
+    # overlap, so this is an equi-join on property_id with a range check; the open end is coalesced
+    # because an `or` in the join condition forces a nested-loop join.
+    "prices_at": """
+        select p.*, h.valid_from, h.price, h.status
+        from probes p
+        left join fact_price_history h
+          on h.property_id = p.property_id
+         and h.valid_from <= p.at
+         and coalesce(h.valid_to, date '9999-12-31') > p.at
+        order by p.property_id, p.at
+    """,
+    "trends": """
+        select city, region, week_start, median_price, listings
+        from mart_price_trends
+        where (len($regions) = 0 or list_contains($regions, region))
+          and (len($cities) = 0 or list_contains($cities, city))
+          and ($start is null or week_start >= $start)
+          and ($end is null or week_start <= $end)
+        order by week_start
+    """,
+}
+
+
+# Search documents and their trigram postings as document positions (in documents order).
+SEARCH_DOCUMENTS = """
+    select d.property_id, d.address, l.city, l.region, d.n_grams
+    from search_documents d
+    left join dim_location l using (location_id)
+    order by d.property_id
+"""
+SEARCH_POSTINGS = """
+    with d as (select property_id, row_number() over (order by property_id) - 1 as pos from search_documents)
+    select gram, list(d.pos order by d.pos) as docs
+    from search_grams join d using (property_id)
+    group by gram
+    order by gram
+"""
+# The canonical form and grams the documents were indexed with (macros dbt creates on-run-start).
+# Canonicalized in a subquery: trigrams() would otherwise expand canonical_address() three times.
+SEARCH_GRAMS = "select coalesce(trigrams(c), []) as grams from (select canonical_address($text) as c)"
+SEARCH_SCHEMA = pa.schema([
+    ("property_id", pa.int32()), ("address", pa.string()), ("city", pa.string()), ("region", pa.string()),
+    ("score", pa.float64()),
+])
+
+
+class AddressIndex:
+    # Posting lists in CSR form: distinct grams -> a slice of one int32 array of document positions.
+    # A query's postings are bincounted into shared-gram counts per document, and documents rank by
+    # the Jaccard similarity of the gram sets: shared / (query grams + document grams - shared).
+    def __init__(self, cursor: duckdb.DuckDBPyConnection):
+        import numpy as np
+
+        docs = cursor.execute(SEARCH_DOCUMENTS).fetch_arrow_table()
+        postings = cursor.execute(SEARCH_POSTINGS).fetch_arrow_table()
+        lists = postings["docs"].combine_chunks()
+        self._grams = {g: i for i, g in enumerate(postings["gram"].to_pylist())}
+        self._offsets = lists.offsets.to_numpy()
+        self._postings = lists.values.to_numpy().astype(np.int32)
+        self._n_grams = docs["n_grams"].to_numpy()
+        self.documents = docs.drop_columns(["n_grams"])
+
+    def __len__(self) -> int:
+        return self.documents.num_rows
+
+    def search(self, grams: list[str], k: int = 10) -> pa.Table:
+        import numpy as np
+
+        slots = [self._grams.get(g) for g in grams]
+        lists = [self._postings[self._offsets[i]:self._offsets[i + 1]] for i in slots if i is not None]
+        if not lists:
+            return SEARCH_SCHEMA.empty_table()
+        shared = np.bincount(np.concatenate(lists), minlength=len(self))
+        score = shared / (len(grams) + self._n_grams - shared)
+        k = min(k, int(np.count_nonzero(shared)))
+        top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.lexsort((top, -score[top]))]
+        return self.documents.take(top).append_column("score", pa.array(score[top]))
+
+
+def build_version(db_path: str = DB_PATH) -> tuple[int, int]:
+    st = os.stat(db_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def row_counts(con) -> dict[str, int]:
+    # count(*) of every base table in one query; duckdb_tables().estimated_size would be cheaper but
+    # still counts the rows an incremental delete+insert removed.
+    names = [r[0] for r in con.execute("select table_name from duckdb_tables() where schema_name = 'main' order by 1").fetchall()]
+    if not names:
+        return {}
+    return dict(con.execute(" union all ".join(f"select '{n}', count(*) from main.\"{n}\"" for n in names)).fetchall())
+
+
+class WarmStart(NamedTuple):
+    version: tuple[int, int]
+    summary: dict  # written_at, row_counts, kpis per mode
+    results: dict[str, pa.Table]  # repr of a DataAccess._query key -> its result
+
+    def fresh(self, db_path: str = DB_PATH) -> bool:
+        return self.version == build_version(db_path)
+
+
+def warm_start_path(db_path: str = DB_PATH) -> str:
+    return os.path.splitext(db_path)[0] + ".warm.arrow"
+
+
+def read_warm_start(db_path: str = DB_PATH) -> Optional[WarmStart]:
+    # One Arrow IPC file: a (key, result) row per saved query, each result an IPC stream.
+    try:
+        with pa.memory_map(warm_start_path(db_path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    meta = table.schema.metadata
+    results = {
+        key: pa.ipc.open_stream(result).read_all()
+        for key, result in zip(table["key"].to_pylist(), table["result"].to_pylist())
+    }
+    return WarmStart(tuple(json.loads(meta[b"version"])), json.loads(meta[b"summary"]), results)
+
+
+def _ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def write_warm_start(db_path: str = DB_PATH) -> WarmStart:
+    # Stamped with the version from before the queries: if a build lands meanwhile, it reads as stale.
+    version = build_version(db_path)
+    da = DataAccess(db_path, use_warm_start=False)
+    da._record = {}
+    try:
+        kpis = da.first_render()
+        counts = row_counts(da.pool.cursor())
+    finally:
+        da.pool.close()
+    summary = {
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "row_counts": counts,
+        "kpis": kpis,
+    }
+    table = pa.table(
+        {"key": list(da._record), "result": [_ipc(t) for t in da._record.values()]},
+        schema=pa.schema([("key", pa.string()), ("result", pa.binary())]),
+    ).replace_schema_metadata({"version": json.dumps(version), "summary": json.dumps(summary)})
+    path = warm_start_path(db_path)
+    tmp = f"{path}.tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return WarmStart(version, summary, dict(da._record))
+
+
+def _filter_params(f: Filters) -> dict:
+    return {
+        "regions": list(f.regions),
+        "cities": list(f.cities),
+        "status": list(f.status),
+        "start": f.start,
+        "end": f.end,
+        "as_of": f.as_of,
+    }
+
+
+def _typed(sql: str) -> str:
+    # Empty Python lists bind as an untyped list; pin the filter parameters to varchar[].
+    for name in ("regions", "cities", "status"):
+        sql = sql.replace(f"${name}", f"${name}::varchar[]")
+    for name in ("start", "end", "after_date", "as_of", "since", "until"):
+        sql = sql.replace(f"${name}", f"${name}::date")
+    return sql.replace("$after_region", "$after_region::varchar").replace("$after_city", "$after_city::varchar")
+
+
+@lru_cache(maxsize=None)
+def _statement(query: str, mode: Optional[str] = None) -> str:
+    if mode is None:
+        return _typed(SQL[query])
+    body = SQL[query]
+    # Queries that add their own CTEs start with a comma and chain onto src; only the summary
+    # reads src twice, so only it pays for materializing the filtered set.
+    hint = "materialized " if query == "summary" else ""
+    return _typed(f"with src as {hint}({SOURCES[mode]} {_WHERE}) {body}")
+
+
+class CursorPool:
+    # One read-only database handle; each thread (Streamlit session) gets its own cursor.
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._con: Optional[duckdb.DuckDBPyConnection] = None
+        self._generation = 0
+        self.version = build_version(db_path)
+
+    def _connect(self) -> None:
+        import duckdb
+
+        if self._con is not None:
+            self._con.close()
+        self._con = duckdb.connect(self.db_path, read_only=True)
+        self._generation += 1
+
+    def refresh(self) -> tuple[int, int]:
+        version = build_version(self.db_path)
+        with self._lock:
+            if self._con is None or version != self.version:
+                self.version = version
+                self._connect()
+        return self.version
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        if self._con is None:
+            self.refresh()
+        cur = getattr(self._local, "cursor", None)
+        if cur is None or getattr(self._local, "generation", None) != self._generation:
+            with self._lock:
+                cur = self._con.cursor()
+            self._local.cursor = cur
+            self._local.generation = self._generation
+        return cur
+
+    def close(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+
+class DataAccess:
+    def __init__(
+        self, db_path: str = DB_PATH, page_size: int = PAGE_SIZE, use_cube: bool = True, use_warm_start: bool = True
+    ):
+        self.pool = CursorPool(db_path)
+        self.page_size = page_size
+        self.use_cube = use_cube
+        self.use_warm_start = use_warm_start
+        self._memo = lru_cache(maxsize=MEMO_SIZE)(self._run)
+        # (build version it was checked against, the warm start if it matches); None = not checked yet.
+        self._warm: Optional[tuple[tuple[int, int], Optional[WarmStart]]] = None
+        self._record: Optional[dict[str, pa.Table]] = None
+        self._index_lock = threading.Lock()
+        self._index: Optional[AddressIndex] = None
+        self._index_version: Optional[tuple[int, int]] = None
+
+    def _run(self, version: tuple[int, int], query: str, mode: Optional[str], filters: Filters, extra: tuple):
+        sql = _statement(query, mode)
+        params = {**_filter_params(filters), **dict(extra)}
+        params = {k: v for k, v in params.items() if f"${k}" in sql}
+        return self.pool.cursor().execute(sql, params).fetch_arrow_table()
+
+    def _warm_start(self) -> Optional[WarmStart]:
+        # Re-read after every build, so a long-running app picks up the next warm start too.
+        if not self.use_warm_start:
+            return None
+        version = build_version(self.pool.db_path)
+        if self._warm is None or self._warm[0] != version:
+            warm = read_warm_start(self.pool.db_path)
+            self._warm = (version, warm if warm is not None and warm.version == version else None)
+        return self._warm[1]
+
+    def _query(self, query: str, mode: Optional[str] = None, filters: Filters = Filters(), **extra) -> pa.Table:
+        key = (query, mode, filters, tuple(sorted(extra.items())))
+        warm = self._warm_start()
+        if warm is not None and repr(key) in warm.results:
+            return warm.results[repr(key)]
+        version = self.pool.refresh()
+        result = self._memo(version, *key)
+        if self._record is not None:
+            self._record[repr(key)] = result
+        return result
+
+    def clear(self) -> None:
+        # Live queries from here on, until the next build.
+        self._memo.cache_clear()
+        if self.use_warm_start:
+            self._warm = (build_version(self.pool.db_path), None)
+
+    def default_filters(self) -> dict[str, Filters]:
+        # What app.py starts each mode with: no filters, the whole posted-date range, the last history day.
+        modes = {"current": Filters()}
+        lo, hi = self.date_bounds()
+        if lo is not None and hi is not None:
+            modes["historical"] = Filters(start=lo, end=hi)
+        if self.has_history() and self.as_of_bounds()[1] is not None:
+            modes["as_of"] = Filters(as_of=self.as_of_bounds()[1])
+        return modes
+
+    def first_render(self) -> dict[str, dict]:
+        # Every query app.py runs before a widget changes, in every mode; returns the KPIs per mode.
+        self.locations()
+        self.has_search()
+        kpis = {}
+        for mode, filters in self.default_filters().items():
+            self.price_trends(filters)
+            kpis[mode] = self.kpis(mode, filters)
+            self.price_histogram(mode, filters)
+            self.listings_page(mode, filters)
+            if mode == "as_of":
+                self.price_moves(filters, filters.as_of - timedelta(days=MOVES_DAYS), filters.as_of)
+        return kpis
+
+    def locations(self) -> pa.Table:
+        return self._query("locations")
+
+    def date_bounds(self) -> tuple[Optional[date], Optional[date]]:
+        lo, hi = self._query("date_bounds").to_pylist()[0].values()
+        return lo, hi
+
+    def _has_table(self, table: str) -> bool:
+        return self._query("table_exists", table=table).to_pylist()[0]["ok"]
+
+    def has_cube(self) -> bool:
+        return self.use_cube and self._has_table("mart_listing_cube")
+
+    def has_history(self) -> bool:
+        # Warehouses built before fact_price_history have no "as_of" mode or timelines.
+        return self._has_table("fact_price_history")
+
+    def _cube_covers(self, filters: Filters) -> bool:
+        # The cube is weekly: a date bound must fall on a week boundary (Monday start, Sunday end)
+        # or lie outside the data, otherwise the edge weeks would be over-counted.
+        if not self.has_cube():
+            return False
+        if filters.start is None and filters.end is None:
+            return True
+        lo, hi = self.date_bounds()
+        start_ok = filters.start is None or filters.start.weekday() == 0 or (lo is not None and filters.start <= lo)
+        end_ok = filters.end is None or filters.end.weekday() == 6 or (hi is not None and filters.end >= hi)
+        return start_ok and end_ok
+
+    def _summary(self, mode: str, filters: Filters) -> pa.Table:
+        if mode in CUBE_SOURCES and self._cube_covers(filters):
+            return self._query("cube_summary", None, filters, bins=HIST_BINS, source=mode)
+        return self._query("summary", mode, filters, bins=HIST_BINS)
+
+    def kpis(self, mode: str, filters: Filters) -> dict:
+        return self._summary(mode, filters).select(["listings", "median_price", "median_sqft", "median_acres"]).to_pylist()[0]
+
+    def price_histogram(self, mode: str, filters: Filters) -> pa.Table:
+        # (bin_start double, bin_end double, listings bigint) per bin, taken straight from the one-row
+        # list column: from_pylist would import pandas, and flatten/cast pyarrow.compute, which a warm
+        # start otherwise never loads.
+        hist = self._summary(mode, filters).column("histogram").combine_chunks()
+        bins = hist[0].values
+        return pa.Table.from_struct_array(hist.values[:0] if bins is None else bins)
+
+    def listings_page(
+        self, mode: str, filters: Filters, after: Optional[tuple] = None
+    ) -> tuple[pa.Table, Optional[tuple]]:
+        # Returns one page plus the keyset cursor for the next page (None on the last page).
+        keys = dict(zip(("after_region", "after_city", "after_date", "after_id"), after or (None,) * 4))
+        page = self._query("listings", mode, filters, limit=self.page_size + 1, **keys)
+        if page.num_rows <= self.page_size:
+            return page, None
+        page = page.slice(0, self.page_size)
+        last = page.slice(self.page_size - 1).to_pylist()[0]
+        return page, (last["region"] or "", last["city"] or "", last["as_of_date"] or date(1, 1, 1), last["property_id"])
+
+    def as_of_bounds(self) -> tuple[Optional[date], Optional[date]]:
+        lo, hi = self._query("history_bounds").to_pylist()[0].values()
+        return lo, hi
+
+    def timeline(self, property_id: int) -> tuple[pa.Table, pa.Table]:
+        # (versions, events) of one property.
+        return (
+            self._query("timeline", property_id=property_id),
+            self._query("property_events", property_id=property_id),
+        )
+
+    def price_moves(self, filters: Filters, since: date, until: date, limit: int = 20) -> pa.Table:
+        return self._query("price_moves", None, filters, since=since, until=until, limit=limit)
+
+    def prices_at(self, probes: pa.Table) -> pa.Table:
+        # probes: property_id, at (date) plus any columns to carry through. Not memoized.
+        self.pool.refresh()
+        cur = self.pool.cursor()
+        cur.register("probes", probes)
+        try:
+            return cur.execute(SQL["prices_at"]).fetch_arrow_table()
+        finally:
+            cur.unregister("probes")
+
+    def has_search(self) -> bool:
+        return self._has_table("search_grams")
+
+    def address_index(self) -> Optional[AddressIndex]:
+        # Built on first use after each warehouse build; None before the search models exist.
+        version = self.pool.refresh()
+        with self._index_lock:
+            if self._index_version != version:
+                self._index = AddressIndex(self.pool.cursor()) if self.has_search() else None
+                self._index_version = version
+            return self._index
+
+    def search(self, text: str, k: int = 10) -> pa.Table:
+        # Top-k properties whose canonical address + city best match `text` (typeahead).
+        index = self.address_index()
+        if index is None or not text.strip():
+            return SEARCH_SCHEMA.empty_table()
+        grams = self.pool.cursor().execute(SEARCH_GRAMS, {"text": text}).fetchone()[0]
+        return index.search(grams, k)
+
+    def price_trends(self, filters: Filters) -> pa.Table:
+        # mart_price_trends is exact and smaller; it just has no status dimension.
+        return self._query("cube_trends" if filters.status and self.has_cube() else "trends", None, filters)